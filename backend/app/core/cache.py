@@ -0,0 +1,358 @@
+"""
+Response cache for read-heavy dashboard endpoints
+
+Responses are stored as JSON in Redis (settings.REDIS_URL) under keys built
+from the endpoint and its query parameters. When Redis is not installed or
+not reachable, an in-process LRU is used instead, so the API and scripts run
+without any outside services.
+
+Every entry is tagged with what it depends on: "building:<id>" for endpoints
+with a building_id parameter, "campus" otherwise. Ingesting readings for a
+building drops both that building's entries and every campus-wide entry.
+Invalidation reaches other processes only through Redis: the in-process
+fallback of the API cannot be cleared by an ingestion script, so its entries
+live at most settings.CACHE_MEMORY_MAX_TTL seconds.
+
+Concurrent misses for the same key coalesce into a single computation: within
+a process through a shared future, across processes through a short Redis lock.
+"""
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    logging.warning("redis not available - using in-process response cache")
+
+KEY_PREFIX = "greenpulse:cache"
+CAMPUS_TAG = "campus"
+
+# Seconds to wait before retrying Redis after a connection error
+REDIS_RETRY_SECONDS = 30
+
+# Cross-process single-flight: how long a computing worker holds the lock and how often others poll
+LOCK_TIMEOUT_SECONDS = 10
+LOCK_POLL_SECONDS = 0.05
+
+def building_tag(building_id: int) -> str:
+    return f"building:{building_id}"
+
+class MemoryCache:
+    """Thread-safe LRU of JSON strings with per-entry expiry and tags"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tags: Dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._untag(key, self._entries.pop(key)[2])
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int, tags: Iterable[str]):
+        tags = tuple(tags)
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._untag(key, previous[2])
+            self._entries[key] = (value, time.monotonic() + ttl, tags)
+            self._entries.move_to_end(key)
+            for tag in tags:
+                self._tags[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                evicted, (_, _, evicted_tags) = self._entries.popitem(last=False)
+                self._untag(evicted, evicted_tags)
+
+    def _untag(self, key: str, tags: Iterable[str]):
+        """Remove a dropped entry from its tag sets (lock held)"""
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    entry = self._entries.pop(key, None)
+                    if entry is not None:
+                        self._untag(key, entry[2])
+                        removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+class CacheMetrics:
+    """Hit/miss counters per cached endpoint"""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+        )
+        self.invalidations = 0
+
+    def record(self, endpoint: str, outcome: str):
+        self._counts[endpoint][outcome] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, counts in self._counts.items():
+            lookups = counts["hits"] + counts["misses"] + counts["coalesced"]
+            endpoints[endpoint] = {
+                **counts,
+                "hit_rate": (counts["hits"] + counts["coalesced"]) / lookups if lookups else 0
+            }
+        return {"endpoints": endpoints, "invalidations": self.invalidations}
+
+memory_cache = MemoryCache(settings.CACHE_MAX_ENTRIES)
+metrics = CacheMetrics()
+
+# Lazily created Redis clients, disabled for REDIS_RETRY_SECONDS after an error
+_async_redis = None
+_sync_redis = None
+_redis_retry_at = 0.0
+
+# In-process single-flight: cache key -> future of the serialized response
+_inflight: Dict[str, asyncio.Future] = {}
+
+def _redis_failed(error: Exception):
+    global _async_redis, _sync_redis, _redis_retry_at
+    logger.warning(f"Redis cache unavailable, using in-process cache: {error}")
+    _async_redis = None
+    _sync_redis = None
+    _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+async def _get_async_redis():
+    global _async_redis
+    if not REDIS_AVAILABLE or time.monotonic() < _redis_retry_at:
+        return None
+    if _async_redis is None:
+        try:
+            client = aioredis.from_url(settings.REDIS_URL, decode_responses=True, socket_timeout=1)
+            await client.ping()
+            _async_redis = client
+        except Exception as e:
+            _redis_failed(e)
+    return _async_redis
+
+def _get_sync_redis():
+    global _sync_redis
+    if not REDIS_AVAILABLE or time.monotonic() < _redis_retry_at:
+        return None
+    if _sync_redis is None:
+        try:
+            client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True, socket_timeout=1)
+            client.ping()
+            _sync_redis = client
+        except Exception as e:
+            _redis_failed(e)
+    return _sync_redis
+
+def cache_key(endpoint: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{KEY_PREFIX}:{endpoint}:{digest}"
+
+def _tag_key(tag: str) -> str:
+    return f"{KEY_PREFIX}:tag:{tag}"
+
+def _key_params(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Query/path parameters of a call (dependencies such as the db session are skipped)"""
+    return {
+        name: value for name, value in kwargs.items()
+        if value is None or isinstance(value, (str, int, float, bool, list, tuple))
+    }
+
+async def _cache_get(key: str) -> Optional[str]:
+    client = await _get_async_redis()
+    if client is not None:
+        try:
+            return await client.get(key)
+        except Exception as e:
+            _redis_failed(e)
+    return memory_cache.get(key)
+
+async def _cache_set(key: str, value: str, ttl: int, tags: List[str]):
+    client = await _get_async_redis()
+    if client is not None:
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(key, value, ex=ttl)
+                for tag in tags:
+                    pipe.sadd(_tag_key(tag), key)
+                    pipe.expire(_tag_key(tag), max(ttl, 3600))
+                await pipe.execute()
+            return
+        except Exception as e:
+            _redis_failed(e)
+    memory_cache.set(key, value, min(ttl, settings.CACHE_MEMORY_MAX_TTL), tags)
+
+async def _compute_with_lock(key: str, compute: Callable, ttl: int, tags: List[str]) -> str:
+    """Compute and store a response, letting only one process do so per key at a time"""
+    client = await _get_async_redis()
+    lock_key = f"{key}:lock"
+    acquired = False
+
+    if client is not None:
+        try:
+            acquired = await client.set(lock_key, "1", nx=True, ex=LOCK_TIMEOUT_SECONDS)
+            if not acquired:
+                # Another worker is computing it; wait for its result
+                deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(LOCK_POLL_SECONDS)
+                    value = await client.get(key)
+                    if value is not None:
+                        return value
+        except Exception as e:
+            _redis_failed(e)
+            acquired = False
+
+    try:
+        value = json.dumps(jsonable_encoder(await compute()))
+        await _cache_set(key, value, ttl, tags)
+        return value
+    finally:
+        if acquired:
+            try:
+                await client.delete(lock_key)
+            except Exception as e:
+                _redis_failed(e)
+
+def cached(ttl: int):
+    """
+    Cache an endpoint's JSON response for `ttl` seconds.
+
+    Apply below the router decorator; the wrapped signature is preserved so
+    FastAPI still resolves the endpoint's parameters and dependencies.
+    """
+    def decorator(func: Callable):
+        endpoint = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return await func(*args, **kwargs)
+
+            params = _key_params(kwargs)
+            key = cache_key(endpoint, params)
+            tags = [building_tag(params["building_id"])] if "building_id" in params else [CAMPUS_TAG]
+
+            value = await _cache_get(key)
+            if value is not None:
+                metrics.record(endpoint, "hits")
+                return json.loads(value)
+
+            while key in _inflight:
+                inflight = _inflight[key]
+                # Returns when the leader finishes, however it finishes; cancelling this request does not cancel it
+                await asyncio.wait({inflight})
+                if not inflight.cancelled():
+                    metrics.record(endpoint, "coalesced")
+                    return json.loads(inflight.result())
+                # The leader's request was cancelled: compute here, or wait for whoever took over
+
+            metrics.record(endpoint, "misses")
+            future = asyncio.get_running_loop().create_future()
+            _inflight[key] = future
+            try:
+                value = await _compute_with_lock(key, lambda: func(*args, **kwargs), ttl, tags)
+                future.set_result(value)
+            except Exception as e:
+                metrics.record(endpoint, "errors")
+                future.set_exception(e)
+                # Waiters re-raise it; mark it retrieved so an unawaited future does not warn
+                future.exception()
+                raise
+            finally:
+                # Cancelled (client disconnect, timeout) or interrupted: wake the waiters
+                if not future.done():
+                    future.cancel()
+                _inflight.pop(key, None)
+
+            return json.loads(value)
+
+        return wrapper
+    return decorator
+
+def invalidate_buildings(building_ids: Iterable[int]) -> int:
+    """
+    Drop cached responses for the given buildings and all campus-wide responses.
+
+    Synchronous so ingestion scripts can call it after committing readings.
+    Other processes' in-process caches are only reached through Redis; without
+    it they expire after settings.CACHE_MEMORY_MAX_TTL seconds.
+    """
+    tags = [building_tag(int(building_id)) for building_id in building_ids] + [CAMPUS_TAG]
+    removed = memory_cache.invalidate_tags(tags)
+
+    client = _get_sync_redis()
+    if client is not None:
+        try:
+            tag_keys = [_tag_key(tag) for tag in tags]
+            with client.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                members = pipe.execute()
+            keys = set().union(*members)
+            removed += client.delete(*keys, *tag_keys)
+        except Exception as e:
+            _redis_failed(e)
+
+    metrics.invalidations += 1
+    return removed
+
+def invalidate_all() -> int:
+    """Drop every cached response (e.g. after building metadata is reloaded)"""
+    memory_cache.clear()
+    removed = 0
+
+    client = _get_sync_redis()
+    if client is not None:
+        try:
+            keys = list(client.scan_iter(match=f"{KEY_PREFIX}:*", count=1000))
+            removed = client.delete(*keys) if keys else 0
+        except Exception as e:
+            _redis_failed(e)
+
+    metrics.invalidations += 1
+    return removed
+
+def cache_stats() -> Dict[str, Any]:
+    """Backend in use plus per-endpoint hit/miss counters"""
+    return {
+        "enabled": settings.CACHE_ENABLED,
+        "backend": "redis" if _async_redis is not None or _sync_redis is not None else "memory",
+        "memory_entries": len(memory_cache._entries),
+        **metrics.snapshot()
+    }
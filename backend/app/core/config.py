@@ -9,6 +9,11 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Response cache (Redis, or an in-process LRU when Redis is unavailable)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_MEMORY_MAX_TTL: int = 30  # Seconds; ingestion in another process cannot invalidate the in-process cache
+    
     # API
     API_V1_STR: str = "/api"
     PROJECT_NAME: str = "GreenPulse"
@@ -31,9 +36,14 @@ class Settings(BaseSettings):
     # ML Models
     MODEL_STORAGE_PATH: str = "./models"
     MLFLOW_TRACKING_URI: str = "sqlite:///mlflow.db"
+    TRAINING_WORKERS: int = 2  # Processes for background model training
+    MODEL_CACHE_MAX_MB: int = 512  # Memory cap for loaded models in each API worker
+    FORECAST_BACKEND: str = "fourier_ridge"  # 'fourier_ridge' (NumPy) or 'prophet'
+    WEATHER_CACHE_MINUTES: int = 15  # Site weather covariate lookups cached per API worker
     
     # Data Processing
     BATCH_SIZE: int = 10000
+    STORE_READING_WEATHER: bool = True  # Also copy weather onto energy_readings rows (the rollups average it; other readers join site_weather)
     MAX_WORKERS: int = 4
     
     class Config:
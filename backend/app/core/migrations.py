@@ -0,0 +1,100 @@
+"""
+Schema migrations (Alembic) for GreenPulse
+
+Replaces Base.metadata.create_all: the API lifespan and the ingestion scripts
+call run_migrations() to bring the database to the latest revision.
+
+Usage (from backend/):
+    python -m app.core.migrations                       # upgrade to head
+    python -m app.core.migrations refresh-recent-index  # roll the partial index cutoff forward
+"""
+from datetime import datetime, timedelta
+import logging
+import os
+import sys
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.core.database import engine
+from app.core.timescale import is_hypertable
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Revision matching the schema that Base.metadata.create_all used to produce
+BASELINE_REVISION = "0001"
+
+# Window covered by the partial "recent readings" index
+RECENT_INDEX_NAME = "ix_energy_readings_recent"
+RECENT_INDEX_DAYS = 90
+
+def get_alembic_config() -> Config:
+    """Build the Alembic config pointing at backend/migrations"""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["configure_logger"] = False
+    return config
+
+def run_migrations(bind: Optional[Engine] = None, revision: str = "head"):
+    """Upgrade the database schema to the given revision"""
+    config = get_alembic_config()
+
+    with (bind or engine).begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+
+        # Databases created by Base.metadata.create_all predate migrations
+        if "alembic_version" not in tables and "energy_readings" in tables:
+            logger.info(f"Stamping existing schema at baseline revision {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, revision)
+
+def recent_index_cutoff(days: int = RECENT_INDEX_DAYS) -> datetime:
+    """Cutoff for the partial index, aligned to midnight so rebuilds are idempotent per day"""
+    return (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def recent_index_sql(index_name: str, cutoff: datetime, concurrently: bool = False) -> str:
+    """
+    DDL for the partial index over recent readings.
+
+    Partial index predicates must be immutable, so the cutoff is a literal
+    rather than now() - interval; refresh_recent_index() rolls it forward.
+    """
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {index_name} "
+        f"ON energy_readings (building_id, timestamp) "
+        f"INCLUDE (meter_reading, meter_type) "
+        f"WHERE timestamp >= '{cutoff.isoformat(sep=' ')}'"
+    )
+
+def refresh_recent_index(days: int = RECENT_INDEX_DAYS):
+    """Rebuild the partial index with a fresh cutoff without blocking writes"""
+    new_name = f"{RECENT_INDEX_NAME}_new"
+    cutoff = recent_index_cutoff(days)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if is_hypertable(connection):
+            # Chunk exclusion replaces the partial index (dropped in migration 0003)
+            logger.info("energy_readings is a hypertable; no recent index to refresh")
+            return
+
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {new_name}"))
+        connection.execute(text(recent_index_sql(new_name, cutoff, concurrently=True)))
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {RECENT_INDEX_NAME}"))
+        connection.execute(text(f"ALTER INDEX {new_name} RENAME TO {RECENT_INDEX_NAME}"))
+
+    logger.info(f"Rebuilt {RECENT_INDEX_NAME} with cutoff {cutoff}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "refresh-recent-index":
+        refresh_recent_index()
+    else:
+        run_migrations()
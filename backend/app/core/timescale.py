@@ -0,0 +1,94 @@
+"""
+TimescaleDB helpers for GreenPulse
+
+energy_readings becomes a hypertable with hourly and daily continuous
+aggregates when the timescaledb extension is installed (migration 0003).
+Everything here degrades to plain Postgres when it is not.
+
+Usage (from backend/):
+    python -m app.core.timescale refresh-rollups   # materialize rollups after a bulk load
+"""
+from datetime import datetime
+import logging
+import sys
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Continuous aggregates keyed by bucket width
+ROLLUP_VIEWS = {
+    "hour": "energy_readings_hourly",
+    "day": "energy_readings_daily",
+}
+
+# Hypertable chunk size: ~1,400 buildings x ~2.4 meters x 168 hours is roughly
+# 0.5M rows per chunk, small enough for a chunk's indexes to stay in memory
+CHUNK_TIME_INTERVAL = "7 days"
+
+_rollups_available: Optional[bool] = None
+
+def timescale_installable(connection: Connection) -> bool:
+    """Whether the timescaledb extension can be enabled on this server"""
+    return bool(connection.execute(text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'"
+    )).scalar())
+
+def is_hypertable(connection: Connection, table_name: str = "energy_readings") -> bool:
+    """Whether the given table has been converted to a hypertable"""
+    extension = connection.execute(text(
+        "SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'"
+    )).scalar()
+    if not extension:
+        return False
+
+    return bool(connection.execute(text(
+        "SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = :table_name"
+    ), {"table_name": table_name}).scalar())
+
+def rollups_available(db: Session) -> bool:
+    """Whether the continuous aggregates exist (checked once per process)"""
+    global _rollups_available
+    if _rollups_available is None:
+        _rollups_available = all(
+            db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": view}).scalar()
+            for view in ROLLUP_VIEWS.values()
+        )
+        logger.info(f"Energy rollups {'enabled' if _rollups_available else 'unavailable, using raw readings'}")
+    return _rollups_available
+
+def refresh_rollups(
+    bind: Optional[Engine] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """
+    Materialize the continuous aggregates over [start, end) (everything by default).
+
+    The refresh policies only cover a trailing window, so bulk loads of
+    historical data (ASHRAE train.csv) need an explicit refresh.
+    """
+    with (bind or engine).connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if not is_hypertable(connection):
+            logger.info("energy_readings is not a hypertable; no rollups to refresh")
+            return
+
+        for view in ROLLUP_VIEWS.values():
+            connection.execute(
+                text(f"CALL refresh_continuous_aggregate('{view}', :start, :end)"),
+                {"start": start, "end": end}
+            )
+            logger.info(f"Refreshed continuous aggregate {view}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "refresh-rollups":
+        refresh_rollups()
+    else:
+        print(__doc__)
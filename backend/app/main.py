@@ -4,19 +4,24 @@ from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 
+from app.core.cache import cache_stats
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.routers import buildings, energy, analytics, insights, ml_analytics
+from app.core.database import async_engine
+from app.core.migrations import run_migrations
+from app.services.training import shutdown_training_pool
+from app.routers import buildings, energy, analytics, insights, ml_analytics, export
 from .websocket import websocket_endpoint
 
-# Create tables on startup
+# Apply schema migrations on startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    Base.metadata.create_all(bind=engine)
+    run_migrations()
     print("🚀 GreenPulse API started successfully!")
     yield
     # Shutdown
+    shutdown_training_pool()
+    await async_engine.dispose()
     print("🛑 GreenPulse API shutting down...")
 
 app = FastAPI(
@@ -42,6 +47,7 @@ app.include_router(energy.router, prefix=f"{settings.API_V1_STR}/energy", tags=[
 app.include_router(analytics.router, prefix=f"{settings.API_V1_STR}/analytics", tags=["analytics"])
 app.include_router(insights.router, prefix=f"{settings.API_V1_STR}/insights", tags=["insights"])
 app.include_router(ml_analytics.router, tags=["ml-analytics"])
+app.include_router(export.router, prefix=f"{settings.API_V1_STR}/export", tags=["export"])
 
 # WebSocket endpoint
 @app.websocket("/api/ws")
@@ -65,6 +71,11 @@ async def health_check():
         "version": settings.VERSION
     }
 
+@app.get("/health/cache")
+async def cache_health():
+    """Response cache backend and per-endpoint hit/miss counters"""
+    return cache_stats()
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
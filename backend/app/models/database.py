@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ARRAY, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Boolean, Text, ARRAY, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
@@ -33,12 +33,14 @@ class EnergyReading(Base):
     __tablename__ = "energy_readings"
     
     id = Column(Integer, primary_key=True, index=True)
-    building_id = Column(Integer, nullable=False, index=True)
+    building_id = Column(Integer, nullable=False)
     timestamp = Column(DateTime, nullable=False, index=True)
     meter_type = Column(Integer)  # 0=electricity, 1=chilledwater, 2=steam, 3=hotwater
     meter_reading = Column(Float, default=0)
     
-    # Environmental data (from weather)
+    # Environmental data (from weather), repeated per reading. site_weather is
+    # the source of truth; these are only written while
+    # settings.STORE_READING_WEATHER is on and will be dropped (see migration 0007)
     air_temperature = Column(Float)
     cloud_coverage = Column(Float)
     dew_temperature = Column(Float)
@@ -54,6 +56,24 @@ class EnergyReading(Base):
     efficiency_score = Column(Float)
     
     created_at = Column(DateTime, server_default=func.now())
+    
+    # Schema changes are applied through migrations/ (see app.core.migrations);
+    # the partial ix_energy_readings_recent index is managed there only
+    __table_args__ = (
+        # One row per building/meter/hour; also the composite index for
+        # building + meter + time range queries
+        Index(
+            'uq_energy_readings_building_meter_ts',
+            building_id, meter_type, timestamp,
+            unique=True
+        ),
+        # Covering index for "latest reading per building" lookups (index-only scan)
+        Index(
+            'ix_energy_readings_building_latest',
+            building_id, timestamp.desc(),
+            postgresql_include=['meter_reading', 'meter_type']
+        ),
+    )
 
 class Department(Base):
     __tablename__ = "departments"
@@ -74,12 +94,53 @@ class MLModel(Base):
     model_name = Column(String(255), nullable=False)
     model_type = Column(String(100))  # 'anomaly_detection', 'forecasting'
     building_id = Column(Integer)
+    meter_type = Column(Integer)  # NULL = trained on all meters
     model_version = Column(String(50))
     model_parameters = Column(JSON)
     accuracy_score = Column(Float)
     status = Column(String(50), default='active')
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Registry lookups: latest active model per building/meter
+        Index('ix_ml_models_registry_lookup', model_type, building_id, meter_type, status),
+    )
+
+class SiteWeather(Base):
+    __tablename__ = "site_weather"
+    
+    # One row per site and hour, loaded once by ingestion (weather_train.csv
+    # observed, weather_test.csv as the forecast feed). Buildings join on
+    # buildings.site_id; forecasters read future covariates from here.
+    site_id = Column(Integer, primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+    air_temperature = Column(Float)
+    cloud_coverage = Column(Float)
+    dew_temperature = Column(Float)
+    precip_depth_1_hr = Column(Float)
+    sea_level_pressure = Column(Float)
+    wind_direction = Column(Float)
+    wind_speed = Column(Float)
+    source = Column(String(20), default='observed')  # 'observed' or 'forecast'
+    created_at = Column(DateTime, server_default=func.now())
+
+class Forecast(Base):
+    __tablename__ = "forecasts"
+    
+    # One row per building/meter/hour: the latest forecast made for that hour.
+    # Rows for hours that have passed are kept, so accuracy is a join on
+    # energy_readings' (building_id, meter_type, timestamp) key.
+    building_id = Column(Integer, primary_key=True)
+    meter_type = Column(Integer, primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+    issued_at = Column(DateTime, nullable=False)  # Last reading the forecast was made from
+    horizon_hours = Column(Integer, nullable=False)  # Hours between issued_at and timestamp
+    predicted_kwh = Column(Float, nullable=False)
+    confidence_lower = Column(Float)
+    confidence_upper = Column(Float)
+    backend = Column(String(50))  # Forecasting backend (settings.FORECAST_BACKEND)
+    created_at = Column(DateTime, server_default=func.now())
 
 class Anomaly(Base):
     __tablename__ = "anomalies"
@@ -141,4 +202,17 @@ class UserAction(Base):
     challenge_id = Column(Integer)
     timestamp = Column(DateTime, server_default=func.now())
     energy_savings_kwh = Column(Float)
-    cost_savings_usd = Column(Float)
\ No newline at end of file
+    cost_savings_usd = Column(Float)
+
+class IngestionCheckpoint(Base):
+    __tablename__ = "ingestion_checkpoints"
+    
+    # One row per source file (e.g. 'train.csv'); committed with each loaded chunk
+    source = Column(String(255), primary_key=True)
+    file_size = Column(BigInteger)
+    file_offset = Column(BigInteger, nullable=False, default=0)  # Byte offset after the last loaded chunk
+    chunk_number = Column(Integer, nullable=False, default=0)  # Chunks loaded so far
+    rows_read = Column(BigInteger, default=0)
+    rows_loaded = Column(BigInteger, default=0)
+    status = Column(String(50), default='in_progress')  # 'in_progress', 'completed'
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
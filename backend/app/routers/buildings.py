@@ -1,25 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.database import Building, EnergyReading
-from sqlalchemy import func, desc
+from app.services.readings import get_buildings_with_latest_reading
+from sqlalchemy import func, desc, select
 
 router = APIRouter()
 
 @router.get("/")
-async def get_buildings(db: Session = Depends(get_db)):
+async def get_buildings(db: AsyncSession = Depends(get_async_db)):
     """Get all buildings with basic info"""
-    buildings = db.query(Building).all()
-    
     result = []
-    for building in buildings:
-        # Get latest energy reading
-        latest_reading = db.query(EnergyReading)\
-            .filter(EnergyReading.building_id == building.id)\
-            .order_by(desc(EnergyReading.timestamp))\
-            .first()
-        
+    for building, latest_reading in await db.run_sync(get_buildings_with_latest_reading):
         current_usage = latest_reading.meter_reading if latest_reading else 0
         
         result.append({
@@ -36,19 +29,20 @@ async def get_buildings(db: Session = Depends(get_db)):
     return result
 
 @router.get("/{building_id}")
-async def get_building_details(building_id: int, db: Session = Depends(get_db)):
+async def get_building_details(building_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get detailed information about a specific building"""
-    building = db.query(Building).filter(Building.id == building_id).first()
+    building = await db.get(Building, building_id)
     
     if not building:
         raise HTTPException(status_code=404, detail="Building not found")
     
     # Get recent energy statistics
-    recent_readings = db.query(EnergyReading)\
-        .filter(EnergyReading.building_id == building_id)\
-        .order_by(desc(EnergyReading.timestamp))\
-        .limit(168)\
-        .all()  # Last week of hourly readings
+    recent_readings = (await db.scalars(
+        select(EnergyReading)
+        .where(EnergyReading.building_id == building_id)
+        .order_by(desc(EnergyReading.timestamp))
+        .limit(168)
+    )).all()  # Last week of hourly readings
     
     total_usage = sum(r.meter_reading for r in recent_readings)
     avg_usage = total_usage / len(recent_readings) if recent_readings else 0
@@ -70,23 +64,26 @@ async def get_building_details(building_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/{building_id}/summary")
-async def get_building_summary(building_id: int, db: Session = Depends(get_db)):
+async def get_building_summary(building_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get building energy summary for dashboard"""
-    building = db.query(Building).filter(Building.id == building_id).first()
+    building = await db.get(Building, building_id)
     
     if not building:
         raise HTTPException(status_code=404, detail="Building not found")
     
     # Get latest reading
-    latest_reading = db.query(EnergyReading)\
-        .filter(EnergyReading.building_id == building_id)\
-        .order_by(desc(EnergyReading.timestamp))\
-        .first()
+    latest_reading = (await db.scalars(
+        select(EnergyReading)
+        .where(EnergyReading.building_id == building_id)
+        .order_by(desc(EnergyReading.timestamp))
+        .limit(1)
+    )).first()
     
     # Get daily average for comparison
-    daily_avg = db.query(func.avg(EnergyReading.meter_reading))\
-        .filter(EnergyReading.building_id == building_id)\
-        .scalar() or 0
+    daily_avg = await db.scalar(
+        select(func.avg(EnergyReading.meter_reading))
+        .where(EnergyReading.building_id == building_id)
+    ) or 0
     
     current_usage = latest_reading.meter_reading if latest_reading else 0
     status = "normal"
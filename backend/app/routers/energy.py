@@ -1,27 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import datetime, timedelta
-from app.core.database import get_db
+import pandas as pd
+from app.core.cache import cached
+from app.core.database import get_async_db
 from app.models.database import EnergyReading, Building
-from sqlalchemy import func, desc, and_
+from app.services.patterns import usage_profile
+from app.services.downsampling import downsample_frame
+from app.services.readings import get_buildings_with_latest_reading, get_reading_series
+from app.services.rollups import window_stats
+from sqlalchemy import func, desc, select
 
 router = APIRouter()
 
 @router.get("/buildings/{building_id}/current")
-async def get_current_energy(building_id: int, db: Session = Depends(get_db)):
+async def get_current_energy(building_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get current energy consumption for a building"""
     # Get latest reading
-    latest_reading = db.query(EnergyReading)\
-        .filter(EnergyReading.building_id == building_id)\
-        .order_by(desc(EnergyReading.timestamp))\
-        .first()
+    latest_reading = (await db.scalars(
+        select(EnergyReading)
+        .where(EnergyReading.building_id == building_id)
+        .order_by(desc(EnergyReading.timestamp))
+        .limit(1)
+    )).first()
     
     if not latest_reading:
         raise HTTPException(status_code=404, detail="No energy data found for this building")
     
     # Calculate efficiency score (mock calculation)
-    building = db.query(Building).filter(Building.id == building_id).first()
+    building = await db.get(Building, building_id)
     efficiency_score = 75 + (building_id % 25) if building else 50
     
     return {
@@ -39,7 +48,10 @@ async def get_historical_energy(
     building_id: int,
     hours: int = Query(24, ge=1, le=8760),  # Max 1 year
     meter_type: Optional[int] = Query(None, ge=0, le=3),
-    db: Session = Depends(get_db)
+    resolution: Optional[int] = Query(None, ge=10, le=10000, description="Target number of points per meter"),
+    downsampling: str = Query("lttb", pattern="^(lttb|minmax)$", description="Downsampling method when resolution is set"),
+    format: str = Query("rows", pattern="^(rows|columnar)$", description="'rows' (list of objects) or 'columnar' (parallel arrays)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get historical energy data"""
     
@@ -47,84 +59,111 @@ async def get_historical_energy(
     end_time = datetime.now()
     start_time = end_time - timedelta(hours=hours)
     
-    # Build query
-    query = db.query(EnergyReading)\
-        .filter(EnergyReading.building_id == building_id)\
-        .filter(EnergyReading.timestamp >= start_time)\
-        .filter(EnergyReading.timestamp <= end_time)
+    readings = await get_reading_series(db, building_id, start_time, end_time, meter_type=meter_type)
     
-    if meter_type is not None:
-        query = query.filter(EnergyReading.meter_type == meter_type)
-    
-    readings = query.order_by(EnergyReading.timestamp).all()
-    
-    if not readings:
+    if readings.empty:
         return {
             "building_id": building_id,
             "period": {"start": start_time, "end": end_time},
-            "readings": [],
+            "format": format,
+            "readings": {column: [] for column in readings.columns} if format == "columnar" else [],
             "summary": {"total_readings": 0, "avg_usage": 0, "max_usage": 0}
         }
     
-    # Calculate summary statistics
-    meter_readings = [r.meter_reading for r in readings]
+    # Calculate summary statistics in SQL (served from rollups for long windows)
+    stats = await db.run_sync(window_stats, start_time, end_time, building_id=building_id, meter_type=meter_type)
     summary = {
-        "total_readings": len(readings),
-        "avg_usage": sum(meter_readings) / len(meter_readings),
-        "max_usage": max(meter_readings),
-        "min_usage": min(meter_readings)
+        "total_readings": stats.count,
+        "avg_usage": stats.avg,
+        "max_usage": stats.max,
+        "min_usage": stats.min
     }
     
+    source_points = len(readings)
+    
+    # Downsampling and serialization are CPU-bound; keep them off the event loop
+    payload, returned_points = await run_in_threadpool(
+        _shape_readings, readings, resolution, downsampling, format
+    )
+    
     return {
         "building_id": building_id,
         "period": {"start": start_time, "end": end_time},
-        "readings": [
-            {
-                "timestamp": r.timestamp,
-                "meter_reading": r.meter_reading,
-                "meter_type": r.meter_type,
-                "air_temperature": r.air_temperature
-            }
-            for r in readings
-        ],
+        "format": format,
+        "readings": payload,
+        "downsampling": {
+            "method": downsampling if resolution is not None else None,
+            "source_points": source_points,
+            "returned_points": returned_points
+        },
         "summary": summary
     }
 
+def _shape_readings(readings: pd.DataFrame, resolution: Optional[int], downsampling: str, format: str):
+    """Downsample a reading frame and convert it to the response payload"""
+    if resolution is not None:
+        readings = downsample_frame(readings, resolution, method=downsampling)
+    
+    epoch_seconds = readings["timestamp"].to_numpy(dtype="datetime64[s]").astype("int64")
+    
+    # NaN is not valid JSON
+    readings = readings.astype(object).where(readings.notna(), None)
+    
+    if format == "columnar":
+        payload = {
+            "timestamp": epoch_seconds.tolist(),
+            "meter_reading": readings["meter_reading"].tolist(),
+            "meter_type": readings["meter_type"].tolist(),
+            "air_temperature": readings["air_temperature"].tolist()
+        }
+    else:
+        payload = readings.to_dict("records")
+    
+    return payload, len(readings)
+
 @router.get("/buildings/{building_id}/daily-pattern")
-async def get_daily_energy_pattern(building_id: int, days: int = 7, db: Session = Depends(get_db)):
-    """Get daily energy usage patterns"""
+async def get_daily_energy_pattern(building_id: int, days: int = 7, db: AsyncSession = Depends(get_async_db)):
+    """Get daily energy usage patterns (hour of day, aggregated in the database)"""
     
     end_time = datetime.now()
     start_time = end_time - timedelta(days=days)
     
-    readings = db.query(EnergyReading)\
-        .filter(EnergyReading.building_id == building_id)\
-        .filter(EnergyReading.timestamp >= start_time)\
-        .order_by(EnergyReading.timestamp)\
-        .all()
+    profile = await db.run_sync(usage_profile, building_id, start_time, end_time, profile="hour")
     
-    if not readings:
+    if not profile:
         return {"building_id": building_id, "pattern": []}
     
-    # Group by hour of day
-    hourly_usage = {}
-    for reading in readings:
-        hour = reading.timestamp.hour
-        if hour not in hourly_usage:
-            hourly_usage[hour] = []
-        hourly_usage[hour].append(reading.meter_reading)
+    pattern = []
+    for slot in profile:
+        hour = slot.pop("slot")
+        pattern.append({"hour": hour, **slot})
+    
+    return {
+        "building_id": building_id,
+        "period_days": days,
+        "pattern": pattern
+    }
+
+@router.get("/buildings/{building_id}/weekly-pattern")
+async def get_weekly_energy_pattern(building_id: int, days: int = 28, db: AsyncSession = Depends(get_async_db)):
+    """Get weekly energy usage patterns (hour of week, aggregated in the database)"""
+    
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+    
+    profile = await db.run_sync(usage_profile, building_id, start_time, end_time, profile="hour_of_week")
+    
+    if not profile:
+        return {"building_id": building_id, "pattern": []}
     
-    # Calculate average for each hour
     pattern = []
-    for hour in range(24):
-        if hour in hourly_usage:
-            avg_usage = sum(hourly_usage[hour]) / len(hourly_usage[hour])
-        else:
-            avg_usage = 0
+    for slot in profile:
+        hour_of_week = slot.pop("slot")
         pattern.append({
-            "hour": hour,
-            "average_usage": avg_usage,
-            "data_points": len(hourly_usage.get(hour, []))
+            "hour_of_week": hour_of_week,
+            "day_of_week": hour_of_week // 24,  # 0 = Monday
+            "hour": hour_of_week % 24,
+            **slot
         })
     
     return {
@@ -138,7 +177,7 @@ async def compare_energy_usage(
     building_id: int,
     compare_days: int = 7,
     baseline_days: int = 7,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Compare current period vs baseline period"""
     
@@ -150,33 +189,19 @@ async def compare_energy_usage(
     baseline_end = current_start
     baseline_start = baseline_end - timedelta(days=baseline_days)
     
-    # Get current period data
-    current_readings = db.query(EnergyReading)\
-        .filter(EnergyReading.building_id == building_id)\
-        .filter(and_(
-            EnergyReading.timestamp >= current_start,
-            EnergyReading.timestamp <= current_end
-        ))\
-        .all()
-    
-    # Get baseline period data
-    baseline_readings = db.query(EnergyReading)\
-        .filter(EnergyReading.building_id == building_id)\
-        .filter(and_(
-            EnergyReading.timestamp >= baseline_start,
-            EnergyReading.timestamp <= baseline_end
-        ))\
-        .all()
-    
-    if not current_readings or not baseline_readings:
+    # Period totals (served from rollups for whole hours/days)
+    current_stats = await db.run_sync(window_stats, current_start, current_end, building_id=building_id)
+    baseline_stats = await db.run_sync(window_stats, baseline_start, baseline_end, building_id=building_id)
+    
+    if not current_stats.count or not baseline_stats.count:
         return {
             "building_id": building_id,
             "comparison": "insufficient_data"
         }
     
     # Calculate totals
-    current_total = sum(r.meter_reading for r in current_readings)
-    baseline_total = sum(r.meter_reading for r in baseline_readings)
+    current_total = current_stats.total
+    baseline_total = baseline_stats.total
     
     # Calculate percentage change
     change_percent = ((current_total - baseline_total) / baseline_total * 100) if baseline_total > 0 else 0
@@ -187,13 +212,13 @@ async def compare_energy_usage(
             "start": current_start,
             "end": current_end,
             "total_usage": current_total,
-            "reading_count": len(current_readings)
+            "reading_count": current_stats.count
         },
         "baseline_period": {
             "start": baseline_start,
             "end": baseline_end,
             "total_usage": baseline_total,
-            "reading_count": len(baseline_readings)
+            "reading_count": baseline_stats.count
         },
         "comparison": {
             "change_percent": change_percent,
@@ -203,22 +228,17 @@ async def compare_energy_usage(
     }
 
 @router.get("/campus/overview")
-async def get_campus_energy_overview(db: Session = Depends(get_db)):
+@cached(ttl=60)
+async def get_campus_energy_overview(db: AsyncSession = Depends(get_async_db)):
     """Get overall campus energy overview"""
     
-    # Get all buildings
-    buildings = db.query(Building).all()
+    # Get all buildings with their latest reading in a single query
+    buildings = await db.run_sync(get_buildings_with_latest_reading)
     
-    # Get latest readings for each building
     campus_data = []
     total_current_usage = 0
     
-    for building in buildings:
-        latest_reading = db.query(EnergyReading)\
-            .filter(EnergyReading.building_id == building.id)\
-            .order_by(desc(EnergyReading.timestamp))\
-            .first()
-        
+    for building, latest_reading in buildings:
         current_usage = latest_reading.meter_reading if latest_reading else 0
         total_current_usage += current_usage
         
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import datetime
+from app.services.export import ARROW_AVAILABLE, EXPORT_FORMATS, stream_export
+
+router = APIRouter()
+
+@router.get("/energy-readings")
+async def export_energy_readings(
+    start: datetime = Query(..., description="Start of the export window (inclusive)"),
+    end: datetime = Query(..., description="End of the export window (exclusive)"),
+    building_ids: Optional[List[int]] = Query(None, description="Buildings to export (default: all)"),
+    meter_types: Optional[List[int]] = Query(None, description="Meter types to export (default: all)"),
+    format: str = Query("parquet", pattern="^(arrow|parquet)$", description="'arrow' (IPC stream) or 'parquet'"),
+    batch_size: Optional[int] = Query(None, ge=1000, le=500000, description="Rows per record batch")
+):
+    """Stream energy readings as Apache Arrow IPC or Parquet, one record batch at a time"""
+    
+    if not ARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Bulk export requires pyarrow")
+    
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"energy_readings_{start:%Y%m%d}_{end:%Y%m%d}.{extension}"
+    
+    return StreamingResponse(
+        stream_export(format, building_ids, meter_types, start, end, batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,28 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cached
+from app.core.database import get_async_db
 from app.models.database import Insight, Building, EnergyReading
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 from datetime import datetime, timedelta
 import random
 
 router = APIRouter()
 
 @router.get("/buildings/{building_id}")
-async def get_building_insights(building_id: int, db: Session = Depends(get_db)):
+async def get_building_insights(building_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get AI-generated insights for a building"""
     
-    building = db.query(Building).filter(Building.id == building_id).first()
+    building = await db.get(Building, building_id)
     if not building:
         raise HTTPException(status_code=404, detail="Building not found")
     
     # Get existing insights from database
-    existing_insights = db.query(Insight)\
-        .filter(Insight.building_id == building_id)\
-        .filter(Insight.status != 'dismissed')\
-        .order_by(desc(Insight.priority))\
-        .limit(10)\
-        .all()
+    existing_insights = (await db.scalars(
+        select(Insight)
+        .where(Insight.building_id == building_id)
+        .where(Insight.status != 'dismissed')
+        .order_by(desc(Insight.priority))
+        .limit(10)
+    )).all()
     
     # If no insights exist, generate mock ones for demo
     if not existing_insights:
@@ -187,10 +189,11 @@ def generate_mock_insights(building: Building):
     return insights
 
 @router.get("/campus/summary")
-async def get_campus_insights_summary(db: Session = Depends(get_db)):
+@cached(ttl=300)
+async def get_campus_insights_summary(db: AsyncSession = Depends(get_async_db)):
     """Get summary of insights across all campus buildings"""
     
-    buildings = db.query(Building).all()
+    buildings = (await db.scalars(select(Building))).all()
     
     total_insights = 0
     total_potential_savings = 0
@@ -249,7 +252,7 @@ async def update_insight_status(
     building_id: int, 
     insight_id: str, 
     status: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update the status of an insight (acknowledge, implement, dismiss)"""
     
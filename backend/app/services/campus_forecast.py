@@ -0,0 +1,148 @@
+"""
+Hierarchical campus forecasts (campus > site > building type > building)
+
+All buildings' histories for one meter are loaded in one query and fitted
+with HierarchicalForecaster (ml-models/hierarchical_forecaster.py): a few
+vectorized ridge solves plus one reconciliation step instead of a model per
+building. Fitted hierarchies are kept per process, keyed by meter, method
+and the campus's latest reading, so further requests until new data arrives
+only run forecast() (one matrix product per horizon).
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import logging
+import os
+import sys
+import threading
+
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.database import Building, EnergyReading
+from app.services.forecast_store import FORECAST_HISTORY_DAYS, HISTORY_COLUMNS
+from app.services.frames import read_frame_async, reading_dtypes
+from app.services.weather import join_site_weather, reading_weather_columns
+
+logger = logging.getLogger(__name__)
+
+# Add ML models to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'ml-models'))
+
+try:
+    from hierarchical_forecaster import HierarchicalForecaster, RECONCILIATION_METHODS
+    ML_AVAILABLE = True
+except ImportError:
+    ML_AVAILABLE = False
+    RECONCILIATION_METHODS = ('bottom_up', 'wls_var', 'mint_shrink')
+    logging.warning("ML models not available - campus forecasting disabled")
+
+HIERARCHY_LEVELS = ('site_id', 'building_type')
+
+# Fitted hierarchies kept per process (each holds a nodes x buildings projection)
+MAX_FITTED_HIERARCHIES = 4
+
+HierarchyKey = Tuple[int, str, datetime]
+
+def latest_campus_reading(db: Session, meter_type: int) -> Optional[datetime]:
+    return db.scalar(select(func.max(EnergyReading.timestamp)).where(EnergyReading.meter_type == meter_type))
+
+async def fetch_campus_history(db: AsyncSession, meter_type: int, latest: datetime) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Readings of every building for FORECAST_HISTORY_DAYS up to `latest`, and
+    building metadata; the readings are parsed off the event loop
+    """
+    query = join_site_weather(select(
+        EnergyReading.timestamp,
+        EnergyReading.building_id,
+        EnergyReading.meter_reading,
+        *reading_weather_columns('air_temperature')
+    )).where(EnergyReading.meter_type == meter_type)\
+        .where(EnergyReading.timestamp > latest - timedelta(days=FORECAST_HISTORY_DAYS))\
+        .where(EnergyReading.timestamp <= latest)\
+        .order_by(EnergyReading.building_id, EnergyReading.timestamp)
+    readings = await read_frame_async(db, query, reading_dtypes(HISTORY_COLUMNS))
+
+    metadata = pd.DataFrame(
+        (await db.execute(select(Building.id, Building.site_id, Building.building_type))).all(),
+        columns=['building_id', *HIERARCHY_LEVELS]
+    )
+    return readings, metadata
+
+class CampusForecasts:
+    """Per-process LRU of fitted HierarchicalForecasters"""
+
+    def __init__(self, max_entries: int = MAX_FITTED_HIERARCHIES):
+        self.max_entries = max_entries
+        self._fitted: "OrderedDict[HierarchyKey, HierarchicalForecaster]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: HierarchyKey) -> Optional["HierarchicalForecaster"]:
+        with self._lock:
+            forecaster = self._fitted.get(key)
+            if forecaster is not None:
+                self._fitted.move_to_end(key)
+                self.hits += 1
+            return forecaster
+
+    def fit(self, key: HierarchyKey, readings: pd.DataFrame, metadata: pd.DataFrame) -> "HierarchicalForecaster":
+        """
+        Fit and keep the hierarchy for `key`
+
+        Blocking (model fit); call from a worker thread in async code.
+        """
+        meter_type, method, _ = key
+        forecaster = HierarchicalForecaster(levels=HIERARCHY_LEVELS, method=method)
+        forecaster.fit(readings, metadata)
+
+        with self._lock:
+            self.misses += 1
+            # Hierarchies fitted on older data for the same meter/method are superseded
+            for stale in [k for k in self._fitted if k[:2] == key[:2]]:
+                del self._fitted[stale]
+            self._fitted[key] = forecaster
+            while len(self._fitted) > self.max_entries:
+                self._fitted.popitem(last=False)
+        return forecaster
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "fitted": [
+                    {"meter_type": k[0], "method": k[1], "latest_reading": k[2]}
+                    for k in self._fitted
+                ],
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+def summarize_campus_forecast(forecast: pd.DataFrame, level: Optional[str]) -> Dict:
+    """Campus series plus per-node totals for one level of the hierarchy"""
+    campus = forecast[forecast['level'] == 'campus']
+    result = {
+        "campus": [
+            {
+                "timestamp": row.timestamp,
+                "predicted_kwh": float(row.predicted_kwh),
+                "confidence_lower": float(row.confidence_lower),
+                "confidence_upper": float(row.confidence_upper)
+            }
+            for row in campus.itertuples(index=False)
+        ],
+        "total_predicted_kwh": float(campus['predicted_kwh'].sum())
+    }
+
+    if level is not None:
+        totals = forecast[forecast['level'] == level].groupby('key', sort=False)['predicted_kwh'].sum()
+        result["level"] = level
+        result["breakdown"] = [
+            {"key": key.item() if hasattr(key, "item") else key, "total_predicted_kwh": float(total)}
+            for key, total in totals.sort_values(ascending=False).items()
+        ]
+    return result
+
+campus_forecasts = CampusForecasts()
@@ -0,0 +1,97 @@
+"""
+Time series downsampling for chart payloads
+
+Both methods return sorted indices into the input arrays, so any number of
+parallel columns (meter_type, air_temperature, ...) can be taken alongside.
+"""
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keep the point in each bucket that forms the
+    largest triangle with the previously kept point and the next bucket's mean.
+
+    Args:
+        x: Monotonic x values (e.g. epoch seconds)
+        y: Values to preserve the shape of
+        threshold: Number of points to keep (including first and last)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = np.nan_to_num(y.astype(np.float64))
+
+    # Interior points are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+
+    return selected
+
+def minmax_buckets(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Keep the minimum and maximum of threshold // 2 equal-count buckets, plus the
+    first and last points. Preserves peaks exactly, which LTTB may smooth.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    bucket_count = threshold // 2
+    buckets = np.arange(n) * bucket_count // n
+
+    values = pd.Series(np.nan_to_num(y.astype(np.float64)))
+    grouped = values.groupby(buckets)
+    indices = np.concatenate([
+        [0, n - 1],
+        grouped.idxmin().to_numpy(),
+        grouped.idxmax().to_numpy()
+    ])
+
+    return np.unique(indices)
+
+def downsample(x: np.ndarray, y: np.ndarray, threshold: int, method: str = "lttb") -> np.ndarray:
+    """Indices of the points to keep using the given method"""
+    if method == "minmax":
+        return minmax_buckets(x, y, threshold)
+    return lttb(x, y, threshold)
+
+def downsample_frame(df: pd.DataFrame, threshold: int, method: str = "lttb") -> pd.DataFrame:
+    """
+    Downsample a reading frame (timestamp, meter_reading, meter_type, ...) to
+    about `threshold` points per meter, keeping every column of the kept rows.
+    """
+    if len(df) <= threshold:
+        return df
+
+    epoch = df['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+    readings = df['meter_reading'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    keep = []
+    for positions in df.groupby('meter_type', dropna=False).indices.values():
+        selected = downsample(epoch[positions], readings[positions], threshold, method)
+        keep.append(positions[selected])
+
+    return df.iloc[np.sort(np.concatenate(keep))]
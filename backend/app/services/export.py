@@ -0,0 +1,157 @@
+"""
+Bulk export of energy readings as Apache Arrow IPC or Parquet streams
+
+Rows are read through a server-side cursor and converted to one Arrow record
+batch at a time, so memory stays bounded by the batch size regardless of how
+many readings are exported.
+"""
+from datetime import datetime
+from typing import Iterator, List, Optional
+import logging
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.database import EnergyReading
+from app.services.weather import join_site_weather, reading_weather_columns
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+    logging.warning("pyarrow not available - bulk export disabled")
+
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+EXPORT_COLUMNS = [
+    EnergyReading.building_id,
+    EnergyReading.timestamp,
+    EnergyReading.meter_type,
+    EnergyReading.meter_reading,
+    # From site_weather (see app.services.weather), else the reading's copy
+    *reading_weather_columns(
+        'air_temperature', 'cloud_coverage', 'dew_temperature', 'precip_depth_1_hr',
+        'sea_level_pressure', 'wind_direction', 'wind_speed'
+    ),
+    EnergyReading.cost_usd,
+    EnergyReading.carbon_emissions_lbs,
+    EnergyReading.efficiency_score,
+]
+
+def export_schema() -> "pa.Schema":
+    """Arrow schema matching EXPORT_COLUMNS"""
+    fields = [
+        pa.field("building_id", pa.int32(), nullable=False),
+        pa.field("timestamp", pa.timestamp("us"), nullable=False),
+        pa.field("meter_type", pa.int8()),
+    ]
+    fields += [pa.field(column.key, pa.float64()) for column in EXPORT_COLUMNS[3:]]
+    return pa.schema(fields)
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def export_query(
+    building_ids: Optional[List[int]],
+    meter_types: Optional[List[int]],
+    start: datetime,
+    end: datetime
+):
+    query = join_site_weather(select(*EXPORT_COLUMNS)).where(
+        EnergyReading.timestamp >= start,
+        EnergyReading.timestamp < end
+    )
+
+    if building_ids:
+        query = query.where(EnergyReading.building_id.in_(building_ids))
+    if meter_types:
+        query = query.where(EnergyReading.meter_type.in_(meter_types))
+
+    return query.order_by(EnergyReading.building_id, EnergyReading.meter_type, EnergyReading.timestamp)
+
+def iter_record_batches(
+    building_ids: Optional[List[int]],
+    meter_types: Optional[List[int]],
+    start: datetime,
+    end: datetime,
+    batch_size: Optional[int] = None
+) -> Iterator["pa.RecordBatch"]:
+    """Yield record batches straight from a server-side cursor"""
+    batch_size = batch_size or settings.BATCH_SIZE
+    schema = export_schema()
+    query = export_query(building_ids, meter_types, start, end)
+
+    with engine.connect().execution_options(stream_results=True, yield_per=batch_size) as connection:
+        result = connection.execute(query)
+        for rows in result.partitions(batch_size):
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            )
+
+def stream_export(
+    format: str,
+    building_ids: Optional[List[int]],
+    meter_types: Optional[List[int]],
+    start: datetime,
+    end: datetime,
+    batch_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """Serialize record batches as they arrive, yielding encoded bytes per batch"""
+    schema = export_schema()
+    sink = _ChunkSink()
+
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    total_rows = 0
+    try:
+        for batch in iter_record_batches(building_ids, meter_types, start, end, batch_size):
+            if format == "parquet":
+                writer.write_batch(batch, row_group_size=batch.num_rows)
+            else:
+                writer.write_batch(batch)
+            total_rows += batch.num_rows
+            yield sink.drain()
+    finally:
+        writer.close()
+
+    # Parquet footer / Arrow end-of-stream marker
+    yield sink.drain()
+    logger.info(f"Exported {total_rows} energy readings as {format}")
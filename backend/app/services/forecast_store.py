@@ -0,0 +1,440 @@
+"""
+Precomputed hourly forecasts per building and meter
+
+Forecasts live in the forecasts table (app.models.database.Forecast), one row
+per building/meter/hour. A stored forecast is valid while it was issued from
+the building's latest reading and covers the requested hours; requests then
+cost two indexed queries. Otherwise the forecast is recomputed from the
+FORECAST_HISTORY_DAYS before the latest reading, stored and returned.
+
+The history window is anchored at the latest reading, not the clock, and the
+forecasting backends are deterministic, so the same data always produces the
+same stored rows. refresh_forecasts() precomputes every building on a
+schedule so requests rarely pay for a fit.
+
+Buildings with too little history for the per-building backend are forecast
+with the meter's global model (app.services.global_forecast) when one is
+trained. refresh_global_forecasts() retrains it and stores every building's
+forecast from one batched prediction.
+
+Temperatures for the forecast hours come from the building's site weather
+(app.services.weather) where site_weather covers them.
+
+Usage (from backend/, e.g. hourly from cron):
+    python -m app.services.forecast_store refresh [meter_type]
+    python -m app.services.forecast_store refresh-global [meter_type]
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Row, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import Building, EnergyReading, Forecast
+from app.services.frames import read_frame, read_frame_async, reading_dtypes
+from app.services import global_forecast
+from app.services.weather import building_sites, fetch_site_weather, future_temperatures, join_site_weather, reading_weather_columns, site_weather
+
+logger = logging.getLogger(__name__)
+
+# Add ML models to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'ml-models'))
+
+try:
+    from energy_forecaster import create_forecaster
+    FORECASTING_AVAILABLE = True
+except ImportError:
+    FORECASTING_AVAILABLE = False
+    logging.warning("ML models not available - forecast store disabled")
+
+FORECAST_HISTORY_DAYS = 30
+# Hours stored per forecast; requests for more recompute with the longer horizon
+FORECAST_HORIZON_HOURS = 168
+DEFAULT_METER_TYPE = 0  # Electricity
+
+# Buildings per history query in refresh_forecasts
+REFRESH_CHUNK_BUILDINGS = 100
+
+HISTORY_COLUMNS = ['timestamp', 'building_id', 'meter_reading', 'air_temperature']
+
+def latest_reading_time(db: Session, building_id: int, meter_type: int) -> Optional[datetime]:
+    return db.scalar(
+        select(func.max(EnergyReading.timestamp))
+        .where(EnergyReading.building_id == building_id)
+        .where(EnergyReading.meter_type == meter_type)
+    )
+
+def read_stored_forecast(db: Session, building_id: int, meter_type: int, after: datetime, hours: int) -> Sequence[Row]:
+    """
+    Stored forecast rows for the `hours` after `after`
+
+    Plain rows rather than Forecast objects: the session does not expire on
+    commit, so identity-mapped objects would hide a refresh's upserted values.
+    """
+    return db.execute(
+        select(
+            Forecast.timestamp,
+            Forecast.issued_at,
+            Forecast.predicted_kwh,
+            Forecast.confidence_lower,
+            Forecast.confidence_upper,
+            Forecast.backend,
+            Forecast.created_at
+        ).where(Forecast.building_id == building_id)
+        .where(Forecast.meter_type == meter_type)
+        .where(Forecast.timestamp > after)
+        .order_by(Forecast.timestamp)
+        .limit(hours)
+    ).all()
+
+def is_current(rows: Sequence[Row], latest: datetime, hours: int) -> bool:
+    """Whether stored rows were issued from the latest reading and cover `hours`"""
+    return len(rows) == hours and all(row.issued_at == latest for row in rows)
+
+def history_query(building_ids: List[int], meter_type: int):
+    """Each building's readings for FORECAST_HISTORY_DAYS up to its own latest reading"""
+    latest = select(
+        EnergyReading.building_id,
+        func.max(EnergyReading.timestamp).label("latest")
+    ).where(EnergyReading.building_id.in_(building_ids))\
+        .where(EnergyReading.meter_type == meter_type)\
+        .group_by(EnergyReading.building_id)\
+        .subquery()
+
+    return join_site_weather(select(
+        EnergyReading.timestamp,
+        EnergyReading.building_id,
+        EnergyReading.meter_reading,
+        *reading_weather_columns('air_temperature')
+    ).join(latest, latest.c.building_id == EnergyReading.building_id))\
+        .where(EnergyReading.building_id.in_(building_ids))\
+        .where(EnergyReading.meter_type == meter_type)\
+        .where(EnergyReading.timestamp > latest.c.latest - timedelta(days=FORECAST_HISTORY_DAYS))\
+        .order_by(EnergyReading.building_id, EnergyReading.timestamp)
+
+def fetch_history(db: Session, building_ids: List[int], meter_type: int) -> pd.DataFrame:
+    """history_query as a frame, one query"""
+    return read_frame(db, history_query(building_ids, meter_type), reading_dtypes(HISTORY_COLUMNS))
+
+def compute_forecast(
+    df: pd.DataFrame,
+    building_id: int,
+    horizon: int,
+    future_weather: Optional[pd.Series] = None
+) -> Dict:
+    """
+    Fit the configured backend on a building's history and forecast `horizon` hours
+
+    future_weather: the site's temperatures for the forecast hours, by timestamp.
+    Blocking (model fit); call from a worker thread in async code.
+    """
+    forecaster = create_forecaster(settings.FORECAST_BACKEND)
+    forecaster.fit(df, building_id=building_id)
+    forecaster.set_future_weather(future_weather)
+    result = forecaster.forecast(periods=horizon, freq='H')
+    result["backend"] = forecaster.backend
+    return result
+
+def store_forecast(db: Session, building_id: int, meter_type: int, issued_at: datetime, result: Dict):
+    """Replace the building's future forecast rows with `result` and commit"""
+    rows = [
+        {
+            "building_id": building_id,
+            "meter_type": meter_type,
+            "timestamp": datetime.fromisoformat(point["timestamp"]),
+            "issued_at": issued_at,
+            "predicted_kwh": point["predicted_kwh"],
+            "confidence_lower": point["confidence_lower"],
+            "confidence_upper": point["confidence_upper"],
+            "backend": result["backend"]
+        }
+        for point in result["forecast"]
+    ]
+    for row in rows:
+        row["horizon_hours"] = int((row["timestamp"] - issued_at) / timedelta(hours=1))
+
+    # Rows of an earlier, longer forecast beyond this horizon would otherwise outlive it
+    db.execute(
+        delete(Forecast)
+        .where(Forecast.building_id == building_id)
+        .where(Forecast.meter_type == meter_type)
+        .where(Forecast.timestamp > issued_at)
+    )
+    if rows:
+        statement = insert(Forecast).values(rows)
+        # A concurrent refresh of the same building may have written the same hours
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[Forecast.building_id, Forecast.meter_type, Forecast.timestamp],
+            set_={
+                **{
+                    column: statement.excluded[column]
+                    for column in ("issued_at", "horizon_hours", "predicted_kwh",
+                                   "confidence_lower", "confidence_upper", "backend")
+                },
+                "created_at": func.now()
+            }
+        ))
+    db.commit()
+
+def _stored_result(building_id: int, meter_type: int, rows: Sequence[Row], from_store: bool) -> Dict:
+    return {
+        "building_id": building_id,
+        "meter_type": meter_type,
+        "issued_at": rows[0].issued_at if rows else None,
+        "backend": rows[0].backend if rows else None,
+        "created_at": rows[0].created_at if rows else None,
+        "from_store": from_store,
+        "forecast": [
+            {
+                "timestamp": row.timestamp,
+                "predicted_kwh": row.predicted_kwh,
+                "confidence_lower": row.confidence_lower,
+                "confidence_upper": row.confidence_upper
+            }
+            for row in rows
+        ]
+    }
+
+async def get_forecast(
+    db: AsyncSession,
+    building_id: int,
+    hours: int,
+    meter_type: int = DEFAULT_METER_TYPE
+) -> Optional[Dict]:
+    """
+    Forecast for the `hours` after the building's latest reading, from the
+    store when current; None when the building has no readings for the meter.
+
+    Raises ValueError when there is too little history to fit.
+    """
+    latest = await db.run_sync(latest_reading_time, building_id, meter_type)
+    if latest is None:
+        return None
+
+    rows = await db.run_sync(read_stored_forecast, building_id, meter_type, latest, hours)
+    if is_current(rows, latest, hours):
+        return _stored_result(building_id, meter_type, rows, from_store=True)
+
+    df = await read_frame_async(db, history_query([building_id], meter_type), reading_dtypes(HISTORY_COLUMNS))
+    horizon = max(hours, FORECAST_HORIZON_HOURS)
+    weather = await future_temperatures(db, building_id, latest, horizon)
+    try:
+        result = await run_in_threadpool(compute_forecast, df, building_id, horizon, weather)
+    except ValueError:
+        # Cold start: too little history for a per-building fit
+        result = await cold_start_forecast(db, df, building_id, meter_type, latest, horizon)
+        if result is None:
+            raise
+    await db.run_sync(store_forecast, building_id, meter_type, latest, result)
+
+    rows = await db.run_sync(read_stored_forecast, building_id, meter_type, latest, hours)
+    return _stored_result(building_id, meter_type, rows, from_store=False)
+
+async def cold_start_forecast(
+    db: AsyncSession,
+    df: pd.DataFrame,
+    building_id: int,
+    meter_type: int,
+    latest: datetime,
+    horizon: int
+) -> Optional[Dict]:
+    """Forecast from the meter's global model; None when none is trained"""
+    if not global_forecast.ML_AVAILABLE:
+        return None
+    model = await db.run_sync(global_forecast.resolve_global_model, meter_type)
+    if model is None:
+        return None
+
+    forecaster = await run_in_threadpool(global_forecast.load_global_model, model)
+    metadata = await db.run_sync(global_forecast.fetch_metadata, [building_id])
+    weather = await site_weather.frame_async(db, metadata['site_id'].dropna().astype(int).tolist(), latest, horizon)
+    results = await run_in_threadpool(
+        global_forecast.forecast_results, forecaster, df, metadata, horizon, [building_id], weather
+    )
+    return results[building_id][1]
+
+def recent_average(db: Session, building_id: int, meter_type: int, latest: datetime, hours: int) -> Optional[float]:
+    """Mean reading over the `hours` up to `latest`"""
+    return db.scalar(
+        select(func.avg(EnergyReading.meter_reading))
+        .where(EnergyReading.building_id == building_id)
+        .where(EnergyReading.meter_type == meter_type)
+        .where(EnergyReading.timestamp > latest - timedelta(hours=hours))
+        .where(EnergyReading.timestamp <= latest)
+    )
+
+FORECAST_ACCURACY_QUERY = text("""
+    SELECT (f.horizon_hours - 1) / 24 + 1 AS day_ahead,
+           COUNT(*) AS points,
+           AVG(ABS(f.predicted_kwh - r.meter_reading)) AS mae,
+           SQRT(AVG(POWER(f.predicted_kwh - r.meter_reading, 2))) AS rmse,
+           AVG(ABS(f.predicted_kwh - r.meter_reading) / NULLIF(r.meter_reading, 0)) AS mape,
+           AVG(f.predicted_kwh - r.meter_reading) AS bias,
+           AVG(CASE WHEN r.meter_reading BETWEEN f.confidence_lower AND f.confidence_upper
+                    THEN 1.0 ELSE 0.0 END) AS coverage
+    FROM forecasts f
+    JOIN energy_readings r
+      ON r.building_id = f.building_id
+     AND r.meter_type = f.meter_type
+     AND r.timestamp = f.timestamp
+    WHERE f.building_id = :building_id
+    AND f.meter_type = :meter_type
+    AND f.timestamp >= :since
+    GROUP BY day_ahead
+    ORDER BY day_ahead
+""")
+
+def forecast_accuracy(db: Session, building_id: int, meter_type: int, since: datetime) -> Dict:
+    """Stored forecasts vs actual readings since `since`, overall and by day ahead"""
+    rows = db.execute(
+        FORECAST_ACCURACY_QUERY,
+        {"building_id": building_id, "meter_type": meter_type, "since": since}
+    ).mappings().all()
+
+    by_day = [{key: (float(value) if value is not None else None) for key, value in row.items()} for row in rows]
+    for day in by_day:
+        day["day_ahead"] = int(day["day_ahead"])
+        day["points"] = int(day["points"])
+
+    points = sum(day["points"] for day in by_day)
+
+    def overall(metric: str) -> Optional[float]:
+        weighted = [(day[metric], day["points"]) for day in by_day if day[metric] is not None]
+        if not weighted:
+            return None
+        if metric == "rmse":
+            return float(np.sqrt(sum(value ** 2 * n for value, n in weighted) / sum(n for _, n in weighted)))
+        return sum(value * n for value, n in weighted) / sum(n for _, n in weighted)
+
+    return {
+        "building_id": building_id,
+        "meter_type": meter_type,
+        "since": since,
+        "points": points,
+        "overall": {metric: overall(metric) for metric in ("mae", "rmse", "mape", "bias", "coverage")},
+        "by_day_ahead": by_day
+    }
+
+def refresh_forecasts(meter_type: int = DEFAULT_METER_TYPE, building_ids: Optional[List[int]] = None) -> Dict[str, int]:
+    """
+    Recompute stored forecasts that are no longer current
+
+    Histories are loaded REFRESH_CHUNK_BUILDINGS buildings per query; buildings
+    whose stored forecast was issued from their latest reading and covers
+    FORECAST_HORIZON_HOURS are skipped.
+    """
+    counts = {"refreshed": 0, "current": 0, "failed": 0}
+    db = SessionLocal()
+    try:
+        if building_ids is None:
+            building_ids = db.scalars(select(Building.id).order_by(Building.id)).all()
+
+        for start in range(0, len(building_ids), REFRESH_CHUNK_BUILDINGS):
+            chunk = building_ids[start:start + REFRESH_CHUNK_BUILDINGS]
+            history = fetch_history(db, chunk, meter_type)
+            sites = building_sites(db, chunk)
+
+            stored = {
+                row.building_id: row
+                for row in db.execute(
+                    select(
+                        Forecast.building_id,
+                        func.max(Forecast.issued_at).label("issued_at"),
+                        func.max(Forecast.timestamp).label("covers_to")
+                    ).where(Forecast.building_id.in_(chunk))
+                    .where(Forecast.meter_type == meter_type)
+                    .group_by(Forecast.building_id)
+                ).all()
+            }
+
+            for building_id, rows in history.groupby('building_id', sort=False):
+                building_id = int(building_id)
+                latest = rows['timestamp'].max().to_pydatetime()
+                entry = stored.get(building_id)
+                if entry is not None and entry.issued_at == latest \
+                        and entry.covers_to >= latest + timedelta(hours=FORECAST_HORIZON_HOURS):
+                    counts["current"] += 1
+                    continue
+
+                try:
+                    site_id = sites.get(building_id)
+                    weather = None if site_id is None else \
+                        site_weather.temperatures(db, [site_id], latest, FORECAST_HORIZON_HOURS)[site_id]
+                    result = compute_forecast(rows, building_id, FORECAST_HORIZON_HOURS, weather)
+                    store_forecast(db, building_id, meter_type, latest, result)
+                    counts["refreshed"] += 1
+                except Exception as e:
+                    db.rollback()
+                    counts["failed"] += 1
+                    logger.warning(f"Forecast refresh failed for building {building_id}: {e}")
+
+            logger.info(f"   {min(start + REFRESH_CHUNK_BUILDINGS, len(building_ids))}/{len(building_ids)} buildings checked")
+    finally:
+        db.close()
+
+    logger.info(f"🔮 Forecast refresh (meter {meter_type}): {counts}")
+    return counts
+
+def refresh_global_forecasts(meter_type: int = DEFAULT_METER_TYPE) -> Dict[str, int]:
+    """
+    Retrain the meter's global model and store every building's forecast
+
+    One model fit and one batched prediction for all buildings with readings
+    in the GLOBAL_HISTORY_DAYS before the meter's latest reading, instead of a
+    fit per building.
+    """
+    counts = {"refreshed": 0, "failed": 0}
+    forecaster = global_forecast.train_global_model(meter_type)
+
+    db = SessionLocal()
+    try:
+        readings = global_forecast.fetch_readings(db, meter_type, global_forecast.GLOBAL_HISTORY_DAYS)
+        metadata = global_forecast.fetch_metadata(db)
+        # One weather query covering every building's forecast hours
+        origins = readings.groupby('building_id')['timestamp'].max()
+        weather = fetch_site_weather(
+            db, metadata['site_id'].dropna().astype(int).unique().tolist(),
+            origins.min().to_pydatetime(),
+            origins.max().to_pydatetime() + timedelta(hours=FORECAST_HORIZON_HOURS)
+        ) if len(origins) else None
+        results = global_forecast.forecast_results(
+            forecaster, readings, metadata, FORECAST_HORIZON_HOURS,
+            building_ids=origins.index.tolist(), weather=weather
+        )
+
+        for building_id, (issued_at, result) in results.items():
+            try:
+                store_forecast(db, building_id, meter_type, issued_at, result)
+                counts["refreshed"] += 1
+            except Exception as e:
+                db.rollback()
+                counts["failed"] += 1
+                logger.warning(f"Forecast refresh failed for building {building_id}: {e}")
+    finally:
+        db.close()
+
+    logger.info(f"🔮 Global forecast refresh (meter {meter_type}): {counts}")
+    return counts
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('energy_forecaster').setLevel(logging.WARNING)
+    logging.getLogger('global_forecaster').setLevel(logging.WARNING)
+
+    meter = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_METER_TYPE
+    if len(sys.argv) > 1 and sys.argv[1] == "refresh":
+        refresh_forecasts(meter)
+    elif len(sys.argv) > 1 and sys.argv[1] == "refresh-global":
+        refresh_global_forecasts(meter)
+    else:
+        print(__doc__)
@@ -0,0 +1,162 @@
+"""
+Columnar query results for the ML and analytics paths
+
+read_frame runs a query and returns a typed DataFrame without building a
+Python object per row. On Postgres the query is wrapped in
+COPY (...) TO STDOUT WITH CSV and the driver's output buffer is parsed by
+pyarrow straight into column arrays; this works with psycopg2 sessions and
+with asyncpg sessions inside AsyncSession.run_sync. Other drivers fall back
+to a streamed fetch built into the frame one chunk at a time.
+
+Column dtypes are declared by the caller (see READING_DTYPES), so every
+frame has the same types regardless of the driver or of missing values.
+
+run_sync executes on the event loop, so async code reads through
+read_frame_async: only the fetch (fetch_frame_data) runs in run_sync, and the
+parsing (parse_frame) runs in the threadpool.
+"""
+from typing import Dict, Iterable, List, Optional, Union
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.util import await_only
+
+# Rows per chunk for drivers without COPY
+FETCH_CHUNK_ROWS = 50000
+
+# dtypes of energy_readings columns (and common derived columns) in ML frames
+READING_DTYPES: Dict[str, str] = {
+    "timestamp": "datetime64[ns]",
+    "building_id": "int64",
+    "site_id": "int64",
+    "meter_type": "Int16",
+    "meter_reading": "float64",
+    "air_temperature": "float64",
+    "dew_temperature": "float64",
+    "wind_speed": "float64",
+    "cloud_coverage": "float64",
+    "cost_usd": "float64",
+    "carbon_emissions_lbs": "float64",
+    "hour": "int64",
+    "day_of_week": "int64",
+}
+
+# How each pandas dtype is parsed from Postgres CSV
+_ARROW_TYPES = {
+    "datetime64[ns]": pa.timestamp("us"),
+    "float64": pa.float64(),
+    "float32": pa.float32(),
+    "int64": pa.int64(),
+    "Int64": pa.int64(),
+    "int32": pa.int32(),
+    "Int32": pa.int32(),
+    "Int16": pa.int16(),
+    "boolean": pa.bool_(),
+    "string": pa.string(),
+}
+
+def reading_dtypes(columns: Iterable[str]) -> Dict[str, str]:
+    """READING_DTYPES for the given columns, in query order"""
+    return {column: READING_DTYPES[column] for column in columns}
+
+def empty_frame(dtypes: Dict[str, str]) -> pd.DataFrame:
+    return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in dtypes.items()})
+
+# Raw result of fetch_frame_data: COPY CSV output, or row batches for other drivers
+FrameData = Union[bytes, List[List[Row]]]
+
+def read_frame(db: Session, query, dtypes: Dict[str, str], params: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    Run a query and return its rows as a DataFrame with the given dtypes
+
+    Args:
+        db: Session (for async code, use read_frame_async)
+        query: select() or text() whose result columns match `dtypes` in order
+        dtypes: Column name -> pandas dtype
+        params: Bound parameters for a text() query
+    """
+    return parse_frame(fetch_frame_data(db, query, params), dtypes)
+
+async def read_frame_async(db: AsyncSession, query, dtypes: Dict[str, str], params: Optional[Dict] = None) -> pd.DataFrame:
+    """read_frame for async code: fetched through run_sync, parsed off the event loop"""
+    data = await db.run_sync(fetch_frame_data, query, params)
+    return await run_in_threadpool(parse_frame, data, dtypes)
+
+def fetch_frame_data(db: Session, query, params: Optional[Dict] = None) -> FrameData:
+    """Run a query for parse_frame; database IO only"""
+    if params:
+        if not isinstance(query, TextClause):
+            raise ValueError("params are only accepted for text() queries")
+        query = query.bindparams(**params)
+
+    connection = db.connection()
+    driver = connection.dialect.driver
+
+    if driver in ("psycopg2", "asyncpg"):
+        compiled = query.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        if driver == "psycopg2":
+            return _copy_psycopg2(connection, compiled)
+        return _copy_asyncpg(connection, compiled)
+
+    return _fetch_chunks(connection, query)
+
+def parse_frame(data: FrameData, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """DataFrame from fetch_frame_data's result; CPU only, safe to run in a worker thread"""
+    if isinstance(data, bytes):
+        return _parse_csv(data, dtypes)
+
+    frames = [pd.DataFrame.from_records(rows, columns=list(dtypes)).astype(dtypes) for rows in data]
+    return pd.concat(frames, ignore_index=True) if frames else empty_frame(dtypes)
+
+def _copy_psycopg2(connection: Connection, compiled) -> bytes:
+    raw = connection.connection.driver_connection
+    buffer = io.BytesIO()
+    with raw.cursor() as cursor:
+        # COPY takes no bind parameters; mogrify quotes them into the statement
+        sql = cursor.mogrify(compiled.string, compiled.params).decode()
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", buffer)
+    return buffer.getvalue()
+
+def _copy_asyncpg(connection: Connection, compiled) -> bytes:
+    raw = connection.connection.driver_connection
+    params = compiled.params
+    args = [params[name] for name in compiled.positiontup]
+    chunks = []
+
+    async def collect(data: bytes):
+        chunks.append(data)
+
+    # Runs inside run_sync's greenlet, so the driver coroutine can be awaited from sync code
+    await_only(raw.copy_from_query(compiled.string, *args, output=collect, format="csv"))
+    return b"".join(chunks)
+
+def _parse_csv(data: bytes, dtypes: Dict[str, str]) -> pd.DataFrame:
+    if not data:
+        return empty_frame(dtypes)
+
+    table = pa_csv.read_csv(
+        io.BytesIO(data),
+        read_options=pa_csv.ReadOptions(column_names=list(dtypes)),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: _ARROW_TYPES[dtype] for name, dtype in dtypes.items() if dtype in _ARROW_TYPES},
+            # Postgres writes NULL as an unquoted empty field and '' as a quoted one
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+            true_values=["t"],
+            false_values=["f"]
+        )
+    )
+    return table.to_pandas().astype(dtypes)
+
+def _fetch_chunks(connection: Connection, query) -> List[List[Row]]:
+    # Per statement: options set on the connection would stick to the session's later statements
+    result = connection.execute(query.execution_options(yield_per=FETCH_CHUNK_ROWS))
+    return list(result.partitions())
@@ -0,0 +1,194 @@
+"""
+Global cross-building forecasting model
+
+One GlobalForecaster (ml-models/global_forecaster.py) per meter is trained on
+every building's readings over GLOBAL_TRAINING_DAYS, saved under
+settings.MODEL_STORAGE_PATH and recorded as an ml_models row with no
+building (see app.services.model_registry). Forecasting all buildings is a
+single batched predict, and buildings with too little history for a
+per-building fit are forecast from calendar, weather and metadata.
+
+Loaded models are kept per process, keyed by meter and model version.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+import math
+import os
+import sys
+import threading
+
+import pandas as pd
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import Building, EnergyReading, MLModel
+from app.services.frames import empty_frame, read_frame, reading_dtypes
+from app.services.model_registry import resolve_model
+from app.services.weather import join_site_weather, reading_weather_columns
+
+logger = logging.getLogger(__name__)
+
+# Add ML models to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'ml-models'))
+
+try:
+    from global_forecaster import GlobalForecaster
+    ML_AVAILABLE = True
+except ImportError:
+    ML_AVAILABLE = False
+    logging.warning("ML models not available - global forecasting disabled")
+
+GLOBAL_MODEL_TYPE = "global_forecasting"
+GLOBAL_TRAINING_DAYS = 90
+# History handed to forecast(): the weekly lag and 168h mean need the week before the origin
+GLOBAL_HISTORY_DAYS = 14
+
+READING_COLUMNS = ['timestamp', 'building_id', 'meter_reading', 'air_temperature']
+METADATA_COLUMNS = ['building_id', 'primary_use', 'site_id', 'area_sqft', 'year_built']
+
+# Loaded models of this process: meter_type -> (model_version, forecaster)
+_loaded: Dict[int, Tuple[str, "GlobalForecaster"]] = {}
+_loaded_lock = threading.Lock()
+
+def fetch_readings(db: Session, meter_type: int, days: int, building_ids: Optional[List[int]] = None) -> pd.DataFrame:
+    """All buildings' readings for the `days` up to the meter's latest reading, one query"""
+    latest = db.scalar(select(func.max(EnergyReading.timestamp)).where(EnergyReading.meter_type == meter_type))
+    if latest is None:
+        return empty_frame(reading_dtypes(READING_COLUMNS))
+
+    query = join_site_weather(select(
+        EnergyReading.timestamp,
+        EnergyReading.building_id,
+        EnergyReading.meter_reading,
+        *reading_weather_columns('air_temperature')
+    )).where(EnergyReading.meter_type == meter_type)\
+        .where(EnergyReading.timestamp > latest - timedelta(days=days))\
+        .order_by(EnergyReading.building_id, EnergyReading.timestamp)
+    if building_ids is not None:
+        query = query.where(EnergyReading.building_id.in_(building_ids))
+
+    return read_frame(db, query, reading_dtypes(READING_COLUMNS))
+
+def fetch_metadata(db: Session, building_ids: Optional[List[int]] = None) -> pd.DataFrame:
+    """Building features of the global model, one row per building"""
+    query = select(Building.id, Building.primary_use, Building.site_id, Building.area_sqft, Building.year_built)
+    if building_ids is not None:
+        query = query.where(Building.id.in_(building_ids))
+    return pd.DataFrame(db.execute(query).all(), columns=METADATA_COLUMNS)
+
+def global_model_path(meter_type: int, model_version: str) -> str:
+    return os.path.join(
+        settings.MODEL_STORAGE_PATH, 'forecasting', f"global_forecaster_meter_{meter_type}_{model_version}.joblib"
+    )
+
+def train_global_model(meter_type: int) -> "GlobalForecaster":
+    """
+    Fit the global model on every building, save it and make it the active one
+
+    Blocking; run from a script or worker, not the request path.
+    """
+    db = SessionLocal()
+    try:
+        readings = fetch_readings(db, meter_type, GLOBAL_TRAINING_DAYS)
+        metadata = fetch_metadata(db)
+
+        forecaster = GlobalForecaster()
+        metrics = forecaster.fit(readings, metadata)
+
+        model_version = datetime.now().strftime('%Y%m%d%H%M%S')
+        path = global_model_path(meter_type, model_version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        forecaster.save_model(path)
+
+        # The previous global model for the meter is superseded
+        db.execute(
+            update(MLModel)
+            .where(MLModel.building_id.is_(None))
+            .where(MLModel.meter_type == meter_type)
+            .where(MLModel.model_type == GLOBAL_MODEL_TYPE)
+            .where(MLModel.status == "active")
+            .values(status="retired")
+        )
+        db.add(MLModel(
+            model_name=f"global_forecaster_meter_{meter_type}",
+            model_type=GLOBAL_MODEL_TYPE,
+            building_id=None,
+            meter_type=meter_type,
+            model_version=model_version,
+            model_parameters={
+                "path": path,
+                "training_days": GLOBAL_TRAINING_DAYS,
+                "metrics": {name: float(value) for name, value in metrics.items()}
+            },
+            accuracy_score=None if math.isnan(metrics["mape"]) else max(0.0, 1.0 - metrics["mape"]),
+            status="active"
+        ))
+        db.commit()
+
+        with _loaded_lock:
+            _loaded[meter_type] = (model_version, forecaster)
+
+        logger.info(f"✅ Global forecasting model {model_version} trained for meter {meter_type}")
+        return forecaster
+    finally:
+        db.close()
+
+def resolve_global_model(db: Session, meter_type: int) -> Optional[MLModel]:
+    """Active ml_models row of the meter's global model"""
+    return resolve_model(db, None, meter_type, model_type=GLOBAL_MODEL_TYPE)
+
+def load_global_model(model: MLModel) -> "GlobalForecaster":
+    """
+    Loaded global model for an ml_models row, read from disk once per version
+
+    Blocking (file IO and unpickling); call from a worker thread in async code.
+    """
+    with _loaded_lock:
+        loaded = _loaded.get(model.meter_type)
+        if loaded is not None and loaded[0] == model.model_version:
+            return loaded[1]
+
+        path = (model.model_parameters or {}).get("path")
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Global model file for meter {model.meter_type} not found: {path}")
+
+        forecaster = GlobalForecaster.load_model(path)
+        _loaded[model.meter_type] = (model.model_version, forecaster)
+        return forecaster
+
+def forecast_results(forecaster: "GlobalForecaster",
+                     readings: pd.DataFrame,
+                     metadata: pd.DataFrame,
+                     periods: int,
+                     building_ids: Optional[List[int]] = None,
+                     weather: Optional[pd.DataFrame] = None) -> Dict[int, Tuple[datetime, Dict]]:
+    """
+    Forecast the buildings in one batch; per building, the issue time and a
+    result in the per-building forecasters' format (see forecast_store.store_forecast)
+
+    weather: site_id, timestamp, air_temperature for the forecast hours (app.services.weather)
+    """
+    forecast = forecaster.forecast(readings, metadata, periods=periods, building_ids=building_ids, weather=weather)
+
+    results = {}
+    for building_id, rows in forecast.groupby('building_id', sort=False):
+        results[int(building_id)] = (
+            rows['issued_at'].iloc[0].to_pydatetime(),
+            {
+                "backend": forecaster.backend,
+                "cold_start": bool(rows['cold_start'].iloc[0]),
+                "forecast": [
+                    {
+                        "timestamp": row.timestamp.isoformat(),
+                        "predicted_kwh": float(row.predicted_kwh),
+                        "confidence_lower": float(row.confidence_lower),
+                        "confidence_upper": float(row.confidence_upper)
+                    }
+                    for row in rows.itertuples(index=False)
+                ]
+            }
+        )
+    return results
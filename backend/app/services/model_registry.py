@@ -0,0 +1,166 @@
+"""
+Registry of trained per-building models
+
+Model metadata lives in ml_models. Fitted models are files under
+settings.MODEL_STORAGE_PATH, loaded lazily on first use and kept in an
+in-memory LRU keyed by (building_id, meter_type, model_version), bounded by
+settings.MODEL_CACHE_MAX_MB. Each building is scored with its own model, and
+any number of buildings can be served without refitting.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+import os
+import sys
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import MLModel
+
+logger = logging.getLogger(__name__)
+
+# Add ML models to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'ml-models'))
+
+try:
+    from anomaly_detector import EnergyAnomalyDetector
+    ML_AVAILABLE = True
+except ImportError:
+    ML_AVAILABLE = False
+    logging.warning("ML models not available - model registry disabled")
+
+ANOMALY_MODEL_TYPE = "anomaly_detection"
+
+ModelKey = Tuple[int, Optional[int], str]
+
+def model_key(model: MLModel) -> ModelKey:
+    return (model.building_id, model.meter_type, model.model_version)
+
+def resolve_model(
+    db: Session,
+    building_id: int,
+    meter_type: Optional[int] = None,
+    model_version: Optional[str] = None,
+    model_type: str = ANOMALY_MODEL_TYPE
+) -> Optional[MLModel]:
+    """
+    ml_models row for a building/meter: the given version, or the latest active one
+    """
+    query = select(MLModel)\
+        .where(MLModel.model_type == model_type)\
+        .where(MLModel.building_id == building_id)\
+        .where(MLModel.meter_type.is_not_distinct_from(meter_type))
+
+    if model_version is not None:
+        query = query.where(MLModel.model_version == model_version)
+    else:
+        query = query.where(MLModel.status == "active")
+
+    return db.scalars(query.order_by(MLModel.id.desc()).limit(1)).first()
+
+def resolve_models(
+    db: Session,
+    building_ids: Optional[Iterable[int]] = None,
+    meter_type: Optional[int] = None,
+    model_type: str = ANOMALY_MODEL_TYPE
+) -> Dict[int, MLModel]:
+    """
+    Latest active ml_models row per building for a meter, in one query
+
+    Covers every building with a model when building_ids is None.
+    """
+    query = select(MLModel)\
+        .where(MLModel.model_type == model_type)\
+        .where(MLModel.status == "active")\
+        .where(MLModel.building_id.is_not(None))\
+        .where(MLModel.meter_type.is_not_distinct_from(meter_type))
+
+    if building_ids is not None:
+        query = query.where(MLModel.building_id.in_(list(building_ids)))
+
+    query = query.distinct(MLModel.building_id).order_by(MLModel.building_id, MLModel.id.desc())
+    return {model.building_id: model for model in db.scalars(query)}
+
+class ModelRegistry:
+    """Thread-safe LRU of loaded models with a memory cap"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[ModelKey, Tuple[object, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        # One lock per key so concurrent requests load a model from disk only once
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, model: MLModel):
+        """
+        Loaded model for an ml_models row, reading it from disk on first use.
+
+        Blocking (file IO and unpickling); call from a worker thread in async code.
+        """
+        key = model_key(model)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        try:
+            with load_lock:
+                # Another thread may have loaded it while we waited
+                with self._lock:
+                    if key in self._models:
+                        self._models.move_to_end(key)
+                        self.hits += 1
+                        return self._models[key][0]
+
+                path = (model.model_parameters or {}).get("path")
+                if not path or not os.path.exists(path):
+                    raise FileNotFoundError(f"Model file for {key} not found: {path}")
+
+                detector = EnergyAnomalyDetector()
+                detector.load_model(path)
+                # Uncompressed joblib size is a close proxy for in-memory size
+                size = os.path.getsize(path)
+
+                with self._lock:
+                    self._models[key] = (detector, size)
+                    self._total_bytes += size
+                    self.loads += 1
+                    self._evict()
+
+                logger.info(f"📂 Loaded model {key} ({size / 1e6:.1f} MB, {len(self._models)} cached)")
+                return detector
+        finally:
+            # Dropped on failure too, so versions that never load do not leak locks
+            with self._lock:
+                if self._load_locks.get(key) is load_lock:
+                    del self._load_locks[key]
+
+    def _evict(self):
+        # Always keep the most recently used model, even if it alone exceeds the cap
+        while self._total_bytes > self.max_bytes and len(self._models) > 1:
+            _, (_, size) = self._models.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "cached_models": len(self._models),
+                "cached_mb": self._total_bytes / 1e6,
+                "max_mb": self.max_bytes / 1e6,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+registry = ModelRegistry(settings.MODEL_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,76 @@
+"""
+Usage profiles (hour-of-day / hour-of-week) aggregated in the database
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import Integer, cast, extract, func, select
+from sqlalchemy.orm import Session
+
+from app.models.database import EnergyReading
+
+PROFILE_SLOTS = {
+    "hour": 24,
+    "hour_of_week": 168,
+}
+
+def _slot_expression(profile: str):
+    hour = cast(extract("hour", EnergyReading.timestamp), Integer)
+    if profile == "hour":
+        return hour
+    # ISO day of week is 1 (Monday) .. 7 (Sunday); slot 0 is Monday 00:00 like datetime.weekday()
+    day_of_week = cast(extract("isodow", EnergyReading.timestamp), Integer) - 1
+    return day_of_week * 24 + hour
+
+def usage_profile(
+    db: Session,
+    building_id: int,
+    start: datetime,
+    end: datetime,
+    profile: str = "hour",
+    meter_type: Optional[int] = None
+) -> List[Dict]:
+    """
+    Per-slot usage statistics over [start, end).
+
+    Returns exactly one entry per slot (24 for "hour", 168 for "hour_of_week"),
+    zero-filled where there is no data, or an empty list when the window has
+    no readings at all.
+    """
+    slot = _slot_expression(profile).label("slot")
+    reading = EnergyReading.meter_reading
+
+    query = select(
+        slot,
+        func.avg(reading).label("avg"),
+        func.percentile_cont(0.5).within_group(reading).label("p50"),
+        func.percentile_cont(0.9).within_group(reading).label("p90"),
+        func.min(reading).label("min"),
+        func.max(reading).label("max"),
+        func.count(reading).label("count")
+    ).where(
+        EnergyReading.building_id == building_id,
+        EnergyReading.timestamp >= start,
+        EnergyReading.timestamp < end
+    )
+
+    if meter_type is not None:
+        query = query.where(EnergyReading.meter_type == meter_type)
+
+    rows = {row.slot: row for row in db.execute(query.group_by(slot))}
+    if not rows:
+        return []
+
+    pattern = []
+    for index in range(PROFILE_SLOTS[profile]):
+        row = rows.get(index)
+        pattern.append({
+            "slot": index,
+            "average_usage": float(row.avg) if row else 0,
+            "median_usage": float(row.p50) if row else 0,
+            "p90_usage": float(row.p90) if row else 0,
+            "min_usage": float(row.min) if row else 0,
+            "max_usage": float(row.max) if row else 0,
+            "data_points": row.count if row else 0
+        })
+
+    return pattern
@@ -0,0 +1,93 @@
+"""
+Shared energy reading lookups used across routers
+"""
+from typing import List, NamedTuple, Optional, Tuple
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.database import Building, EnergyReading
+from app.services.frames import read_frame_async, reading_dtypes
+from app.services.weather import join_site_weather, reading_weather_columns
+
+class LatestReading(NamedTuple):
+    timestamp: datetime
+    meter_reading: float
+    meter_type: Optional[int]
+
+def latest_reading_subquery(meter_type: Optional[int] = None):
+    """
+    LATERAL subquery returning the newest reading for the correlated building.
+
+    Postgres runs it as one index probe per building on
+    ix_energy_readings_building_latest, so the whole campus resolves in a
+    single round-trip instead of one query per building.
+    """
+    subquery = select(
+        EnergyReading.timestamp,
+        EnergyReading.meter_reading,
+        EnergyReading.meter_type
+    ).where(EnergyReading.building_id == Building.id)
+
+    if meter_type is not None:
+        subquery = subquery.where(EnergyReading.meter_type == meter_type)
+
+    return subquery\
+        .order_by(EnergyReading.timestamp.desc())\
+        .limit(1)\
+        .correlate(Building)\
+        .lateral("latest_reading")
+
+def get_buildings_with_latest_reading(
+    db: Session,
+    meter_type: Optional[int] = None
+) -> List[Tuple[Building, Optional[LatestReading]]]:
+    """Get every building paired with its most recent energy reading (or None)"""
+    latest = latest_reading_subquery(meter_type)
+
+    query = select(Building, latest.c.timestamp, latest.c.meter_reading, latest.c.meter_type)\
+        .outerjoin(latest, true())\
+        .order_by(Building.id)
+
+    result = []
+    for building, timestamp, meter_reading, reading_meter_type in db.execute(query):
+        latest_reading = None
+        if timestamp is not None:
+            latest_reading = LatestReading(timestamp, meter_reading, reading_meter_type)
+        result.append((building, latest_reading))
+
+    return result
+
+async def get_reading_series(
+    db: AsyncSession,
+    building_id: int,
+    start: datetime,
+    end: datetime,
+    meter_type: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Fetch the chartable columns of a building's readings over [start, end)
+    as a DataFrame, ordered by timestamp (read column-wise, no row objects
+    are materialized); the same window as rollups.window_stats. Parsing
+    runs off the event loop (see frames.read_frame_async).
+    """
+    columns = [
+        EnergyReading.timestamp,
+        EnergyReading.meter_reading,
+        EnergyReading.meter_type,
+        *reading_weather_columns('air_temperature')
+    ]
+    query = join_site_weather(select(*columns)).where(
+        EnergyReading.building_id == building_id,
+        EnergyReading.timestamp >= start,
+        EnergyReading.timestamp < end
+    )
+
+    if meter_type is not None:
+        query = query.where(EnergyReading.meter_type == meter_type)
+
+    return await read_frame_async(
+        db, query.order_by(EnergyReading.timestamp), reading_dtypes(column.key for column in columns)
+    )
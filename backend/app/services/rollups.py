@@ -0,0 +1,139 @@
+"""
+Window aggregates over energy readings that read TimescaleDB rollups when the
+window is coarse enough, falling back to raw readings on plain Postgres
+"""
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy import column, func, literal, select, table, union_all
+from sqlalchemy.orm import Session
+
+from app.core.timescale import ROLLUP_VIEWS, rollups_available
+from app.models.database import EnergyReading
+
+RESOLUTION_STEPS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+class WindowStats(NamedTuple):
+    total: float
+    count: int
+    avg: float
+    min: Optional[float]
+    max: Optional[float]
+
+def rollup_table(resolution: str):
+    """Lightweight table construct for a continuous aggregate view"""
+    return table(
+        ROLLUP_VIEWS[resolution],
+        column("building_id"),
+        column("meter_type"),
+        column("bucket"),
+        column("total_reading"),
+        column("avg_reading"),
+        column("min_reading"),
+        column("max_reading"),
+        column("reading_count"),
+        column("total_cost_usd"),
+        column("total_carbon_emissions_lbs"),
+        column("avg_air_temperature"),
+    )
+
+def _floor(ts: datetime, resolution: str) -> datetime:
+    if resolution == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+def _ceil(ts: datetime, resolution: str) -> datetime:
+    floored = _floor(ts, resolution)
+    return floored if floored == ts else floored + RESOLUTION_STEPS[resolution]
+
+def plan_segments(start: datetime, end: datetime) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Split [start, end) into (source, start, end) segments: whole days from the
+    daily rollup, whole hours from the hourly rollup, and raw readings for the
+    partial hours at either edge.
+    """
+    hour_start, hour_end = _ceil(start, "hour"), _floor(end, "hour")
+    if hour_start >= hour_end:
+        return [("raw", start, end)]
+
+    day_start, day_end = _ceil(hour_start, "day"), _floor(hour_end, "day")
+    if day_start >= day_end:
+        middle = [("hour", hour_start, hour_end)]
+    else:
+        middle = [("hour", hour_start, day_start), ("day", day_start, day_end), ("hour", day_end, hour_end)]
+
+    segments = [("raw", start, hour_start)] + middle + [("raw", hour_end, end)]
+    return [(source, seg_start, seg_end) for source, seg_start, seg_end in segments if seg_start < seg_end]
+
+def _segment_stats_query(
+    source: str,
+    start: datetime,
+    end: datetime,
+    building_id: Optional[int],
+    meter_type: Optional[int]
+):
+    """Partial (total, count, min, max) for one segment"""
+    if source == "raw":
+        query = select(
+            func.sum(EnergyReading.meter_reading).label("total"),
+            func.count(EnergyReading.meter_reading).label("count"),
+            func.min(EnergyReading.meter_reading).label("min"),
+            func.max(EnergyReading.meter_reading).label("max")
+        ).where(EnergyReading.timestamp >= start, EnergyReading.timestamp < end)
+
+        if building_id is not None:
+            query = query.where(EnergyReading.building_id == building_id)
+        if meter_type is not None:
+            query = query.where(EnergyReading.meter_type == meter_type)
+        return query
+
+    rollup = rollup_table(source)
+    query = select(
+        func.sum(rollup.c.total_reading).label("total"),
+        func.sum(rollup.c.reading_count).label("count"),
+        func.min(rollup.c.min_reading).label("min"),
+        func.max(rollup.c.max_reading).label("max")
+    ).where(rollup.c.bucket >= start, rollup.c.bucket < end)
+
+    if building_id is not None:
+        query = query.where(rollup.c.building_id == building_id)
+    if meter_type is not None:
+        query = query.where(rollup.c.meter_type == meter_type)
+    return query
+
+def window_stats(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    building_id: Optional[int] = None,
+    meter_type: Optional[int] = None
+) -> WindowStats:
+    """Total, count, average, min and max meter reading over [start, end) in one query"""
+    if rollups_available(db):
+        segments = plan_segments(start, end)
+    else:
+        segments = [("raw", start, end)]
+
+    queries = [
+        _segment_stats_query(source, seg_start, seg_end, building_id, meter_type)
+        for source, seg_start, seg_end in segments
+    ]
+    parts = (union_all(*queries) if len(queries) > 1 else queries[0]).subquery()
+
+    row = db.execute(select(
+        func.coalesce(func.sum(parts.c.total), literal(0.0)),
+        func.coalesce(func.sum(parts.c.count), literal(0)),
+        func.min(parts.c.min),
+        func.max(parts.c.max)
+    )).one()
+
+    total, count = float(row[0]), int(row[1])
+    return WindowStats(
+        total=total,
+        count=count,
+        avg=total / count if count else 0,
+        min=row[2],
+        max=row[3]
+    )
@@ -0,0 +1,307 @@
+"""
+Background training jobs for per-building anomaly models
+
+A training job is an ml_models row (see app.services.model_registry): it is inserted as 'queued', moved to
+'training' by the worker, and finishes as 'active' (fitted model saved under
+settings.MODEL_STORAGE_PATH) or 'failed'. Fitting runs in a bounded process
+pool, never in the request path, and each worker fits single-threaded so the
+pool size caps the cores training can take from the API.
+
+Only one queued/training job exists per building and meter: enqueueing takes a
+transaction-scoped advisory lock and returns the existing job if there is one.
+Workers heartbeat updated_at while fitting; a pending job whose updated_at is
+older than STALE_JOB_AFTER (by the database clock) is marked failed and
+replaced, and its worker, if still alive, neither starts nor records it.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import zlib
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.database import MLModel
+from app.services.frames import read_frame, reading_dtypes
+from app.services.model_registry import ANOMALY_MODEL_TYPE
+
+logger = logging.getLogger(__name__)
+
+# Add ML models to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'ml-models'))
+
+try:
+    from anomaly_detector import EnergyAnomalyDetector
+    ML_AVAILABLE = True
+except ImportError:
+    ML_AVAILABLE = False
+    logging.warning("ML models not available - background training disabled")
+
+PENDING_STATUSES = ("queued", "training")
+MIN_TRAINING_SAMPLES = 100
+
+# Pending jobs not updated for this long are treated as lost (e.g. the API restarted mid-training)
+STALE_JOB_AFTER = timedelta(hours=1)
+# How often a worker touches updated_at while its job trains
+HEARTBEAT_INTERVAL = timedelta(minutes=5)
+
+# Weather from the building's site (site_weather), else the reading's own copy
+TRAINING_QUERY = text("""
+    SELECT r.timestamp, r.building_id, r.meter_reading,
+           COALESCE(w.air_temperature, r.air_temperature) AS air_temperature,
+           COALESCE(w.wind_speed, r.wind_speed) AS wind_speed,
+           COALESCE(w.cloud_coverage, r.cloud_coverage) AS cloud_coverage
+    FROM energy_readings r
+    LEFT JOIN buildings b ON b.id = r.building_id
+    LEFT JOIN site_weather w ON w.site_id = b.site_id AND w.timestamp = r.timestamp
+    WHERE r.building_id = :building_id
+    AND (CAST(:meter_type AS INTEGER) IS NULL OR r.meter_type = :meter_type)
+    AND r.timestamp >= :cutoff_date
+    ORDER BY r.timestamp
+""")
+TRAINING_COLUMNS = ['timestamp', 'building_id', 'meter_reading', 'air_temperature', 'wind_speed', 'cloud_coverage']
+
+# Process pool and in-flight futures of this API process
+_pool: Optional[ProcessPoolExecutor] = None
+_futures: Dict[int, Future] = {}
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned (not forked) workers: the API process has an event loop and threads
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.TRAINING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+def shutdown_training_pool():
+    """Stop accepting jobs; running fits are left to finish"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def model_path(job: MLModel) -> str:
+    meter = "all" if job.meter_type is None else f"meter_{job.meter_type}"
+    return os.path.join(
+        settings.MODEL_STORAGE_PATH,
+        f"anomaly_building_{job.building_id}_{meter}_{job.model_version}.joblib"
+    )
+
+def job_status(job: MLModel) -> Dict:
+    """API representation of a training job"""
+    parameters = job.model_parameters or {}
+    return {
+        "job_id": job.id,
+        "building_id": job.building_id,
+        "meter_type": job.meter_type,
+        "model_type": job.model_type,
+        "model_version": job.model_version,
+        "status": job.status,
+        "error": parameters.get("error"),
+        "training_samples": parameters.get("training_samples"),
+        "metrics": parameters.get("metrics"),
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+def enqueue_anomaly_training(
+    db: Session,
+    building_id: int,
+    days_back: int = 30,
+    meter_type: Optional[int] = None
+) -> Dict:
+    """
+    Queue a training job for a building (and meter, None for all meters), or
+    return the one already pending.
+
+    Returns the job status plus "deduplicated": True when an existing job was reused.
+    """
+    # Serialize enqueues for this building/meter across API workers until commit
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"),
+        {"key": zlib.crc32(f"{ANOMALY_MODEL_TYPE}:{building_id}:{meter_type}".encode())}
+    )
+
+    # Compared on the database clock, which also stamps updated_at
+    stale = MLModel.updated_at < func.now() - STALE_JOB_AFTER
+    pending = db.execute(
+        select(MLModel, stale)
+        .where(MLModel.building_id == building_id)
+        .where(MLModel.meter_type.is_not_distinct_from(meter_type))
+        .where(MLModel.model_type == ANOMALY_MODEL_TYPE)
+        .where(MLModel.status.in_(PENDING_STATUSES))
+        .order_by(MLModel.id.desc())
+    ).all()
+
+    for job, is_stale in pending:
+        if not is_stale:
+            db.commit()
+            return {**job_status(job), "deduplicated": True}
+        # Conditional, so a job that finished or heartbeated meanwhile is left alone
+        lost = db.execute(
+            update(MLModel)
+            .where(MLModel.id == job.id)
+            .where(MLModel.status.in_(PENDING_STATUSES))
+            .where(stale)
+            .values(status="failed", model_parameters={**(job.model_parameters or {}), "error": "Job lost before completion"})
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not lost:
+            db.commit()
+            db.refresh(job)
+            return {**job_status(job), "deduplicated": True}
+
+    job = MLModel(
+        model_name=f"anomaly_detector_building_{building_id}",
+        model_type=ANOMALY_MODEL_TYPE,
+        building_id=building_id,
+        meter_type=meter_type,
+        model_version=datetime.now().strftime("%Y%m%d%H%M%S%f"),
+        model_parameters={"days_back": days_back},
+        status="queued"
+    )
+    db.add(job)
+    db.commit()
+
+    job_id = job.id
+    future = _get_pool().submit(run_anomaly_training, job_id)
+    _futures[job_id] = future
+    future.add_done_callback(lambda _: _futures.pop(job_id, None))
+
+    logger.info(f"Queued anomaly training job {job_id} for building {building_id}")
+    return {**job_status(job), "deduplicated": False}
+
+def get_job(db: Session, job_id: int) -> Optional[MLModel]:
+    job = db.get(MLModel, job_id)
+    return job if job is not None and job.model_type == ANOMALY_MODEL_TYPE else None
+
+def _set_job(db: Session, job: MLModel, status: str, **parameters) -> bool:
+    """
+    Move a training job to `status`, merging parameters into model_parameters,
+    only while it is still 'training' (enqueue may have marked it lost); False
+    when the job was taken away
+    """
+    merged = {**(job.model_parameters or {}), **parameters}
+    updated = db.execute(
+        update(MLModel)
+        .where(MLModel.id == job.id)
+        .where(MLModel.status == "training")
+        .values(status=status, model_parameters=merged)
+    ).rowcount
+    if not updated:
+        db.rollback()
+        return False
+    db.commit()
+    job.status, job.model_parameters = status, merged
+    return True
+
+def _heartbeat(job_id: int, stop: threading.Event):
+    """Touch a training job's updated_at every HEARTBEAT_INTERVAL until stopped"""
+    while not stop.wait(HEARTBEAT_INTERVAL.total_seconds()):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(MLModel)
+                .where(MLModel.id == job_id)
+                .where(MLModel.status == "training")
+                .values(updated_at=func.now())
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Heartbeat for training job {job_id} failed: {e}")
+        finally:
+            db.close()
+
+def run_anomaly_training(job_id: int) -> str:
+    """Process pool entry point: fit, save and record one building's anomaly model"""
+    # Never reuse connections inherited from the parent process
+    engine.dispose(close=False)
+
+    db = SessionLocal()
+    try:
+        # Claim the job only while it is still queued: one that waited in the pool
+        # past STALE_JOB_AFTER was marked failed and replaced by enqueue
+        claimed = db.execute(
+            update(MLModel)
+            .where(MLModel.id == job_id)
+            .where(MLModel.status == "queued")
+            .values(status="training")
+        ).rowcount
+        db.commit()
+
+        job = db.get(MLModel, job_id)
+        if job is None:
+            return "missing"
+        if not claimed:
+            logger.info(f"Skipping anomaly training job {job_id}: no longer queued ({job.status})")
+            return job.status
+
+        _set_job(db, job, "training", started_at=datetime.now().isoformat())
+
+        stop_heartbeat = threading.Event()
+        threading.Thread(target=_heartbeat, args=(job_id, stop_heartbeat), daemon=True).start()
+        try:
+            days_back = (job.model_parameters or {}).get("days_back", 30)
+            df = read_frame(db, TRAINING_QUERY, reading_dtypes(TRAINING_COLUMNS), {
+                "building_id": job.building_id,
+                "meter_type": job.meter_type,
+                "cutoff_date": datetime.now() - timedelta(days=days_back)
+            })
+
+            if len(df) < MIN_TRAINING_SAMPLES:
+                raise ValueError(
+                    f"Insufficient data for training: {len(df)} records (minimum {MIN_TRAINING_SAMPLES} required)"
+                )
+
+            detector = EnergyAnomalyDetector(contamination=0.1)
+            # One core per job; the pool size bounds total training parallelism
+            detector.model.set_params(n_jobs=1)
+            metrics = detector.fit(df, building_id=job.building_id)
+
+            path = model_path(job)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            detector.save_model(path)
+
+            # Older models for the building are superseded, in the same transaction as activation
+            db.execute(
+                update(MLModel)
+                .where(MLModel.building_id == job.building_id)
+                .where(MLModel.meter_type.is_not_distinct_from(job.meter_type))
+                .where(MLModel.model_type == ANOMALY_MODEL_TYPE)
+                .where(MLModel.status == "active")
+                .values(status="retired")
+            )
+            activated = _set_job(
+                db, job, "active",
+                path=path,
+                training_samples=len(df),
+                metrics={name: float(value) if not isinstance(value, list) else [float(v) for v in value]
+                         for name, value in metrics.items()},
+                finished_at=datetime.now().isoformat()
+            )
+            if not activated:
+                os.remove(path)
+                logger.warning(f"⚠️ Anomaly training job {job_id} was marked lost while training; result dropped")
+                return "failed"
+
+            logger.info(f"✅ Anomaly training job {job_id} finished for building {job.building_id}")
+            return "active"
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Anomaly training job {job_id} failed: {e}")
+            _set_job(db, job, "failed", error=str(e), finished_at=datetime.now().isoformat())
+            return "failed"
+        finally:
+            stop_heartbeat.set()
+    finally:
+        db.close()
@@ -0,0 +1,170 @@
+"""
+Site weather covariates for forecasting
+
+Weather lives once per site and hour in site_weather
+(app.models.database.SiteWeather), loaded by ingestion. Forecasters read the
+temperatures of the hours they forecast from here instead of inventing them.
+
+Readings only carry their own weather copy while
+settings.STORE_READING_WEATHER is on, so queries that return weather with
+readings join it through the building's site (join_site_weather,
+reading_weather_columns) and fall back to the reading's copy.
+
+Lookups are keyed by site and hour range. Forecasts are issued from a
+building's latest reading, so repeated lookups for the same forecast hit the
+same key; results are kept per process for settings.WEATHER_CACHE_MINUTES so
+newly loaded weather is picked up. The *_async variants serve async code: the
+fetch runs in run_sync and the pandas work in the threadpool.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.database import Building, EnergyReading, SiteWeather
+from app.services.frames import empty_frame, read_frame, read_frame_async, reading_dtypes
+
+WEATHER_DTYPES = reading_dtypes(['site_id', 'timestamp', 'air_temperature'])
+
+# Site/hour-range entries kept per process
+MAX_CACHED_RANGES = 1024
+
+WeatherKey = Tuple[int, datetime, datetime]
+
+def reading_weather_columns(*names: str) -> list:
+    """Weather columns for a readings query: the site's hour from site_weather, else the reading's copy"""
+    return [func.coalesce(getattr(SiteWeather, name), getattr(EnergyReading, name)).label(name) for name in names]
+
+def join_site_weather(query):
+    """Outer-join each reading's building and site weather hour (for reading_weather_columns)"""
+    return query\
+        .outerjoin_from(EnergyReading, Building, Building.id == EnergyReading.building_id)\
+        .outerjoin_from(Building, SiteWeather, and_(
+            SiteWeather.site_id == Building.site_id,
+            SiteWeather.timestamp == EnergyReading.timestamp
+        ))
+
+def site_weather_query(site_ids: Sequence[int], start: datetime, end: datetime):
+    """site_id, timestamp, air_temperature for the sites' hours in (start, end]"""
+    return select(SiteWeather.site_id, SiteWeather.timestamp, SiteWeather.air_temperature)\
+        .where(SiteWeather.site_id.in_(list(site_ids)))\
+        .where(SiteWeather.timestamp > start)\
+        .where(SiteWeather.timestamp <= end)\
+        .where(SiteWeather.air_temperature.is_not(None))\
+        .order_by(SiteWeather.site_id, SiteWeather.timestamp)
+
+def fetch_site_weather(db: Session, site_ids: Sequence[int], start: datetime, end: datetime) -> pd.DataFrame:
+    """site_weather_query as a frame, one query"""
+    return read_frame(db, site_weather_query(site_ids, start, end), WEATHER_DTYPES)
+
+def building_sites(db: Session, building_ids: Sequence[int]) -> Dict[int, int]:
+    """building_id -> site_id for buildings with a known site"""
+    return {
+        building_id: site_id
+        for building_id, site_id in db.execute(
+            select(Building.id, Building.site_id)
+            .where(Building.id.in_(list(building_ids)))
+            .where(Building.site_id.is_not(None))
+        ).all()
+    }
+
+class WeatherCovariates:
+    """Per-process LRU of site temperature series with a time-to-live"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = MAX_CACHED_RANGES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._series: "OrderedDict[WeatherKey, Tuple[float, pd.Series]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def temperatures(self, db: Session, site_ids: Sequence[int], start: datetime, hours: int) -> Dict[int, pd.Series]:
+        """
+        Air temperature per site for the `hours` after `start`, indexed by
+        timestamp (empty where the site has no weather); sites not cached are
+        read in one query
+        """
+        end = start + timedelta(hours=hours)
+        result, missing, now = self._cached(site_ids, start, end)
+        if missing:
+            self._store(result, missing, fetch_site_weather(db, missing, start, end), start, end, now)
+        return result
+
+    async def temperatures_async(self, db: AsyncSession, site_ids: Sequence[int], start: datetime, hours: int) -> Dict[int, pd.Series]:
+        """temperatures() for async code"""
+        end = start + timedelta(hours=hours)
+        result, missing, now = self._cached(site_ids, start, end)
+        if missing:
+            weather = await read_frame_async(db, site_weather_query(missing, start, end), WEATHER_DTYPES)
+            await run_in_threadpool(self._store, result, missing, weather, start, end, now)
+        return result
+
+    async def frame_async(self, db: AsyncSession, site_ids: Sequence[int], start: datetime, hours: int) -> pd.DataFrame:
+        """temperatures() as one long frame: site_id, timestamp, air_temperature"""
+        series = await self.temperatures_async(db, site_ids, start, hours)
+        return await run_in_threadpool(self._long_frame, series)
+
+    def _cached(self, site_ids: Sequence[int], start: datetime, end: datetime) -> Tuple[Dict[int, pd.Series], list, float]:
+        """Fresh cached series by site, the sites to fetch, and the lookup time"""
+        now = time.monotonic()
+        result, missing = {}, []
+
+        with self._lock:
+            for site_id in set(site_ids):
+                entry = self._series.get((site_id, start, end))
+                if entry is not None and now - entry[0] < self.ttl_seconds:
+                    self._series.move_to_end((site_id, start, end))
+                    result[site_id] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(site_id)
+
+        return result, missing, now
+
+    def _store(self, result: Dict[int, pd.Series], missing: list, weather: pd.DataFrame,
+               start: datetime, end: datetime, now: float):
+        """Split fetched weather by site into `result` and the cache"""
+        by_site = {site_id: rows.set_index('timestamp')['air_temperature'] for site_id, rows in weather.groupby('site_id')}
+        empty = pd.Series(dtype='float64', index=pd.DatetimeIndex([], name='timestamp'))
+
+        with self._lock:
+            for site_id in missing:
+                series = by_site.get(site_id, empty)
+                self._series[(site_id, start, end)] = (now, series)
+                self._series.move_to_end((site_id, start, end))
+                result[site_id] = series
+                self.misses += 1
+            while len(self._series) > self.max_entries:
+                self._series.popitem(last=False)
+
+    @staticmethod
+    def _long_frame(series: Dict[int, pd.Series]) -> pd.DataFrame:
+        frames = [
+            pd.DataFrame({'site_id': site_id, 'timestamp': temperatures.index, 'air_temperature': temperatures.to_numpy()})
+            for site_id, temperatures in series.items() if not temperatures.empty
+        ]
+        if not frames:
+            return empty_frame(WEATHER_DTYPES)
+        return pd.concat(frames, ignore_index=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"cached_ranges": len(self._series), "hits": self.hits, "misses": self.misses}
+
+site_weather = WeatherCovariates(settings.WEATHER_CACHE_MINUTES * 60)
+
+async def future_temperatures(db: AsyncSession, building_id: int, start: datetime, hours: int) -> Optional[pd.Series]:
+    """Site air temperatures for a building's `hours` after `start`; None when its site is unknown"""
+    site_id = (await db.run_sync(building_sites, [building_id])).get(building_id)
+    if site_id is None:
+        return None
+    return (await site_weather.temperatures_async(db, [site_id], start, hours))[site_id]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Profile: per-chunk metadata/weather join time in the ASHRAE processor
+
+"merge" is the previous join: building_metadata.csv re-read per chunk followed
+by two pandas merges against the full weather frame. "take" is
+ASHRAEProcessor._join_weather: the cached building-to-site array plus
+WeatherLookup.take. Both run over every chunk of train.csv (or the first N
+rows) and the joined weather values are compared.
+
+Usage (from backend/):
+    python -m benchmarks.ashrae_join_profile [data_dir] [rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from ashrae_processor import ASHRAEProcessor, WEATHER_COLUMNS
+
+def merge_join(data_dir: str, chunk: pd.DataFrame, weather_data: pd.DataFrame) -> pd.DataFrame:
+    """The join as _clean_energy_data used to do it"""
+    building_meta = pd.read_csv(os.path.join(data_dir, "building_metadata.csv"))[['building_id', 'site_id']]
+    chunk = chunk.merge(building_meta, on='building_id', how='left')
+    return chunk.merge(weather_data, on=['site_id', 'timestamp'], how='left')
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "ashrae-energy-data"
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    processor = ASHRAEProcessor(data_dir=data_dir, connect=False)
+
+    weather_data = pd.read_csv(os.path.join(data_dir, "weather_train.csv"))
+    weather_data['timestamp'] = pd.to_datetime(weather_data['timestamp'])
+
+    start = time.perf_counter()
+    weather = processor._load_weather_data()
+    processor._load_building_sites()
+    setup = time.perf_counter() - start
+
+    timings = {"merge": [], "take": []}
+    mismatches = 0
+
+    chunks = pd.read_csv(os.path.join(data_dir, "train.csv"), chunksize=settings.BATCH_SIZE, nrows=rows)
+    for chunk in chunks:
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+
+        start = time.perf_counter()
+        merged = merge_join(data_dir, chunk.copy(), weather_data)
+        timings["merge"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        taken = processor._join_weather(chunk.copy(), weather)
+        timings["take"].append(time.perf_counter() - start)
+
+        if len(merged) != len(taken) or not np.allclose(
+            merged[WEATHER_COLUMNS].to_numpy(dtype=np.float64),
+            taken[WEATHER_COLUMNS].to_numpy(dtype=np.float64),
+            equal_nan=True
+        ):
+            mismatches += 1
+
+    print(f"chunks: {len(timings['merge'])} x {settings.BATCH_SIZE} rows, one-time lookup build: {setup:.2f}s")
+    print(f"{'join':<8} {'mean ms':>10} {'p95 ms':>10} {'total s':>10}")
+    for name, values in timings.items():
+        values = np.array(values)
+        print(f"{name:<8} {values.mean() * 1000:>10.1f} {np.percentile(values, 95) * 1000:>10.1f} {values.sum():>10.2f}")
+
+    print(f"\nspeedup: {sum(timings['merge']) / sum(timings['take']):.1f}x, chunks with differing weather: {mismatches}")
+
+if __name__ == "__main__":
+    main()
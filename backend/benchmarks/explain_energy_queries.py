@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN regression check for the hot energy_readings queries
+
+Runs the /historical, /daily-pattern, /weekly-pattern and /comparison handlers against synthetic
+data (seeded inside a transaction that is rolled back), captures every SQL
+statement they issue and EXPLAINs it. Exits non-zero if any statement scans
+energy_readings sequentially or through an index outside EXPECTED_INDEXES.
+
+Usage (from backend/):
+    python -m benchmarks.explain_energy_queries
+"""
+import asyncio
+import json
+import sys
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import async_engine
+from app.core.migrations import RECENT_INDEX_NAME, run_migrations
+from app.core.timescale import ROLLUP_VIEWS
+from app.routers import energy
+
+BUILDING_COUNT = 50
+DAYS = 60
+BENCH_BUILDING_ID = 1_000_000
+
+EXPECTED_INDEXES = {
+    "uq_energy_readings_building_meter_ts",
+    "ix_energy_readings_building_latest",
+    RECENT_INDEX_NAME,
+    # Continuous aggregate indexes (TimescaleDB only)
+    *(f"ix_{view}_building_bucket" for view in ROLLUP_VIEWS.values()),
+    "_bucket_idx",
+}
+
+HANDLERS = {
+    "/historical": lambda db: energy.get_historical_energy(
+        BENCH_BUILDING_ID, hours=168, meter_type=0, db=db),
+    "/historical (all meters)": lambda db: energy.get_historical_energy(
+        BENCH_BUILDING_ID, hours=168, meter_type=None, db=db),
+    "/daily-pattern": lambda db: energy.get_daily_energy_pattern(
+        BENCH_BUILDING_ID, days=7, db=db),
+    "/weekly-pattern": lambda db: energy.get_weekly_energy_pattern(
+        BENCH_BUILDING_ID, days=28, db=db),
+    "/comparison": lambda db: energy.compare_energy_usage(
+        BENCH_BUILDING_ID, compare_days=7, baseline_days=7, db=db),
+}
+
+def seed(db: Session):
+    """Insert hourly readings for every meter of BUILDING_COUNT buildings"""
+    db.execute(text("""
+        INSERT INTO energy_readings (building_id, timestamp, meter_type, meter_reading)
+        SELECT b, ts, m, random() * 100
+        FROM generate_series(:first_id, :last_id) AS b,
+             generate_series(0, 3) AS m,
+             generate_series(
+                 date_trunc('hour', now()) - make_interval(days => :days),
+                 date_trunc('hour', now()),
+                 interval '1 hour'
+             ) AS ts
+    """), {"first_id": BENCH_BUILDING_ID, "last_id": BENCH_BUILDING_ID + BUILDING_COUNT - 1, "days": DAYS})
+    db.execute(text("ANALYZE energy_readings"))
+
+def plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+def check_plan(plan: dict) -> list:
+    """Return a list of problems found in an EXPLAIN (FORMAT JSON) plan"""
+    problems = []
+    for node in plan_nodes(plan["Plan"]):
+        relation = node.get("Relation Name", "")
+        # Hypertable chunks (TimescaleDB) carry the parent's index names as a suffix
+        if relation != "energy_readings" and not relation.startswith("_hyper_"):
+            continue
+        node_type = node["Node Type"]
+        index_name = node.get("Index Name")
+        if node_type == "Seq Scan":
+            problems.append(f"sequential scan on {relation}")
+        elif index_name and not any(index_name.endswith(expected) for expected in EXPECTED_INDEXES):
+            problems.append(f"{node_type} uses unexpected index {index_name}")
+    return problems
+
+async def run_checks() -> int:
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "energy_readings" in statement and not statement.lstrip().upper().startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    failures = 0
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        db = AsyncSession(bind=connection)
+        try:
+            await db.run_sync(seed)
+
+            for name, handler in HANDLERS.items():
+                captured.clear()
+                event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+                try:
+                    await handler(db)
+                finally:
+                    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+                for statement, parameters in captured:
+                    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                    plan = result.scalar()
+                    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+                    problems = check_plan(plan)
+                    status = "FAIL" if problems else "ok"
+                    print(f"[{status}] {name}: {' '.join(statement.split())[:100]}")
+                    for problem in problems:
+                        print(f"       - {problem}")
+                    failures += bool(problems)
+        finally:
+            await db.close()
+            await transaction.rollback()
+
+    print(f"\n{failures} regression(s) found" if failures else "\nAll energy_readings queries are index-backed")
+    return 1 if failures else 0
+
+def main() -> int:
+    run_migrations()
+    return asyncio.run(run_checks())
+
+if __name__ == "__main__":
+    sys.exit(main())
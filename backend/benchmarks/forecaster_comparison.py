@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: forecasting backends on ASHRAE buildings (fit time and accuracy)
+
+For each of the first N buildings with an electricity meter (meter 0) in
+train.csv, every available backend (create_forecaster) is fitted on the
+readings before the last `holdout` hours and asked for a `holdout`-hour
+forecast. Reports fit time, MAPE over non-zero actuals, RMSE and interval
+coverage per backend. Prophet is only included when it is installed.
+
+Without the ASHRAE files a synthetic campus is used instead and the output
+says so; those numbers are not comparable with ASHRAE results.
+
+Usage (from backend/):
+    python -m benchmarks.forecaster_comparison [data_dir] [buildings] [holdout_hours]
+"""
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'ml-models'))
+
+from energy_forecaster import FORECASTER_BACKENDS, PROPHET_AVAILABLE, create_forecaster
+
+HISTORY_DAYS = 60
+
+def load_ashrae(data_dir: str, buildings: int) -> pd.DataFrame:
+    """Electricity readings of the first buildings with weather joined by site"""
+    readings = pd.read_csv(
+        os.path.join(data_dir, "train.csv"),
+        usecols=['building_id', 'meter', 'timestamp', 'meter_reading'],
+        parse_dates=['timestamp']
+    )
+    readings = readings[readings['meter'] == 0]
+    building_ids = np.sort(readings['building_id'].unique())[:buildings]
+    readings = readings[readings['building_id'].isin(building_ids)]
+
+    sites = pd.read_csv(os.path.join(data_dir, "building_metadata.csv"), usecols=['building_id', 'site_id'])
+    weather = pd.read_csv(
+        os.path.join(data_dir, "weather_train.csv"),
+        usecols=['site_id', 'timestamp', 'air_temperature'],
+        parse_dates=['timestamp']
+    )
+    df = readings.merge(sites, on='building_id').merge(weather, on=['site_id', 'timestamp'], how='left')
+
+    # Last HISTORY_DAYS of each building, like the campus runner's training window
+    cutoff = df.groupby('building_id')['timestamp'].transform('max') - pd.Timedelta(days=HISTORY_DAYS)
+    return df[df['timestamp'] > cutoff][['timestamp', 'building_id', 'meter_reading', 'air_temperature']]
+
+def synthetic_campus(buildings: int) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    hours = HISTORY_DAYS * 24
+    timestamps = pd.date_range('2016-10-01', periods=hours, freq='h')
+    hour = timestamps.hour.to_numpy()
+    weekend = timestamps.dayofweek.to_numpy() >= 5
+    temperature = 10 + 8 * np.sin(2 * np.pi * (hour - 9) / 24) + rng.normal(0, 2, hours).cumsum() * 0.1
+
+    frames = []
+    for building_id in range(buildings):
+        scale = rng.lognormal(4, 1)
+        occupancy = np.where(weekend, 0.6, 1.0) * (1 + 0.5 * ((hour >= 8) & (hour < 18)))
+        readings = scale * occupancy * (1 + 0.01 * np.abs(temperature - 18)) * rng.normal(1, 0.05, hours)
+        frames.append(pd.DataFrame({
+            'timestamp': timestamps,
+            'building_id': building_id,
+            'meter_reading': readings,
+            'air_temperature': temperature
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def evaluate(backend: str, rows: pd.DataFrame, building_id: int, holdout: int) -> dict:
+    rows = rows.sort_values('timestamp')
+    cutoff = rows['timestamp'].max() - pd.Timedelta(hours=holdout)
+    train, test = rows[rows['timestamp'] <= cutoff], rows[rows['timestamp'] > cutoff]
+
+    forecaster = create_forecaster(backend)
+    start = time.perf_counter()
+    forecaster.fit(train, building_id=building_id)
+    fit_seconds = time.perf_counter() - start
+
+    forecast = pd.DataFrame(forecaster.forecast(periods=holdout)['forecast'])
+    forecast['timestamp'] = pd.to_datetime(forecast['timestamp'])
+    joined = test.merge(forecast, on='timestamp')
+
+    actual = joined['meter_reading'].to_numpy(dtype=np.float64)
+    errors = actual - joined['predicted_kwh'].to_numpy()
+    nonzero = actual != 0
+    return {
+        'fit_seconds': fit_seconds,
+        'mape': np.mean(np.abs(errors[nonzero] / actual[nonzero])) if nonzero.any() else np.nan,
+        'rmse': np.sqrt(np.mean(errors ** 2)) if len(errors) else np.nan,
+        'coverage': np.mean(
+            (actual >= joined['confidence_lower'].to_numpy()) & (actual <= joined['confidence_upper'].to_numpy())
+        ) if len(actual) else np.nan
+    }
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else "ashrae-energy-data"
+    buildings = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    holdout = int(sys.argv[3]) if len(sys.argv) > 3 else 24
+    logging.getLogger('energy_forecaster').setLevel(logging.WARNING)
+    logging.getLogger('cmdstanpy').disabled = True
+
+    if os.path.exists(os.path.join(data_dir, "train.csv")):
+        df = load_ashrae(data_dir, buildings)
+        print(f"ASHRAE data from {data_dir}: {df['building_id'].nunique()} buildings, meter 0")
+    else:
+        df = synthetic_campus(buildings)
+        print(f"{data_dir}/train.csv not found - SYNTHETIC data, {buildings} buildings")
+
+    backends = [name for name in FORECASTER_BACKENDS if name != 'prophet' or PROPHET_AVAILABLE]
+    if not PROPHET_AVAILABLE:
+        print("prophet not installed - prophet backend skipped")
+
+    results = {backend: [] for backend in backends}
+    failures = {backend: 0 for backend in backends}
+    for building_id, rows in df.groupby('building_id'):
+        for backend in backends:
+            try:
+                results[backend].append(evaluate(backend, rows, building_id, holdout))
+            except ValueError:
+                failures[backend] += 1
+
+    print(f"{'backend':<15} {'buildings':>9} {'fit s (mean)':>13} {'MAPE (median)':>14} {'RMSE (mean)':>12} {'coverage':>9}")
+    for backend in backends:
+        summary = pd.DataFrame(results[backend])
+        if summary.empty:
+            print(f"{backend:<15} {0:>9} (all {failures[backend]} buildings failed)")
+            continue
+        print(
+            f"{backend:<15} {len(summary):>9} {summary['fit_seconds'].mean():>13.3f} "
+            f"{summary['mape'].median():>14.3f} {summary['rmse'].mean():>12.2f} {summary['coverage'].mean():>9.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
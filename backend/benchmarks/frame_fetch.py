@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fetching ML frames row by row vs column-wise (app.services.frames)
+
+Loads the last N days of readings for every building (the shape the campus
+ML runner and batch scoring read) two ways, each in a fresh process so peak
+memory is comparable:
+
+  rows:     db.execute(...).all() -> pd.DataFrame(rows, columns=...)
+  columnar: read_frame (COPY ... TO STDOUT as CSV, parsed by pyarrow)
+
+Both frames are compared column by column.
+
+Usage (from backend/):
+    python -m benchmarks.frame_fetch [days]
+"""
+import multiprocessing
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.database import EnergyReading
+from app.services.frames import read_frame, reading_dtypes
+
+COLUMNS = ['timestamp', 'building_id', 'meter_type', 'meter_reading', 'air_temperature', 'wind_speed', 'cloud_coverage']
+
+def build_query(days: int):
+    start = datetime.now() - timedelta(days=days)
+    return select(*[getattr(EnergyReading, column) for column in COLUMNS])\
+        .where(EnergyReading.timestamp >= start)\
+        .order_by(EnergyReading.building_id, EnergyReading.timestamp, EnergyReading.meter_type)
+
+def fetch(method: str, days: int, results: multiprocessing.Queue):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        if method == "rows":
+            df = pd.DataFrame(db.execute(build_query(days)).all(), columns=COLUMNS)
+        else:
+            df = read_frame(db, build_query(days), reading_dtypes(COLUMNS))
+        elapsed = time.perf_counter() - start
+
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        results.put((method, elapsed, peak_mb, df.memory_usage(deep=True).sum() / 1e6, df))
+    finally:
+        db.close()
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    context = multiprocessing.get_context("spawn")
+
+    frames = {}
+    print(f"{'method':<10} {'rows':>12} {'seconds':>9} {'peak RSS MB':>12} {'frame MB':>9}")
+    for method in ("rows", "columnar"):
+        results = context.Queue()
+        process = context.Process(target=fetch, args=(method, days, results))
+        process.start()
+        method, elapsed, peak_mb, frame_mb, df = results.get()
+        process.join()
+
+        frames[method] = df
+        print(f"{method:<10} {len(df):>12,} {elapsed:>9.2f} {peak_mb:>12.0f} {frame_mb:>9.1f}")
+
+    mismatched = []
+    for column in COLUMNS:
+        try:
+            pd.testing.assert_series_equal(
+                frames["rows"][column].astype(frames["columnar"][column].dtype),
+                frames["columnar"][column],
+                check_exact=True
+            )
+        except AssertionError:
+            mismatched.append(column)
+    print(f"mismatched columns: {mismatched or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one global model for all buildings vs one model per building
+
+Synthetic campus whose load scales with floor area and depends on primary
+use, with a shared weather signal per site. A share of the buildings are
+cold start (only `cold_hours` of history). Holds out the last `holdout`
+hours and compares:
+
+  per-building: create_forecaster(backend).fit/forecast for every building
+                with enough history (cold-start buildings get nothing)
+  global:       GlobalForecaster fitted once on all buildings, one batched
+                forecast() for every building including the cold-start ones
+
+Reports fit and predict time in total and per building, and the median
+building MAPE on the holdout for warm and cold-start buildings. Prophet per
+building is timed on a sample and extrapolated when installed.
+
+Usage (from backend/):
+    python -m benchmarks.global_forecast [buildings] [days] [holdout_hours] [cold_share]
+"""
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'ml-models'))
+
+from energy_forecaster import PROPHET_AVAILABLE, create_forecaster
+from global_forecaster import GlobalForecaster
+
+SITES = 16
+PRIMARY_USES = ['Education', 'Office', 'Lodging/residential', 'Entertainment/public assembly',
+                'Public services', 'Healthcare', 'Parking', 'Other']
+PROPHET_SAMPLE = 5
+COLD_HOURS = 72
+
+def synthetic_campus(buildings: int, hours: int):
+    rng = np.random.default_rng(7)
+    timestamps = pd.date_range('2016-09-01', periods=hours, freq='h')
+    hour = timestamps.hour.to_numpy()
+    weekend = timestamps.dayofweek.to_numpy() >= 5
+
+    metadata = pd.DataFrame({
+        'building_id': np.arange(buildings),
+        'primary_use': rng.choice(PRIMARY_USES, buildings),
+        'site_id': rng.integers(0, SITES, buildings),
+        'area_sqft': rng.lognormal(11, 0.8, buildings).round(),
+        'year_built': rng.integers(1920, 2016, buildings)
+    })
+    site_temperature = (
+        12 + rng.normal(0, 5, (SITES, 1))
+        + 7 * np.sin(2 * np.pi * (hour - 9) / 24)
+        + rng.normal(0, 1, (SITES, hours)).cumsum(axis=1) * 0.2
+    )
+    use_intensity = {use: rng.uniform(0.5, 2.0) for use in PRIMARY_USES}
+    use_weekend = {use: rng.uniform(0.4, 1.0) for use in PRIMARY_USES}
+    use_daytime = {use: rng.uniform(0.2, 0.8) for use in PRIMARY_USES}
+
+    frames = []
+    for building in metadata.itertuples():
+        temperature = site_temperature[building.site_id]
+        age = 1 + (2016 - building.year_built) / 200
+        occupancy = np.where(weekend, use_weekend[building.primary_use], 1.0) \
+            * (1 + use_daytime[building.primary_use] * ((hour >= 8) & (hour < 18)))
+        readings = building.area_sqft / 1_000 * use_intensity[building.primary_use] * age * occupancy \
+            * (1 + 0.015 * np.abs(temperature - 18)) * rng.normal(1, 0.08, hours)
+        frames.append(pd.DataFrame({
+            'timestamp': timestamps,
+            'building_id': building.building_id,
+            'meter_reading': readings,
+            'air_temperature': temperature
+        }))
+    return pd.concat(frames, ignore_index=True), metadata
+
+def mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    nonzero = actual != 0
+    return float(np.mean(np.abs((actual[nonzero] - predicted[nonzero]) / actual[nonzero])))
+
+def per_building(backend: str, train: pd.DataFrame, building_ids, holdout: int) -> pd.DataFrame:
+    forecasts = {}
+    for building_id in building_ids:
+        forecaster = create_forecaster(backend)
+        forecaster.fit(train, building_id=building_id)
+        forecasts[building_id] = [point['predicted_kwh'] for point in forecaster.forecast(periods=holdout)['forecast']]
+    return pd.DataFrame(forecasts)
+
+def main():
+    buildings = int(sys.argv[1]) if len(sys.argv) > 1 else 1400
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    holdout = int(sys.argv[3]) if len(sys.argv) > 3 else 24
+    cold_share = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+    for name in ('energy_forecaster', 'global_forecaster'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    logging.getLogger('cmdstanpy').disabled = True
+
+    df, metadata = synthetic_campus(buildings, days * 24 + holdout)
+    cutoff = df['timestamp'].max() - pd.Timedelta(hours=holdout)
+    cold = metadata['building_id'].to_numpy()[np.random.default_rng(8).random(buildings) < cold_share]
+    # Cold-start buildings only have their last COLD_HOURS before the cutoff
+    train = df[(df['timestamp'] <= cutoff)
+               & (~df['building_id'].isin(cold) | (df['timestamp'] > cutoff - pd.Timedelta(hours=COLD_HOURS)))]
+    test = df[df['timestamp'] > cutoff]
+    actual = test.pivot(index='timestamp', columns='building_id', values='meter_reading')
+    warm = [building_id for building_id in actual.columns if building_id not in set(cold)]
+
+    print(f"synthetic campus: {buildings:,} buildings ({len(cold)} cold start with {COLD_HOURS}h of history), "
+          f"{days} days of history, {holdout}h holdout")
+    print(f"{'approach':<22} {'fit s':>8} {'predict s':>10} {'ms/building':>12} {'warm MAPE':>10} {'cold MAPE':>10}")
+
+    start = time.perf_counter()
+    loop = per_building('fourier_ridge', train, warm, holdout)
+    elapsed = time.perf_counter() - start
+    warm_mape = np.median([mape(actual[b].to_numpy(), loop[b].to_numpy()) for b in warm])
+    print(f"{'per-building ridge':<22} {elapsed:>8.2f} {'(in fit)':>10} {elapsed / len(warm) * 1e3:>12.1f} "
+          f"{warm_mape:>10.4f} {'n/a':>10}")
+
+    if PROPHET_AVAILABLE:
+        sample = warm[:PROPHET_SAMPLE]
+        start = time.perf_counter()
+        per_building('prophet', train, sample, holdout)
+        per_building_seconds = (time.perf_counter() - start) / len(sample)
+        print(f"{'per-building prophet':<22} {per_building_seconds * len(warm):>8.0f} {'(in fit)':>10} "
+              f"{per_building_seconds * 1e3:>12.1f}  (extrapolated from {len(sample)} buildings)")
+
+    forecaster = GlobalForecaster()
+    start = time.perf_counter()
+    forecaster.fit(train, metadata)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = forecaster.forecast(train, metadata, periods=holdout, building_ids=actual.columns)
+    predict_seconds = time.perf_counter() - start
+
+    predicted = result.pivot(index='timestamp', columns='building_id', values='predicted_kwh')[actual.columns]
+    warm_mape = np.median([mape(actual[b].to_numpy(), predicted[b].to_numpy()) for b in warm])
+    cold_mape = np.median([mape(actual[b].to_numpy(), predicted[b].to_numpy()) for b in cold]) if len(cold) else float('nan')
+    print(f"{'global':<22} {fit_seconds:>8.2f} {predict_seconds:>10.2f} "
+          f"{(fit_seconds + predict_seconds) / buildings * 1e3:>12.1f} {warm_mape:>10.4f} {cold_mape:>10.4f}")
+    print(f"{'global (predict only)':<22} {'':>8} {predict_seconds:>10.2f} {predict_seconds / buildings * 1e3:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: hierarchical campus forecast vs one model per building
+
+Synthetic campus (buildings spread over sites and building types, a shared
+weather signal per site). Holds out the last `holdout` hours and compares:
+
+  per-building: create_forecaster(backend).fit/forecast for every building,
+                campus forecast = sum of the building forecasts
+  hierarchical: HierarchicalForecaster with each reconciliation method
+
+Reports fit + forecast time, campus and building-level MAPE on the holdout,
+and the coherence error (campus forecast minus the sum of its buildings).
+Prophet per building is timed on a sample and extrapolated when installed.
+
+Usage (from backend/):
+    python -m benchmarks.hierarchical_forecast [buildings] [days] [holdout_hours]
+"""
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'ml-models'))
+
+from energy_forecaster import PROPHET_AVAILABLE, create_forecaster
+from hierarchical_forecaster import RECONCILIATION_METHODS, HierarchicalForecaster
+
+SITES = 16
+BUILDING_TYPES = ['Education', 'Office', 'Lodging/residential', 'Entertainment/public assembly',
+                  'Public services', 'Healthcare', 'Parking', 'Other']
+PROPHET_SAMPLE = 5
+
+def synthetic_campus(buildings: int, hours: int):
+    rng = np.random.default_rng(5)
+    timestamps = pd.date_range('2016-09-01', periods=hours, freq='h')
+    hour = timestamps.hour.to_numpy()
+    weekend = timestamps.dayofweek.to_numpy() >= 5
+
+    metadata = pd.DataFrame({
+        'building_id': np.arange(buildings),
+        'site_id': rng.integers(0, SITES, buildings),
+        'building_type': rng.choice(BUILDING_TYPES, buildings)
+    })
+    site_temperature = (
+        12 + rng.normal(0, 5, (SITES, 1))
+        + 7 * np.sin(2 * np.pi * (hour - 9) / 24)
+        + rng.normal(0, 1, (SITES, hours)).cumsum(axis=1) * 0.2
+    )
+    type_weekend = {name: rng.uniform(0.4, 1.0) for name in BUILDING_TYPES}
+
+    frames = []
+    for building in metadata.itertuples():
+        temperature = site_temperature[building.site_id]
+        occupancy = np.where(weekend, type_weekend[building.building_type], 1.0) \
+            * (1 + rng.uniform(0.2, 0.8) * ((hour >= 8) & (hour < 18)))
+        readings = rng.lognormal(4, 1) * occupancy * (1 + 0.015 * np.abs(temperature - 18)) \
+            * rng.normal(1, 0.08, hours)
+        frames.append(pd.DataFrame({
+            'timestamp': timestamps,
+            'building_id': building.building_id,
+            'meter_reading': readings,
+            'air_temperature': temperature
+        }))
+    return pd.concat(frames, ignore_index=True), metadata
+
+def mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    nonzero = actual != 0
+    return float(np.mean(np.abs((actual[nonzero] - predicted[nonzero]) / actual[nonzero])))
+
+def per_building(backend: str, train: pd.DataFrame, building_ids, holdout: int) -> pd.DataFrame:
+    forecasts = {}
+    for building_id in building_ids:
+        forecaster = create_forecaster(backend)
+        forecaster.fit(train, building_id=building_id)
+        forecasts[building_id] = [point['predicted_kwh'] for point in forecaster.forecast(periods=holdout)['forecast']]
+    return pd.DataFrame(forecasts)
+
+def main():
+    buildings = int(sys.argv[1]) if len(sys.argv) > 1 else 1400
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    holdout = int(sys.argv[3]) if len(sys.argv) > 3 else 24
+    logging.getLogger('energy_forecaster').setLevel(logging.WARNING)
+    logging.getLogger('hierarchical_forecaster').setLevel(logging.WARNING)
+    logging.getLogger('cmdstanpy').disabled = True
+
+    df, metadata = synthetic_campus(buildings, days * 24 + holdout)
+    cutoff = df['timestamp'].max() - pd.Timedelta(hours=holdout)
+    train, test = df[df['timestamp'] <= cutoff], df[df['timestamp'] > cutoff]
+    actual = test.pivot(index='timestamp', columns='building_id', values='meter_reading')
+    campus_actual = actual.sum(axis=1).to_numpy()
+
+    print(f"synthetic campus: {buildings:,} buildings, {SITES} sites, {len(BUILDING_TYPES)} types, "
+          f"{days} days of history, {holdout}h holdout")
+    print(f"{'approach':<26} {'seconds':>9} {'campus MAPE':>12} {'building MAPE':>14} {'coherence err':>14}")
+
+    start = time.perf_counter()
+    loop = per_building('fourier_ridge', train, actual.columns, holdout)
+    elapsed = time.perf_counter() - start
+    building_mape = np.median([mape(actual[b].to_numpy(), loop[b].to_numpy()) for b in actual.columns])
+    print(f"{'per-building ridge':<26} {elapsed:>9.2f} {mape(campus_actual, loop.sum(axis=1).to_numpy()):>12.4f} "
+          f"{building_mape:>14.4f} {0.0:>14.2e}")
+
+    if PROPHET_AVAILABLE:
+        sample = list(actual.columns[:PROPHET_SAMPLE])
+        start = time.perf_counter()
+        per_building('prophet', train, sample, holdout)
+        estimate = (time.perf_counter() - start) / len(sample) * buildings
+        print(f"{'per-building prophet':<26} {estimate:>9.0f}  (extrapolated from {len(sample)} buildings)")
+
+    for method in RECONCILIATION_METHODS:
+        start = time.perf_counter()
+        forecaster = HierarchicalForecaster(method=method)
+        forecaster.fit(train, metadata)
+        result = forecaster.forecast(periods=holdout)
+        elapsed = time.perf_counter() - start
+
+        campus = result[result['level'] == 'campus']['predicted_kwh'].to_numpy()
+        by_building = result[result['level'] == 'building_id'] \
+            .pivot(index='timestamp', columns='key', values='predicted_kwh')[actual.columns]
+        coherence = np.abs(campus - by_building.sum(axis=1).to_numpy()).max()
+        building_mape = np.median([mape(actual[b].to_numpy(), by_building[b].to_numpy()) for b in actual.columns])
+        print(f"{'hierarchical ' + method:<26} {elapsed:>9.2f} {mape(campus_actual, campus):>12.4f} "
+              f"{building_mape:>14.4f} {coherence:>14.2e}")
+
+if __name__ == "__main__":
+    main()
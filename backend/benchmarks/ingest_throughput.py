@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: energy reading ingestion throughput (rows/sec), ORM vs COPY loader
+
+Feeds a synthetic cleaned ASHRAE chunk through ASHRAEProcessor's ORM path
+(_insert_energy_batch) and COPY path (_copy_energy_chunk). Each run happens
+inside a transaction that is rolled back, so the database is left untouched.
+
+Usage (from backend/):
+    python -m benchmarks.ingest_throughput [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from ashrae_processor import ASHRAEProcessor, WEATHER_COLUMNS
+
+BENCH_BUILDING_ID = 1_000_000
+
+def synthetic_chunk(rows: int) -> pd.DataFrame:
+    """A cleaned chunk as produced by ASHRAEProcessor._clean_energy_data"""
+    rng = np.random.default_rng(42)
+    buildings = 200
+    hours = rows // buildings + 1
+
+    chunk = pd.DataFrame({
+        'building_id': BENCH_BUILDING_ID + np.arange(rows) % buildings,
+        'meter': 0,
+        'timestamp': pd.Timestamp('2016-01-01') + pd.to_timedelta(np.arange(rows) // buildings % hours, unit='h'),
+        'meter_reading': rng.gamma(2.0, 50.0, rows),
+        'site_id': np.arange(rows) % buildings % 16,
+    })
+    for column in WEATHER_COLUMNS:
+        chunk[column] = rng.normal(15, 5, rows)
+    return chunk
+
+def time_loader(processor: ASHRAEProcessor, loader: str, chunk: pd.DataFrame) -> float:
+    connection = processor.engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection)
+    try:
+        start = time.perf_counter()
+        if loader == "copy":
+            processor._copy_energy_chunk(session, chunk)
+        else:
+            batch_size = 1000
+            for i in range(0, len(chunk), batch_size):
+                processor._insert_energy_batch(session, chunk.iloc[i:i + batch_size])
+            session.flush()
+        return time.perf_counter() - start
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    processor = ASHRAEProcessor()
+    chunk = synthetic_chunk(rows)
+
+    # The ORM path is orders of magnitude slower; time it on a slice
+    runs = {
+        "orm": chunk.head(min(rows, 10_000)),
+        "copy": chunk,
+    }
+
+    print(f"{'loader':<8} {'rows':>10} {'seconds':>10} {'rows/sec':>12}")
+    results = {}
+    for loader, data in runs.items():
+        elapsed = time_loader(processor, loader, data)
+        results[loader] = len(data) / elapsed
+        print(f"{loader:<8} {len(data):>10} {elapsed:>10.2f} {results[loader]:>12,.0f}")
+
+    print(f"\nCOPY speedup: {results['copy'] / results['orm']:.1f}x")
+
+if __name__ == "__main__":
+    main()
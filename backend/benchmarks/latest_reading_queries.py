@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query count and latency of the "latest reading per building" endpoints
+
+Seeds N synthetic buildings inside a transaction that is rolled back at the end,
+then counts the SQL statements issued by the buildings list, campus overview and
+efficiency leaderboard handlers. The count should stay flat as N grows.
+
+Usage (from backend/):
+    python -m benchmarks.latest_reading_queries
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.migrations import run_migrations
+from app.models.database import Building, EnergyReading
+from app.routers import analytics, buildings, energy
+
+BUILDING_COUNTS = [10, 100, 1000]
+READINGS_PER_BUILDING = 24
+
+ENDPOINTS = {
+    "GET /api/buildings/": lambda db: buildings.get_buildings(db=db),
+    "GET /api/energy/campus/overview": lambda db: energy.get_campus_energy_overview(db=db),
+    "GET /api/analytics/efficiency/leaderboard": lambda db: analytics.get_efficiency_leaderboard(db=db),
+}
+
+def seed(db: Session, building_count: int):
+    """Insert synthetic buildings and hourly readings"""
+    id_offset = 1_000_000
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    db.bulk_insert_mappings(Building, [
+        {"id": id_offset + i, "name": f"Bench Building {i}", "building_type": "office", "area_sqft": 10000}
+        for i in range(building_count)
+    ])
+    db.bulk_insert_mappings(EnergyReading, [
+        {
+            "building_id": id_offset + i,
+            "timestamp": now - timedelta(hours=h),
+            "meter_type": 0,
+            "meter_reading": float(100 + h),
+        }
+        for i in range(building_count)
+        for h in range(READINGS_PER_BUILDING)
+    ])
+    db.flush()
+
+async def run_benchmark():
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    print(f"{'endpoint':<45} {'buildings':>10} {'queries':>8} {'ms':>10}")
+
+    for building_count in BUILDING_COUNTS:
+        async with async_engine.connect() as connection:
+            transaction = await connection.begin()
+            db = AsyncSession(bind=connection)
+            try:
+                await db.run_sync(seed, building_count)
+                event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+                for name, handler in ENDPOINTS.items():
+                    statements.clear()
+                    start = time.perf_counter()
+                    await handler(db)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    print(f"{name:<45} {building_count:>10} {len(statements):>8} {elapsed_ms:>10.1f}")
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+                await db.close()
+                await transaction.rollback()
+
+def main():
+    run_migrations()
+
+    # Measure the queries themselves, not the response cache
+    settings.CACHE_ENABLED = False
+
+    asyncio.run(run_benchmark())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Load test: p50/p95/p99 latency of fast requests while slow requests are in flight
+
+Drives a running API with a mix of slow requests (a year of /historical for a
+building) and fast requests (/health and a building's /current reading) at a
+fixed concurrency. With blocking handlers the fast requests queue behind the
+slow ones on the event loop, so their p99 tracks the slow query time; with
+non-blocking handlers it should stay close to the fast requests' own latency.
+
+Start a single worker first so the event loop is shared:
+    uvicorn app.main:app --workers 1
+
+Usage (from backend/):
+    python -m benchmarks.load_test [base_url] [seconds] [concurrency] [slow_fraction]
+"""
+import asyncio
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+BUILDING_IDS = list(range(0, 100))
+
+def slow_request(building_id: int) -> str:
+    return f"/api/energy/buildings/{building_id}/historical?hours=8760"
+
+FAST_REQUESTS = [
+    lambda building_id: "/health",
+    lambda building_id: f"/api/energy/buildings/{building_id}/current",
+]
+
+async def worker(client: httpx.AsyncClient, deadline: float, slow_fraction: float, latencies: dict, errors: dict):
+    while time.perf_counter() < deadline:
+        building_id = random.choice(BUILDING_IDS)
+        if random.random() < slow_fraction:
+            kind, path = "slow", slow_request(building_id)
+        else:
+            kind, path = "fast", random.choice(FAST_REQUESTS)(building_id)
+
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors[kind] += 1
+        except httpx.HTTPError:
+            errors[kind] += 1
+            continue
+        latencies[kind].append(time.perf_counter() - start)
+
+async def run(base_url: str, seconds: float, concurrency: int, slow_fraction: float):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    deadline = time.perf_counter() + seconds
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await asyncio.gather(*[
+            worker(client, deadline, slow_fraction, latencies, errors)
+            for _ in range(concurrency)
+        ])
+
+    print(f"{base_url}: {seconds:.0f}s, concurrency {concurrency}, {slow_fraction:.0%} slow requests\n")
+    print(f"{'kind':<6} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for kind in ("fast", "slow"):
+        values = np.array(latencies[kind]) * 1000
+        if not len(values):
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"{kind:<6} {len(values):>9} {errors[kind]:>7} {len(values) / seconds:>8.1f} "
+              f"{p50:>9.1f} {p95:>9.1f} {p99:>9.1f}")
+
+def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    slow_fraction = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+
+    asyncio.run(run(base_url, seconds, concurrency, slow_fraction))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nightly Prophet refit, cold vs warm-started with cached cross-validation
+
+Simulates nightly retraining of one building with the Prophet backend:
+
+  cold:      first fit (no saved state), cross-validation on the shared pool
+  warm:      refit the next night with one more day of data, started from the
+             previous fit's parameters (its cross-validation refits too)
+  unchanged: refit on the same data window, cross-validation read from the cache
+
+Each run uses a new EnergyForecaster, as separate nightly runs would; the
+state is shared through a temporary state_dir.
+
+Usage (from backend/):
+    python -m benchmarks.prophet_refit [days]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'ml-models'))
+
+from energy_forecaster import PROPHET_AVAILABLE, EnergyForecaster, shutdown_cv_executor
+from benchmarks.forecaster_comparison import synthetic_campus
+
+def timed_fit(df: pd.DataFrame, state_dir: str):
+    forecaster = EnergyForecaster(state_dir=state_dir)
+    start = time.perf_counter()
+    metrics = forecaster.fit(df, building_id=0)
+    return time.perf_counter() - start, metrics
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 59
+    if not PROPHET_AVAILABLE:
+        print("prophet is not installed - nothing to benchmark")
+        return
+    logging.getLogger('energy_forecaster').setLevel(logging.WARNING)
+    logging.getLogger('cmdstanpy').disabled = True
+
+    df = synthetic_campus(1)
+    first_night = df[df['timestamp'] < df['timestamp'].min() + pd.Timedelta(days=days)]
+    second_night = df[df['timestamp'] < df['timestamp'].min() + pd.Timedelta(days=days + 1)]
+
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            runs = [
+                ("cold", first_night),
+                ("warm", second_night),
+                ("unchanged", second_night),
+            ]
+            times = {}
+            print(f"{'run':<10} {'rows':>6} {'seconds':>9} {'MAPE':>7} {'warm start':>11}")
+            for name, data in runs:
+                times[name], metrics = timed_fit(data, state_dir)
+                print(f"{name:<10} {len(data):>6} {times[name]:>9.2f} "
+                      f"{metrics.get('mape', float('nan')):>7.3f} {str(metrics['warm_start']):>11}")
+    finally:
+        shutdown_cv_executor()
+
+    print(f"warm refit: {times['warm'] / times['cold']:.0%} of a cold fit, "
+          f"unchanged data: {times['unchanged'] / times['cold']:.0%}")
+
+if __name__ == "__main__":
+    main()
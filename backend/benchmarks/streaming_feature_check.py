@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Check and benchmark: StreamingFeatureExtractor vs EnergyAnomalyDetector.prepare_features
+
+Streams a synthetic building series (with missing readings and temperatures,
+constant runs, zeros and negative values) through the extractor, saving and
+restoring its state as JSON halfway, and compares every feature value with
+prepare_features on the whole series; the values must be identical, not
+just close.
+
+Then times scoring one new hour both ways: prepare_features over 30 days of
+history (what /api/ml/anomaly-detection needs per call) vs one extractor update.
+
+Usage (from backend/):
+    python -m benchmarks.streaming_feature_check [hours]
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'ml-models'))
+
+from anomaly_detector import EnergyAnomalyDetector
+from streaming_features import StreamingFeatureExtractor
+
+HISTORY_HOURS = 30 * 24
+
+def synthetic_series(hours: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    hour_of_day = np.arange(hours) % 24
+
+    readings = 100 + 40 * np.sin(2 * np.pi * hour_of_day / 24) + rng.normal(0, 10, hours)
+    readings *= rng.choice([1, 1e-3, 1e3], hours, p=[0.9, 0.05, 0.05])
+    readings[rng.choice(hours, hours // 50, replace=False)] = np.nan
+    readings[hours // 5:hours // 5 + 48] = 12.5
+    readings[hours // 3:hours // 3 + 30] = 0
+    readings[hours // 2:hours // 2 + 10] = -3
+
+    temperatures = 12 + 8 * np.sin(2 * np.pi * np.arange(hours) / (24 * 365)) + rng.normal(0, 3, hours)
+    temperatures[rng.choice(hours, hours // 20, replace=False)] = np.nan
+    temperatures[hours // 4:hours // 4 + 200] = np.nan
+
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=hours, freq='h'),
+        'building_id': 1,
+        'meter_reading': readings,
+        'air_temperature': temperatures,
+        'wind_speed': rng.gamma(2, 2, hours),
+        'cloud_coverage': np.where(rng.random(hours) < 0.3, np.nan, rng.integers(0, 9, hours)),
+    })
+
+def main():
+    hours = int(sys.argv[1]) if len(sys.argv) > 1 else 24 * 365
+    df = synthetic_series(hours)
+    records = df.to_dict('records')
+
+    detector = EnergyAnomalyDetector()
+    batch = detector.prepare_features(df).reset_index(drop=True)
+
+    extractor = StreamingFeatureExtractor(building_id=1)
+    rows = []
+    for i, record in enumerate(records):
+        if i == len(records) // 2:
+            extractor = StreamingFeatureExtractor.from_dict(json.loads(json.dumps(extractor.to_dict())))
+        rows.append(extractor.update(record))
+    streamed = pd.DataFrame(rows)
+
+    mismatches = {}
+    for name in detector.feature_names:
+        expected = batch[name].to_numpy(dtype=np.float64)
+        actual = streamed[name].to_numpy(dtype=np.float64)
+        differs = ~((expected == actual) | (np.isnan(expected) & np.isnan(actual)))
+        if differs.any():
+            mismatches[name] = int(differs.sum())
+
+    print(f"rows: {len(df):,}, features: {len(detector.feature_names)}")
+    print(f"mismatched values: {sum(mismatches.values())} {mismatches if mismatches else ''}")
+
+    # Per new reading: batch features over the trailing 30 days vs one streaming update
+    samples = min(200, len(df) - HISTORY_HOURS)
+    if samples <= 0:
+        return
+
+    start = time.perf_counter()
+    for end in range(len(df) - samples, len(df)):
+        detector.prepare_features(df.iloc[end - HISTORY_HOURS:end + 1])
+    batch_time = (time.perf_counter() - start) / samples
+
+    extractor = StreamingFeatureExtractor(building_id=1)
+    extractor.update_many(records[:len(df) - samples])
+    start = time.perf_counter()
+    for record in records[len(df) - samples:]:
+        extractor.update(record)
+    stream_time = (time.perf_counter() - start) / samples
+
+    print(f"features per new reading, batch over 30 days: {batch_time * 1000:8.3f} ms")
+    print(f"features per new reading, streaming update:   {stream_time * 1000:8.3f} ms")
+    print(f"speedup: {batch_time / max(stream_time, 1e-9):.0f}x, state size: "
+          f"{len(json.dumps(extractor.to_dict())):,} bytes as JSON")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Alembic environment for the GreenPulse schema
+
+Run from backend/:
+    alembic upgrade head
+    alembic revision --autogenerate -m "describe change"
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.core.config import settings
+from app.core.database import Base
+
+# The ingestion scripts register the models as backend.app.models.database on
+# the same Base; importing them again under app.models would define every
+# table twice, so only import when nothing is registered yet
+if not Base.metadata.tables:
+    import app.models.database  # noqa: F401  (registers models on Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Indexes managed by hand in migrations (e.g. partial indexes with a rolling
+# cutoff) that autogenerate should not try to drop
+UNMANAGED_INDEXES = {"ix_energy_readings_recent"}
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "index" and name in UNMANAGED_INDEXES:
+        return False
+    return True
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL to stdout without a database connection"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations against the configured database"""
+    connection = config.attributes.get("connection")
+
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    connectable = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        _run_with_connection(connection)
+
+def _run_with_connection(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,180 @@
+"""baseline schema
+
+Mirrors the tables previously created by Base.metadata.create_all. Databases
+bootstrapped that way are stamped at this revision instead of re-running it
+(see app.core.migrations.run_migrations).
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'campuses',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(255), nullable=False),
+        sa.Column('location', sa.String(255)),
+        sa.Column('timezone', sa.String(50)),
+        sa.Column('total_area_sqft', sa.Integer()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_campuses_id', 'campuses', ['id'])
+
+    op.create_table(
+        'buildings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('campus_id', sa.Integer()),
+        sa.Column('name', sa.String(255), nullable=False),
+        sa.Column('building_type', sa.String(100)),
+        sa.Column('area_sqft', sa.Integer()),
+        sa.Column('floors', sa.Integer()),
+        sa.Column('year_built', sa.Integer()),
+        sa.Column('site_id', sa.Integer()),
+        sa.Column('primary_use', sa.String(100)),
+        sa.Column('baseline_consumption_kwh', sa.Float()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_buildings_id', 'buildings', ['id'])
+
+    op.create_table(
+        'energy_readings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('building_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('meter_type', sa.Integer()),
+        sa.Column('meter_reading', sa.Float()),
+        sa.Column('air_temperature', sa.Float()),
+        sa.Column('cloud_coverage', sa.Float()),
+        sa.Column('dew_temperature', sa.Float()),
+        sa.Column('precip_depth_1_hr', sa.Float()),
+        sa.Column('sea_level_pressure', sa.Float()),
+        sa.Column('wind_direction', sa.Float()),
+        sa.Column('wind_speed', sa.Float()),
+        sa.Column('total_energy_btu', sa.Float()),
+        sa.Column('cost_usd', sa.Float()),
+        sa.Column('carbon_emissions_lbs', sa.Float()),
+        sa.Column('efficiency_score', sa.Float()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_energy_readings_id', 'energy_readings', ['id'])
+    op.create_index('ix_energy_readings_building_id', 'energy_readings', ['building_id'])
+    op.create_index('ix_energy_readings_timestamp', 'energy_readings', ['timestamp'])
+
+    op.create_table(
+        'departments',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('campus_id', sa.Integer()),
+        sa.Column('name', sa.String(255), nullable=False),
+        sa.Column('building_ids', postgresql.ARRAY(sa.Integer())),
+        sa.Column('energy_budget_annual', sa.Float()),
+        sa.Column('reduction_target_percent', sa.Float()),
+        sa.Column('current_score', sa.Integer()),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_departments_id', 'departments', ['id'])
+
+    op.create_table(
+        'ml_models',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('model_name', sa.String(255), nullable=False),
+        sa.Column('model_type', sa.String(100)),
+        sa.Column('building_id', sa.Integer()),
+        sa.Column('model_version', sa.String(50)),
+        sa.Column('model_parameters', sa.JSON()),
+        sa.Column('accuracy_score', sa.Float()),
+        sa.Column('status', sa.String(50)),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_ml_models_id', 'ml_models', ['id'])
+
+    op.create_table(
+        'anomalies',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('building_id', sa.Integer(), nullable=False),
+        sa.Column('model_id', sa.Integer()),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('anomaly_score', sa.Float(), nullable=False),
+        sa.Column('anomaly_type', sa.String(100)),
+        sa.Column('energy_value', sa.Float()),
+        sa.Column('expected_value', sa.Float()),
+        sa.Column('deviation_percent', sa.Float()),
+        sa.Column('severity', sa.String(20)),
+        sa.Column('status', sa.String(50)),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_anomalies_id', 'anomalies', ['id'])
+    op.create_index('ix_anomalies_building_id', 'anomalies', ['building_id'])
+
+    op.create_table(
+        'insights',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('building_id', sa.Integer(), nullable=False),
+        sa.Column('insight_type', sa.String(100)),
+        sa.Column('priority', sa.Float(), nullable=False),
+        sa.Column('title', sa.String(255), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('recommendation', sa.Text()),
+        sa.Column('potential_savings_usd', sa.Float()),
+        sa.Column('potential_savings_kwh', sa.Float()),
+        sa.Column('confidence_score', sa.Float()),
+        sa.Column('actionable_steps', sa.JSON()),
+        sa.Column('category', sa.String(100)),
+        sa.Column('status', sa.String(50)),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_insights_id', 'insights', ['id'])
+    op.create_index('ix_insights_building_id', 'insights', ['building_id'])
+
+    op.create_table(
+        'challenges',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('title', sa.String(255), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('challenge_type', sa.String(100)),
+        sa.Column('target_value', sa.Float()),
+        sa.Column('points_reward', sa.Integer()),
+        sa.Column('start_date', sa.DateTime()),
+        sa.Column('end_date', sa.DateTime()),
+        sa.Column('status', sa.String(50)),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index('ix_challenges_id', 'challenges', ['id'])
+
+    op.create_table(
+        'user_actions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(255)),
+        sa.Column('building_id', sa.Integer()),
+        sa.Column('action_type', sa.String(100)),
+        sa.Column('description', sa.Text()),
+        sa.Column('points_earned', sa.Integer()),
+        sa.Column('challenge_id', sa.Integer()),
+        sa.Column('timestamp', sa.DateTime(), server_default=sa.func.now()),
+        sa.Column('energy_savings_kwh', sa.Float()),
+        sa.Column('cost_savings_usd', sa.Float()),
+    )
+    op.create_index('ix_user_actions_id', 'user_actions', ['id'])
+
+
+def downgrade() -> None:
+    for table in [
+        'user_actions', 'challenges', 'insights', 'anomalies',
+        'ml_models', 'departments', 'energy_readings', 'buildings', 'campuses'
+    ]:
+        op.drop_table(table)
@@ -0,0 +1,65 @@
+"""energy_readings composite, covering and partial indexes
+
+- uq_energy_readings_building_meter_ts: unique (building_id, meter_type, timestamp);
+  doubles as the composite index for building + meter + time range queries
+- ix_energy_readings_building_latest: (building_id, timestamp DESC) covering index
+  for latest-reading lookups and building + time range queries without meter_type
+- ix_energy_readings_recent: partial index over the last RECENT_INDEX_DAYS days
+- drops ix_energy_readings_building_id, a redundant prefix of the indexes above
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migrations import RECENT_INDEX_NAME, recent_index_cutoff, recent_index_sql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicate (building_id, meter_type, timestamp) rows from repeated loads
+    # would violate the unique index; keep the first inserted copy
+    op.execute("""
+        DELETE FROM energy_readings a
+        USING energy_readings b
+        WHERE a.building_id = b.building_id
+          AND a.meter_type = b.meter_type
+          AND a.timestamp = b.timestamp
+          AND a.id > b.id
+    """)
+
+    op.create_index(
+        'uq_energy_readings_building_meter_ts',
+        'energy_readings',
+        ['building_id', 'meter_type', 'timestamp'],
+        unique=True,
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_energy_readings_building_latest',
+        'energy_readings',
+        ['building_id', sa.text('timestamp DESC')],
+        postgresql_include=['meter_reading', 'meter_type'],
+        if_not_exists=True
+    )
+    op.execute(recent_index_sql(RECENT_INDEX_NAME, recent_index_cutoff()))
+
+    op.drop_index('ix_energy_readings_building_id', table_name='energy_readings', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_energy_readings_building_id', 'energy_readings', ['building_id'])
+    op.drop_index(RECENT_INDEX_NAME, table_name='energy_readings')
+    op.drop_index('ix_energy_readings_building_latest', table_name='energy_readings')
+    op.drop_index('uq_energy_readings_building_meter_ts', table_name='energy_readings')
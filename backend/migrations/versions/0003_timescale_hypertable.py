@@ -0,0 +1,90 @@
+"""energy_readings hypertable with hourly and daily continuous aggregates
+
+Skipped entirely when the timescaledb extension is not installed on the
+server; app.services.rollups then aggregates raw readings instead.
+
+The primary key becomes (id, timestamp) because TimescaleDB requires every
+unique index on a hypertable to include the partitioning column. The partial
+recent-readings index is dropped: chunk exclusion covers the same queries.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.migrations import RECENT_INDEX_NAME
+from app.core.timescale import CHUNK_TIME_INTERVAL, ROLLUP_VIEWS, timescale_installable
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_DEFINITIONS = {
+    'hour': ('1 hour', "INTERVAL '3 days'", "INTERVAL '1 hour'", "INTERVAL '30 minutes'"),
+    'day': ('1 day', "INTERVAL '7 days'", "INTERVAL '1 day'", "INTERVAL '6 hours'"),
+}
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql and not timescale_installable(op.get_bind()):
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+
+    op.execute("ALTER TABLE energy_readings DROP CONSTRAINT IF EXISTS energy_readings_pkey")
+    op.execute("ALTER TABLE energy_readings ADD PRIMARY KEY (id, timestamp)")
+    op.drop_index(RECENT_INDEX_NAME, table_name='energy_readings', if_exists=True)
+
+    op.execute(f"""
+        SELECT create_hypertable(
+            'energy_readings', 'timestamp',
+            chunk_time_interval => INTERVAL '{CHUNK_TIME_INTERVAL}',
+            migrate_data => true,
+            if_not_exists => true
+        )
+    """)
+
+    for resolution, (bucket, start_offset, end_offset, schedule) in ROLLUP_DEFINITIONS.items():
+        view = ROLLUP_VIEWS[resolution]
+        op.execute(f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT
+                building_id,
+                meter_type,
+                time_bucket(INTERVAL '{bucket}', timestamp) AS bucket,
+                SUM(meter_reading) AS total_reading,
+                AVG(meter_reading) AS avg_reading,
+                MIN(meter_reading) AS min_reading,
+                MAX(meter_reading) AS max_reading,
+                COUNT(meter_reading) AS reading_count,
+                SUM(cost_usd) AS total_cost_usd,
+                SUM(carbon_emissions_lbs) AS total_carbon_emissions_lbs,
+                AVG(air_temperature) AS avg_air_temperature
+            FROM energy_readings
+            GROUP BY building_id, meter_type, bucket
+            WITH NO DATA
+        """)
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{view}_building_bucket ON {view} (building_id, bucket DESC)")
+        op.execute(f"""
+            SELECT add_continuous_aggregate_policy(
+                '{view}',
+                start_offset => {start_offset},
+                end_offset => {end_offset},
+                schedule_interval => {schedule},
+                if_not_exists => true
+            )
+        """)
+
+
+def downgrade() -> None:
+    # A hypertable cannot be converted back in place; only the rollups are removed
+    for view in ROLLUP_VIEWS.values():
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
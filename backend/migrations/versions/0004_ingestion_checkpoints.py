@@ -0,0 +1,36 @@
+"""ingestion checkpoints for resumable ASHRAE loads
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-22 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_checkpoints',
+        sa.Column('source', sa.String(255), primary_key=True),
+        sa.Column('file_size', sa.BigInteger()),
+        sa.Column('file_offset', sa.BigInteger(), nullable=False),
+        sa.Column('chunk_number', sa.Integer(), nullable=False),
+        sa.Column('rows_read', sa.BigInteger()),
+        sa.Column('rows_loaded', sa.BigInteger()),
+        sa.Column('status', sa.String(50)),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingestion_checkpoints')
@@ -0,0 +1,33 @@
+"""ml_models meter_type and registry lookup index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-01-24 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NULL meter_type means the model was trained on all of the building's meters
+    op.add_column('ml_models', sa.Column('meter_type', sa.Integer()))
+    op.create_index(
+        'ix_ml_models_registry_lookup',
+        'ml_models',
+        ['model_type', 'building_id', 'meter_type', 'status'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ml_models_registry_lookup', table_name='ml_models')
+    op.drop_column('ml_models', 'meter_type')
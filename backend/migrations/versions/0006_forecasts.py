@@ -0,0 +1,40 @@
+"""forecasts store
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-02-03 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Primary key matches energy_readings' unique (building_id, meter_type, timestamp)
+    # index, so forecast-vs-actual joins are index lookups on both sides
+    op.create_table(
+        'forecasts',
+        sa.Column('building_id', sa.Integer(), primary_key=True),
+        sa.Column('meter_type', sa.Integer(), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(), primary_key=True),
+        sa.Column('issued_at', sa.DateTime(), nullable=False),
+        sa.Column('horizon_hours', sa.Integer(), nullable=False),
+        sa.Column('predicted_kwh', sa.Float(), nullable=False),
+        sa.Column('confidence_lower', sa.Float()),
+        sa.Column('confidence_upper', sa.Float()),
+        sa.Column('backend', sa.String(50)),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('forecasts')
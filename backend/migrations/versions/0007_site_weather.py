@@ -0,0 +1,64 @@
+"""site weather table
+
+Weather is per site and hour, but energy_readings repeats seven weather
+floats on every reading of every building at the site. site_weather holds
+each (site_id, timestamp) once; ingestion loads it from weather_train.csv
+(observed) and weather_test.csv (forecast feed), and it is backfilled here
+from the readings already loaded.
+
+Dropping the weather columns from energy_readings is a follow-up revision,
+once the readers that still use them (forecast and training histories, the
+rollups' avg_air_temperature, the ML feature queries) join site_weather
+through buildings.site_id instead. Until then ingestion keeps writing them
+unless settings.STORE_READING_WEATHER is turned off.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-02-10 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WEATHER_COLUMNS = [
+    'air_temperature', 'cloud_coverage', 'dew_temperature', 'precip_depth_1_hr',
+    'sea_level_pressure', 'wind_direction', 'wind_speed'
+]
+
+
+def upgrade() -> None:
+    # Primary key serves the covariate lookups: one site, a range of hours
+    op.create_table(
+        'site_weather',
+        sa.Column('site_id', sa.Integer(), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(), primary_key=True),
+        *[sa.Column(column, sa.Float()) for column in WEATHER_COLUMNS],
+        sa.Column('source', sa.String(20), server_default='observed'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    columns = ', '.join(WEATHER_COLUMNS)
+    op.execute(f"""
+        INSERT INTO site_weather (site_id, timestamp, {columns})
+        SELECT DISTINCT ON (b.site_id, r.timestamp)
+               b.site_id, r.timestamp, {', '.join(f'r.{column}' for column in WEATHER_COLUMNS)}
+        FROM energy_readings r
+        JOIN buildings b ON b.id = r.building_id
+        WHERE b.site_id IS NOT NULL
+        AND num_nonnulls({', '.join(f'r.{column}' for column in WEATHER_COLUMNS)}) > 0
+        ORDER BY b.site_id, r.timestamp
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('site_weather')
@@ -5,4 +5,4 @@ CREATE EXTENSION IF NOT EXISTS timescaledb;
 -- CREATE USER greenpulse WITH PASSWORD 'password';
 -- GRANT ALL PRIVILEGES ON DATABASE greenpulse TO greenpulse;
 
--- Database initialization will be handled by SQLAlchemy models
\ No newline at end of file
+-- Schema is created by Alembic migrations (backend/migrations) on API startup
\ No newline at end of file
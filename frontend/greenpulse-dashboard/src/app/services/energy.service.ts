@@ -34,6 +34,18 @@ export interface EnergyData {
   };
 }
 
+// Parallel-array payload returned by /historical?format=columnar
+export interface ColumnarEnergyData {
+  building_id: number;
+  readings: {
+    timestamp: number[];  // epoch seconds
+    meter_reading: number[];
+    meter_type: number[];
+    air_temperature: (number | null)[];
+  };
+  summary: EnergyData['summary'];
+}
+
 export interface Anomaly {
   id: string;
   timestamp: string;
@@ -122,9 +134,30 @@ export class EnergyService {
     return this.http.get<any>(`${this.apiUrl}/energy/buildings/${buildingId}/current`);
   }
 
-  getHistoricalEnergy(buildingId: number, hours: number = 24): Observable<EnergyData> {
-    const params = new HttpParams().set('hours', hours.toString());
-    return this.http.get<EnergyData>(`${this.apiUrl}/energy/buildings/${buildingId}/historical`, { params });
+  getHistoricalEnergy(buildingId: number, hours: number = 24, points: number = this.chartPointBudget()): Observable<EnergyData> {
+    // Ask the API for only as many points as the chart can draw, as parallel arrays
+    const params = new HttpParams()
+      .set('hours', hours.toString())
+      .set('resolution', points.toString())
+      .set('format', 'columnar');
+    return this.http.get<ColumnarEnergyData>(`${this.apiUrl}/energy/buildings/${buildingId}/historical`, { params }).pipe(
+      map(data => ({
+        building_id: data.building_id,
+        readings: data.readings.timestamp.map((ts, i) => ({
+          // Server timestamps are naive; keep them naive like the row format
+          timestamp: new Date(ts * 1000).toISOString().slice(0, 19),
+          meter_reading: data.readings.meter_reading[i],
+          meter_type: data.readings.meter_type[i],
+          air_temperature: data.readings.air_temperature[i] ?? undefined
+        })),
+        summary: data.summary
+      }))
+    );
+  }
+
+  // One point per horizontal pixel of the chart, within the API's limits
+  private chartPointBudget(): number {
+    return Math.min(Math.max(Math.round(window.innerWidth), 100), 2000);
   }
 
   getBuildingAnomalies(buildingId: number): Observable<{ anomalies: Anomaly[], anomaly_count: number }> {
@@ -1,55 +1,82 @@
 import numpy as np
 import pandas as pd
-from prophet import Prophet
-from prophet.plot import plot_plotly, plot_components_plotly
-from prophet.diagnostics import cross_validation, performance_metrics
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import warnings
+from abc import ABC, abstractmethod
 warnings.filterwarnings('ignore')
 
+try:
+    from prophet import Prophet
+    from prophet.plot import plot_plotly, plot_components_plotly
+    from prophet.diagnostics import cross_validation, performance_metrics
+    PROPHET_AVAILABLE = True
+except ImportError:
+    PROPHET_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class EnergyForecaster:
-    def __init__(self, 
-                 seasonality_mode: str = 'multiplicative',
-                 changepoint_prior_scale: float = 0.05,
-                 seasonality_prior_scale: float = 0.1):
-        """
-        Initialize the energy forecaster using Prophet
-        
-        Args:
-            seasonality_mode: 'additive' or 'multiplicative'
-            changepoint_prior_scale: Controls flexibility of trend changes
-            seasonality_prior_scale: Controls flexibility of seasonality
-        """
-        self.model = Prophet(
-            daily_seasonality=True,
-            weekly_seasonality=True,
-            yearly_seasonality=False,  # Usually not enough data for yearly
-            seasonality_mode=seasonality_mode,
-            changepoint_prior_scale=changepoint_prior_scale,
-            seasonality_prior_scale=seasonality_prior_scale,
-            holidays_prior_scale=0.1,
-            interval_width=0.95
+# Process pool shared by every Prophet cross-validation in this process
+_cv_pool: Optional[ProcessPoolExecutor] = None
+
+# Warm-start parameters and cross-validation results by state key (see EnergyForecaster._state_key)
+_forecast_states: Dict[str, Dict] = {}
+
+def get_cv_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Long-lived pool for Prophet cross-validation cutoffs
+    
+    Created on first use; max_workers only applies to that first call.
+    """
+    global _cv_pool
+    if _cv_pool is None:
+        _cv_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
         )
-        
+    return _cv_pool
+
+def shutdown_cv_executor():
+    global _cv_pool
+    if _cv_pool is not None:
+        _cv_pool.shutdown(wait=True)
+        _cv_pool = None
+
+class BaseForecaster(ABC):
+    """
+    Interface shared by the forecasting backends
+    
+    Backends implement fit(df, building_id) and forecast(periods, freq) on top
+    of prepare_data, and build their results with _forecast_result so every
+    backend returns the same schema; pick one with create_forecaster.
+    """
+    backend = None
+    
+    def __init__(self):
         self.is_fitted = False
         self.model_metrics = {}
         self.building_id = None
-        
+        self.future_weather = None
+    
     def prepare_data(self, df: pd.DataFrame, building_id: Optional[int] = None) -> pd.DataFrame:
         """
-        Prepare data for Prophet forecasting
+        Prepare readings for any forecasting backend
         
         Args:
             df: DataFrame with energy readings
             building_id: Optional building ID to filter data
             
         Returns:
-            DataFrame formatted for Prophet (ds, y columns)
+            DataFrame with ds, y and regressor columns (is_weekend, temperature
+            when air_temperature is given)
         """
         logger.info("🔧 Preparing data for energy forecasting...")
         
@@ -73,11 +100,12 @@ class EnergyForecaster:
         # Handle missing values
         prophet_df['y'] = prophet_df['y'].fillna(prophet_df['y'].median())
         
-        # Add external regressors if available
-        if 'air_temperature' in df.columns:
+        # Add external regressors if available; a regressor with no values at
+        # all (e.g. no weather for the building's site) is left out, never the rows
+        if 'air_temperature' in df.columns and df['air_temperature'].notna().any():
             temp_data = df.set_index('timestamp')['air_temperature'].reindex(
                 prophet_df.set_index('ds').index
-            ).fillna(method='forward').fillna(method='backward')
+            ).ffill().bfill()
             prophet_df['temperature'] = temp_data.values
             
         if 'is_weekend' in df.columns or 'day_of_week' in df.columns:
@@ -97,7 +125,143 @@ class EnergyForecaster:
         
         logger.info(f"📊 Prepared {len(prophet_df)} data points for forecasting")
         
-        return prophet_df.dropna()
+        return prophet_df.dropna(subset=['ds', 'y'])
+    
+    @abstractmethod
+    def fit(self, df: pd.DataFrame, building_id: Optional[int] = None) -> Dict[str, float]:
+        """Train on a building's readings and return validation metrics"""
+    
+    @abstractmethod
+    def forecast(self, periods: int = 24, freq: str = 'H') -> Dict[str, any]:
+        """Forecast the periods after the training data (see _forecast_result)"""
+    
+    @abstractmethod
+    def _model_info(self) -> Dict[str, any]:
+        """Backend description included in every forecast result"""
+    
+    def set_future_weather(self, temperatures: Optional[pd.Series]):
+        """
+        Temperatures for the forecast periods, indexed by timestamp (e.g. the
+        building's site weather); periods it does not cover use the backend's
+        estimate from the recent hour-of-day profile
+        """
+        self.future_weather = temperatures
+    
+    def _with_future_weather(self, ds: pd.Series, estimate: np.ndarray) -> np.ndarray:
+        """Known future temperatures where available, the estimate elsewhere"""
+        if self.future_weather is None or self.future_weather.empty:
+            return estimate
+        
+        weather = self.future_weather[~self.future_weather.index.duplicated()]
+        known = weather.reindex(pd.DatetimeIndex(ds)).to_numpy(dtype=np.float64)
+        return np.where(np.isnan(known), estimate, known)
+    
+    @staticmethod
+    def _recent_temperature_profile(data: pd.DataFrame) -> pd.Series:
+        """Hour-of-day mean temperature over the last week of prepared data"""
+        recent = data[data['ds'] > data['ds'].max() - pd.Timedelta(days=7)]
+        return recent.groupby(recent['ds'].dt.hour)['temperature'].mean()
+    
+    def _forecast_result(self, forecast_data: pd.DataFrame, periods: int, freq: str) -> Dict[str, any]:
+        """
+        Result dictionary for forecast rows with ds, yhat, yhat_lower and yhat_upper columns
+        """
+        # Calculate additional metrics
+        total_predicted = forecast_data['yhat'].sum()
+        confidence_width = (forecast_data['yhat_upper'] - forecast_data['yhat_lower']).mean()
+        trend_analysis = self._analyze_forecast_trend(forecast_data)
+        
+        return {
+            'building_id': self.building_id,
+            'forecast_period': periods,
+            'forecast_frequency': freq,
+            'forecast': [
+                {
+                    'timestamp': row['ds'].isoformat(),
+                    'predicted_kwh': float(row['yhat']),
+                    'confidence_lower': float(row['yhat_lower']),
+                    'confidence_upper': float(row['yhat_upper']),
+                    'confidence_level': 0.95
+                }
+                for _, row in forecast_data.iterrows()
+            ],
+            'summary': {
+                'total_predicted_kwh': float(total_predicted),
+                'average_hourly_kwh': float(total_predicted / periods) if periods > 0 else 0,
+                'confidence_interval_width': float(confidence_width),
+                'trend': trend_analysis,
+                'peak_predicted_hour': forecast_data.loc[forecast_data['yhat'].idxmax(), 'ds'].strftime('%H:%M'),
+                'min_predicted_hour': forecast_data.loc[forecast_data['yhat'].idxmin(), 'ds'].strftime('%H:%M')
+            },
+            'model_info': self._model_info()
+        }
+    
+    def _analyze_forecast_trend(self, forecast_data: pd.DataFrame) -> str:
+        """Analyze the trend in forecast data"""
+        
+        if len(forecast_data) < 2:
+            return "insufficient_data"
+        
+        first_half = forecast_data['yhat'].iloc[:len(forecast_data)//2].mean()
+        second_half = forecast_data['yhat'].iloc[len(forecast_data)//2:].mean()
+        
+        change_percent = ((second_half - first_half) / first_half) * 100 if first_half != 0 else 0
+        
+        if change_percent > 5:
+            return f"increasing ({change_percent:.1f}% higher)"
+        elif change_percent < -5:
+            return f"decreasing ({abs(change_percent):.1f}% lower)"
+        else:
+            return "stable"
+    
+class EnergyForecaster(BaseForecaster):
+    """Prophet backend: Stan fit per building with custom seasonalities and cross-validation"""
+    backend = 'prophet'
+    
+    # Cross-validation window (Prophet cross_validation arguments)
+    cv_initial = '30 days'
+    cv_period = '7 days'
+    cv_horizon = '24 hours'
+    
+    def __init__(self, 
+                 seasonality_mode: str = 'multiplicative',
+                 changepoint_prior_scale: float = 0.05,
+                 seasonality_prior_scale: float = 0.1,
+                 state_dir: Optional[str] = None,
+                 cv_executor: Optional[ProcessPoolExecutor] = None):
+        """
+        Initialize the energy forecaster using Prophet
+        
+        Args:
+            seasonality_mode: 'additive' or 'multiplicative'
+            changepoint_prior_scale: Controls flexibility of trend changes
+            seasonality_prior_scale: Controls flexibility of seasonality
+            state_dir: Directory persisting warm-start parameters and cross-validation
+                results between processes (in-process only when None)
+            cv_executor: Pool for cross-validation cutoffs (default: get_cv_executor())
+        """
+        if not PROPHET_AVAILABLE:
+            raise ImportError("prophet is not installed; use another backend via create_forecaster")
+        
+        super().__init__()
+        self.seasonality_mode = seasonality_mode
+        self.changepoint_prior_scale = changepoint_prior_scale
+        self.seasonality_prior_scale = seasonality_prior_scale
+        self.state_dir = state_dir
+        self.cv_executor = cv_executor
+        self.model = self._build_model()
+        
+    def _build_model(self) -> 'Prophet':
+        return Prophet(
+            daily_seasonality=True,
+            weekly_seasonality=True,
+            yearly_seasonality=False,  # Usually not enough data for yearly
+            seasonality_mode=self.seasonality_mode,
+            changepoint_prior_scale=self.changepoint_prior_scale,
+            seasonality_prior_scale=self.seasonality_prior_scale,
+            holidays_prior_scale=0.1,
+            interval_width=0.95
+        )
     
     def add_custom_seasonalities(self):
         """Add custom seasonalities for energy consumption patterns"""
@@ -122,6 +286,11 @@ class EnergyForecaster:
         """
         Train the forecasting model
         
+        A refit of the same building with the same hyperparameters starts the
+        optimiser (and the cross-validation refits) from the previous fit's
+        parameters, and cross-validation is skipped when the data window is
+        unchanged since the last fit.
+        
         Args:
             df: DataFrame with energy readings
             building_id: Optional building ID to filter data
@@ -137,47 +306,142 @@ class EnergyForecaster:
         if len(prophet_data) < 100:
             raise ValueError(f"Insufficient data after preparation: {len(prophet_data)} records")
         
-        # Add regressors
-        if 'temperature' in prophet_data.columns:
-            self.model.add_regressor('temperature', standardize=True)
-            logger.info("🌡️ Added temperature as regressor")
-        
-        if 'is_weekend' in prophet_data.columns:
-            self.model.add_regressor('is_weekend')
-            logger.info("📅 Added weekend indicator as regressor")
+        self._configure_model(prophet_data)
         
         # Add business day indicator for conditional seasonality
         prophet_data['is_business_day'] = (~prophet_data['is_weekend'].astype(bool)).astype(int)
         
-        # Add custom seasonalities
-        try:
-            self.add_custom_seasonalities()
-            logger.info("📈 Added custom seasonalities")
-        except Exception as e:
-            logger.warning(f"Could not add custom seasonalities: {e}")
+        state_key = self._state_key()
+        state = self._load_state(state_key)
+        data_hash = self._data_hash(prophet_data)
         
         # Fit model
         logger.info("🤖 Training Prophet model...")
-        self.model.fit(prophet_data)
+        warm_start = False
+        if state is not None:
+            try:
+                # fit kwargs are kept on the model, so cross-validation refits warm-start too
+                self.model.fit(prophet_data, init={name: np.asarray(value) for name, value in state['params'].items()})
+                warm_start = True
+                logger.info("♻️ Warm-started from the previous fit")
+            except Exception as e:
+                logger.warning(f"Warm start failed, fitting from scratch: {e}")
+                self.model = self._build_model()
+                self._configure_model(prophet_data)
+        if not warm_start:
+            self.model.fit(prophet_data)
         self.is_fitted = True
         
         # Calculate training metrics using cross-validation
-        try:
-            metrics = self._calculate_cv_metrics(prophet_data)
-            self.model_metrics = metrics
+        cv_metrics = None
+        if state is not None and state['data_hash'] == data_hash and state['cv_metrics']:
+            cv_metrics = state['cv_metrics']
+            logger.info("📊 Data window unchanged - reusing cross-validation metrics")
+        else:
+            try:
+                cv_metrics = self._calculate_cv_metrics(prophet_data)
+            except Exception as e:
+                logger.warning(f"Could not calculate cross-validation metrics: {e}")
+        
+        if cv_metrics is not None:
+            self.model_metrics = dict(cv_metrics)
             logger.info("✅ Model training completed!")
-            logger.info(f"📈 Cross-validation metrics: {metrics}")
-        except Exception as e:
-            logger.warning(f"Could not calculate cross-validation metrics: {e}")
+            logger.info(f"📈 Cross-validation metrics: {cv_metrics}")
+        else:
             self.model_metrics = {
                 'training_samples': len(prophet_data),
                 'data_range_days': (prophet_data['ds'].max() - prophet_data['ds'].min()).days,
                 'avg_energy_usage': prophet_data['y'].mean(),
                 'energy_std': prophet_data['y'].std()
             }
+        self.model_metrics['warm_start'] = warm_start
+        
+        self._save_state(state_key, {
+            'data_hash': data_hash,
+            'cv_metrics': cv_metrics,
+            'params': self._stan_params()
+        })
         
         return self.model_metrics
     
+    def _configure_model(self, prophet_data: pd.DataFrame):
+        """Add regressors and custom seasonalities for the prepared data's columns"""
+        # Add regressors
+        if 'temperature' in prophet_data.columns:
+            self.model.add_regressor('temperature', standardize=True)
+            logger.info("🌡️ Added temperature as regressor")
+        
+        if 'is_weekend' in prophet_data.columns:
+            self.model.add_regressor('is_weekend')
+            logger.info("📅 Added weekend indicator as regressor")
+        
+        # Add custom seasonalities
+        try:
+            self.add_custom_seasonalities()
+            logger.info("📈 Added custom seasonalities")
+        except Exception as e:
+            logger.warning(f"Could not add custom seasonalities: {e}")
+    
+    def _state_key(self) -> str:
+        """Building plus a hash of everything that shapes the fit except the data"""
+        hyperparameters = {
+            'seasonality_mode': self.seasonality_mode,
+            'changepoint_prior_scale': self.changepoint_prior_scale,
+            'seasonality_prior_scale': self.seasonality_prior_scale,
+            'regressors': sorted(self.model.extra_regressors),
+            'seasonalities': sorted(self.model.seasonalities),
+            'cv': [self.cv_initial, self.cv_period, self.cv_horizon]
+        }
+        digest = hashlib.sha256(json.dumps(hyperparameters, sort_keys=True).encode()).hexdigest()[:16]
+        building = self.building_id if self.building_id is not None else 'all'
+        return f"prophet_{building}_{digest}"
+    
+    @staticmethod
+    def _data_hash(prophet_data: pd.DataFrame) -> str:
+        return hashlib.sha256(pd.util.hash_pandas_object(prophet_data, index=False).values.tobytes()).hexdigest()
+    
+    def _stan_params(self) -> Dict[str, any]:
+        """Fitted parameters in the shape Prophet's fit(init=...) expects, as JSON-safe values"""
+        params = {name: float(self.model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+        params.update({name: self.model.params[name][0].tolist() for name in ('delta', 'beta')})
+        return params
+    
+    def _state_path(self, state_key: str) -> Optional[str]:
+        return os.path.join(self.state_dir, f"{state_key}.json") if self.state_dir else None
+    
+    def _load_state(self, state_key: str) -> Optional[Dict]:
+        if state_key in _forecast_states:
+            return _forecast_states[state_key]
+        
+        path = self._state_path(state_key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable forecaster state {path}: {e}")
+            return None
+        
+        _forecast_states[state_key] = state
+        return state
+    
+    def _save_state(self, state_key: str, state: Dict):
+        _forecast_states[state_key] = state
+        
+        path = self._state_path(state_key)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            # Write then rename, so concurrent readers never see a partial file
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save forecaster state {path}: {e}")
+    
     def forecast(self, periods: int = 24, freq: str = 'H') -> Dict[str, any]:
         """
         Generate energy consumption forecast
@@ -199,9 +463,7 @@ class EnergyForecaster:
         
         # Add regressor values for future periods
         if 'temperature' in self.model.extra_regressors:
-            # Use seasonal temperature pattern (simplified)
-            future_temps = self._generate_future_temperatures(future, periods)
-            future['temperature'] = future_temps
+            future['temperature'] = self._generate_future_temperatures(future, periods)
         
         if 'is_weekend' in self.model.extra_regressors:
             future['is_weekend'] = (future['ds'].dt.dayofweek >= 5).astype(int)
@@ -216,89 +478,44 @@ class EnergyForecaster:
         # Extract forecast for requested periods
         forecast_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods)
         
-        # Calculate additional metrics
-        total_predicted = forecast_data['yhat'].sum()
-        confidence_width = (forecast_data['yhat_upper'] - forecast_data['yhat_lower']).mean()
-        trend_analysis = self._analyze_forecast_trend(forecast_data)
-        
-        result = {
-            'building_id': self.building_id,
-            'forecast_period': periods,
-            'forecast_frequency': freq,
-            'forecast': [
-                {
-                    'timestamp': row['ds'].isoformat(),
-                    'predicted_kwh': float(row['yhat']),
-                    'confidence_lower': float(row['yhat_lower']),
-                    'confidence_upper': float(row['yhat_upper']),
-                    'confidence_level': 0.95
-                }
-                for _, row in forecast_data.iterrows()
-            ],
-            'summary': {
-                'total_predicted_kwh': float(total_predicted),
-                'average_hourly_kwh': float(total_predicted / periods) if periods > 0 else 0,
-                'confidence_interval_width': float(confidence_width),
-                'trend': trend_analysis,
-                'peak_predicted_hour': forecast_data.loc[forecast_data['yhat'].idxmax(), 'ds'].strftime('%H:%M'),
-                'min_predicted_hour': forecast_data.loc[forecast_data['yhat'].idxmin(), 'ds'].strftime('%H:%M')
-            },
-            'model_info': {
-                'type': 'Prophet',
-                'seasonalities': list(self.model.seasonalities.keys()),
-                'regressors': list(self.model.extra_regressors.keys()),
-                'training_metrics': self.model_metrics
-            }
-        }
+        result = self._forecast_result(forecast_data, periods, freq)
         
-        logger.info(f"✅ Forecast generated: {periods} periods, trend: {trend_analysis}")
+        logger.info(f"✅ Forecast generated: {periods} periods, trend: {result['summary']['trend']}")
         
         return result
     
-    def _generate_future_temperatures(self, future_df: pd.DataFrame, periods: int) -> np.ndarray:
-        """Generate realistic future temperatures based on seasonal patterns"""
-        
-        # Simple seasonal temperature model
-        base_temp = 70  # Base temperature in Fahrenheit
-        
-        # Create seasonal pattern
-        day_of_year = future_df['ds'].dt.dayofyear
-        seasonal_temp = base_temp + 20 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
-        
-        # Add daily variation
-        hour_of_day = future_df['ds'].dt.hour
-        daily_temp = 5 * np.sin(2 * np.pi * (hour_of_day - 6) / 24)
-        
-        # Add some randomness for the future periods
-        future_temps = seasonal_temp + daily_temp
-        if periods > 0:
-            future_temps.iloc[-periods:] += np.random.normal(0, 2, periods)
-        
-        return future_temps.values
+    def _model_info(self) -> Dict[str, any]:
+        return {
+            'type': 'Prophet',
+            'seasonalities': list(self.model.seasonalities.keys()),
+            'regressors': list(self.model.extra_regressors.keys()),
+            'training_metrics': self.model_metrics
+        }
     
-    def _analyze_forecast_trend(self, forecast_data: pd.DataFrame) -> str:
-        """Analyze the trend in forecast data"""
-        
-        if len(forecast_data) < 2:
-            return "insufficient_data"
+    def _generate_future_temperatures(self, future_df: pd.DataFrame, periods: int) -> np.ndarray:
+        """
+        Temperatures for the history and future rows of make_future_dataframe
         
-        first_half = forecast_data['yhat'].iloc[:len(forecast_data)//2].mean()
-        second_half = forecast_data['yhat'].iloc[len(forecast_data)//2:].mean()
+        History rows keep the observed temperatures. Future rows take
+        set_future_weather() where it covers them, else the hour-of-day profile
+        of the last training week, so the same inputs give the same forecast.
+        """
+        history = self.model.history
+        observed = history.set_index('ds')['temperature']
+        profile = self._recent_temperature_profile(history)
         
-        change_percent = ((second_half - first_half) / first_half) * 100 if first_half != 0 else 0
+        estimate = future_df['ds'].map(observed)
+        estimate = estimate.fillna(future_df['ds'].dt.hour.map(profile)).fillna(observed.mean())
         
-        if change_percent > 5:
-            return f"increasing ({change_percent:.1f}% higher)"
-        elif change_percent < -5:
-            return f"decreasing ({abs(change_percent):.1f}% lower)"
-        else:
-            return "stable"
+        temperatures = estimate.to_numpy(dtype=np.float64)
+        temperatures[-periods:] = self._with_future_weather(future_df['ds'].iloc[-periods:], temperatures[-periods:])
+        return temperatures
     
     def _calculate_cv_metrics(self, data: pd.DataFrame, 
-                             initial: str = '30 days', 
-                             period: str = '7 days', 
-                             horizon: str = '24 hours') -> Dict[str, float]:
-        """Calculate cross-validation metrics"""
+                             initial: Optional[str] = None, 
+                             period: Optional[str] = None, 
+                             horizon: Optional[str] = None) -> Dict[str, float]:
+        """Calculate cross-validation metrics on the shared executor"""
         
         # Only perform CV if we have enough data
         if len(data) < 100:
@@ -306,13 +523,13 @@ class EnergyForecaster:
         
         logger.info("📊 Performing cross-validation...")
         
-        # Perform cross-validation
+        # Perform cross-validation; cutoffs run on a long-lived pool instead of a new one per fit
         cv_results = cross_validation(
             self.model, 
-            initial=initial, 
-            period=period, 
-            horizon=horizon,
-            parallel='processes'
+            initial=initial or self.cv_initial, 
+            period=period or self.cv_period, 
+            horizon=horizon or self.cv_horizon,
+            parallel=self.cv_executor or get_cv_executor()
         )
         
         # Calculate performance metrics
@@ -356,6 +573,307 @@ class EnergyForecaster:
         
         return components
 
+class FourierRidgeForecaster(BaseForecaster):
+    """
+    NumPy backend: ridge regression on Fourier seasonal terms
+    
+    Models the same structure as the Prophet backend (trend, daily and weekly
+    seasonality, a separate daily shape on weekends, temperature and weekend
+    regressors) as one linear least-squares problem, so a fit takes
+    milliseconds instead of a Stan optimisation. Multiplicative seasonality is
+    approximated by fitting on log1p of the readings.
+    """
+    backend = 'fourier_ridge'
+    
+    def __init__(self,
+                 seasonality_mode: str = 'multiplicative',
+                 daily_order: int = 8,
+                 weekly_order: int = 3,
+                 weekend_order: int = 4,
+                 ridge_alpha: float = 1.0,
+                 backtest_folds: int = 4,
+                 backtest_horizon: int = 24):
+        """
+        Initialize the energy forecaster using Fourier ridge regression
+        
+        Args:
+            seasonality_mode: 'additive' or 'multiplicative'
+            daily_order: Fourier order of the daily seasonality
+            weekly_order: Fourier order of the weekly seasonality
+            weekend_order: Fourier order of the weekend-only daily seasonality
+            ridge_alpha: L2 penalty on every coefficient except the intercept
+            backtest_folds: Rolling-origin folds used for the training metrics
+            backtest_horizon: Hours forecast in each backtest fold
+        """
+        if seasonality_mode not in ('additive', 'multiplicative'):
+            raise ValueError(f"Unknown seasonality mode: {seasonality_mode}")
+        
+        super().__init__()
+        self.seasonality_mode = seasonality_mode
+        self.daily_order = daily_order
+        self.weekly_order = weekly_order
+        self.weekend_order = weekend_order
+        self.ridge_alpha = ridge_alpha
+        self.backtest_folds = backtest_folds
+        self.backtest_horizon = backtest_horizon
+        
+        self.coefficients = None
+        self.residual_std = None
+        self.last_timestamp = None
+        self._start = None
+        self._trend_scale = None
+        self._temperature_stats = None
+        self._temperature_profile = None
+    
+    def fit(self, df: pd.DataFrame, building_id: Optional[int] = None) -> Dict[str, float]:
+        """
+        Train the forecasting model
+        
+        Args:
+            df: DataFrame with energy readings
+            building_id: Optional building ID to filter data
+        
+        Returns:
+            Dictionary with training metrics
+        """
+        logger.info("🚀 Training energy forecasting model...")
+        start = time.perf_counter()
+        
+        data = self.prepare_data(df, building_id)
+        
+        if len(data) < 100:
+            raise ValueError(f"Insufficient data after preparation: {len(data)} records")
+        
+        self._fit_arrays(data)
+        self.is_fitted = True
+        
+        metrics = self._calculate_backtest_metrics(data)
+        metrics['fit_seconds'] = time.perf_counter() - start
+        self.model_metrics = metrics
+        
+        logger.info("✅ Model training completed!")
+        logger.info(f"📈 Backtest metrics: {metrics}")
+        
+        return self.model_metrics
+    
+    def forecast(self, periods: int = 24, freq: str = 'H') -> Dict[str, any]:
+        """
+        Generate energy consumption forecast
+        
+        Args:
+            periods: Number of periods to forecast
+            freq: Frequency of forecast ('H' for hourly, 'D' for daily)
+        
+        Returns:
+            Dictionary with forecast data and metadata
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before making forecasts")
+        
+        logger.info(f"🔮 Generating {periods} period forecast...")
+        
+        forecast_data = self._predict(self._future_frame(periods, freq))
+        
+        result = self._forecast_result(forecast_data, periods, freq)
+        
+        logger.info(f"✅ Forecast generated: {periods} periods, trend: {result['summary']['trend']}")
+        
+        return result
+    
+    def fit_many(self, data: pd.DataFrame, targets: np.ndarray) -> np.ndarray:
+        """
+        Fit one model per column of `targets` (rows aligned with `data`) in a single solve
+        
+        The columns share data's ds, is_weekend and temperature, and so the
+        design matrix; only the right-hand side of the ridge solve grows.
+        Returns the in-sample fitted values. No backtest metrics are computed.
+        """
+        self._fit_arrays(data, targets)
+        self.is_fitted = True
+        return self._inverse_transform(self._design_matrix(data) @ self.coefficients)
+    
+    def forecast_many(self, periods: int = 24, freq: str = 'H') -> Tuple[pd.Series, np.ndarray]:
+        """Future timestamps and point forecasts (periods x columns) after fit_many"""
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before making forecasts")
+        
+        future = self._future_frame(periods, freq)
+        return future['ds'], self._inverse_transform(self._design_matrix(future) @ self.coefficients)
+    
+    def _future_frame(self, periods: int, freq: str) -> pd.DataFrame:
+        ds = pd.date_range(self.last_timestamp, periods=periods + 1, freq=freq)[1:]
+        future = pd.DataFrame({'ds': ds, 'is_weekend': (ds.dayofweek >= 5).astype(int)})
+        if self._temperature_stats is not None:
+            future['temperature'] = self._generate_future_temperatures(future)
+        return future
+    
+    def _model_info(self) -> Dict[str, any]:
+        seasonalities = ['daily', 'weekly', 'weekend']
+        regressors = ['is_weekend'] + (['temperature'] if self._temperature_stats is not None else [])
+        return {
+            'type': 'FourierRidge',
+            'seasonalities': seasonalities,
+            'regressors': regressors,
+            'training_metrics': self.model_metrics
+        }
+    
+    def _fit_arrays(self, data: pd.DataFrame, targets: Optional[np.ndarray] = None):
+        """
+        Solve the ridge problem for prepared data and keep what forecasting needs
+        
+        targets (rows x columns) replaces data['y'] to fit several series at once.
+        """
+        self._start = data['ds'].min()
+        self._trend_scale = max((data['ds'].max() - self._start) / pd.Timedelta(hours=1), 1.0)
+        self.last_timestamp = data['ds'].max()
+        
+        if 'temperature' in data.columns:
+            temperature = data['temperature'].to_numpy(dtype=np.float64)
+            self._temperature_stats = (temperature.mean(), temperature.std() or 1.0)
+            
+            # Hour-of-day profile of the last week stands in for unknown future weather
+            self._temperature_profile = self._recent_temperature_profile(data)
+        else:
+            self._temperature_stats = None
+            self._temperature_profile = None
+        
+        X = self._design_matrix(data)
+        y = self._transform(data['y'].to_numpy(dtype=np.float64) if targets is None else targets)
+        
+        penalty = np.full(X.shape[1], self.ridge_alpha)
+        penalty[0] = 0.0  # Intercept is not shrunk
+        gram = X.T @ X + np.diag(penalty)
+        self.coefficients = np.linalg.lstsq(gram, X.T @ y, rcond=None)[0]
+        
+        residuals = y - X @ self.coefficients
+        self.residual_std = residuals.std(axis=0) if residuals.ndim > 1 else float(residuals.std())
+    
+    def _design_matrix(self, data: pd.DataFrame) -> np.ndarray:
+        ds = data['ds']
+        hours = (ds.dt.hour + ds.dt.minute / 60).to_numpy(dtype=np.float64)
+        week_hours = ds.dt.dayofweek.to_numpy(dtype=np.float64) * 24 + hours
+        is_weekend = data['is_weekend'].to_numpy(dtype=np.float64)
+        trend = ((ds - self._start) / pd.Timedelta(hours=1)).to_numpy(dtype=np.float64) / self._trend_scale
+        
+        daily = self._fourier(hours / 24, self.daily_order)
+        columns = [
+            np.ones(len(data)),
+            trend,
+            is_weekend,
+            daily,
+            self._fourier(week_hours / 168, self.weekly_order),
+            # Weekend-only daily shape (Prophet's conditional seasonality)
+            daily[:, :2 * self.weekend_order] * is_weekend[:, None]
+        ]
+        
+        if self._temperature_stats is not None:
+            mean, std = self._temperature_stats
+            temperature = (data['temperature'].to_numpy(dtype=np.float64) - mean) / std
+            columns.extend([temperature, temperature ** 2])
+        
+        return np.column_stack(columns)
+    
+    @staticmethod
+    def _fourier(phase: np.ndarray, order: int) -> np.ndarray:
+        angles = 2 * np.pi * phase[:, None] * np.arange(1, order + 1)
+        return np.hstack([np.sin(angles), np.cos(angles)])
+    
+    def _transform(self, y: np.ndarray) -> np.ndarray:
+        if self.seasonality_mode == 'multiplicative':
+            return np.log1p(np.clip(y, 0, None))
+        return y
+    
+    def _inverse_transform(self, y: np.ndarray) -> np.ndarray:
+        if self.seasonality_mode == 'multiplicative':
+            return np.expm1(y)
+        return y
+    
+    def _predict(self, future: pd.DataFrame) -> pd.DataFrame:
+        """ds, yhat, yhat_lower and yhat_upper for rows with ds, is_weekend (and temperature)"""
+        mean = self._design_matrix(future) @ self.coefficients
+        margin = 1.96 * self.residual_std  # 95% interval, as interval_width in the Prophet backend
+        
+        return pd.DataFrame({
+            'ds': future['ds'].to_numpy(),
+            'yhat': self._inverse_transform(mean),
+            'yhat_lower': self._inverse_transform(mean - margin),
+            'yhat_upper': self._inverse_transform(mean + margin)
+        })
+    
+    def _generate_future_temperatures(self, future_df: pd.DataFrame) -> np.ndarray:
+        """Temperatures for future periods: set_future_weather() where known, else the recent hour-of-day profile"""
+        hours = future_df['ds'].dt.hour
+        estimate = hours.map(self._temperature_profile).fillna(self._temperature_stats[0]).to_numpy(dtype=np.float64)
+        return self._with_future_weather(future_df['ds'], estimate)
+    
+    def _calculate_backtest_metrics(self, data: pd.DataFrame) -> Dict[str, float]:
+        """
+        Rolling-origin backtest: refit on the data before each cutoff and forecast
+        the next backtest_horizon hours with their observed regressors, like
+        Prophet's cross_validation. Reports the same keys as the Prophet backend.
+        """
+        fitted = (self.coefficients, self.residual_std, self.last_timestamp, self._start,
+                  self._trend_scale, self._temperature_stats, self._temperature_profile)
+        
+        horizon = pd.Timedelta(hours=self.backtest_horizon)
+        end = data['ds'].max()
+        actuals, predictions = [], []
+        try:
+            for fold in range(self.backtest_folds, 0, -1):
+                cutoff = end - fold * horizon
+                train = data[data['ds'] <= cutoff]
+                test = data[(data['ds'] > cutoff) & (data['ds'] <= cutoff + horizon)]
+                if len(train) < 100 or test.empty:
+                    continue
+                
+                self._fit_arrays(train)
+                predictions.append(self._predict(test))
+                actuals.append(test['y'].to_numpy(dtype=np.float64))
+        finally:
+            (self.coefficients, self.residual_std, self.last_timestamp, self._start,
+             self._trend_scale, self._temperature_stats, self._temperature_profile) = fitted
+        
+        if not predictions:
+            return {
+                'training_samples': len(data),
+                'data_range_days': (data['ds'].max() - data['ds'].min()).days,
+                'avg_energy_usage': data['y'].mean(),
+                'energy_std': data['y'].std()
+            }
+        
+        actual = np.concatenate(actuals)
+        predicted = pd.concat(predictions, ignore_index=True)
+        errors = actual - predicted['yhat'].to_numpy()
+        nonzero = actual != 0
+        
+        return {
+            'mape': float(np.mean(np.abs(errors[nonzero] / actual[nonzero]))) if nonzero.any() else float('nan'),
+            'mae': float(np.mean(np.abs(errors))),
+            'rmse': float(np.sqrt(np.mean(errors ** 2))),
+            'coverage': float(np.mean(
+                (actual >= predicted['yhat_lower'].to_numpy()) & (actual <= predicted['yhat_upper'].to_numpy())
+            )),
+            'cv_folds': len(predictions),
+            'training_samples': len(data)
+        }
+
+# Forecasting backends by name (settings.FORECAST_BACKEND)
+FORECASTER_BACKENDS = {
+    EnergyForecaster.backend: EnergyForecaster,
+    FourierRidgeForecaster.backend: FourierRidgeForecaster,
+}
+
+def create_forecaster(backend: str = FourierRidgeForecaster.backend, **kwargs) -> BaseForecaster:
+    """
+    Create a forecaster for the named backend
+    
+    Raises ValueError for unknown backends and ImportError when the backend's
+    library (prophet) is not installed.
+    """
+    if backend not in FORECASTER_BACKENDS:
+        raise ValueError(f"Unknown forecasting backend: {backend} (available: {', '.join(FORECASTER_BACKENDS)})")
+    return FORECASTER_BACKENDS[backend](**kwargs)
+
 def main():
     """Example usage of the energy forecaster"""
     
@@ -397,7 +915,7 @@ def main():
     })
     
     # Initialize and train forecaster
-    forecaster = EnergyForecaster()
+    forecaster = create_forecaster('prophet' if PROPHET_AVAILABLE else 'fourier_ridge')
     
     # Split data
     train_data = sample_data[:-48]  # All but last 48 hours
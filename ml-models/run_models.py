@@ -1,169 +1,309 @@
 #!/usr/bin/env python3
 """
 GreenPulse ML Models Runner
-Runs anomaly detection and forecasting models for demo
+Runs anomaly detection and forecasting models for every building
+
+Buildings are split into shards and processed in a pool of
+settings.MAX_WORKERS processes. Each shard loads its buildings' readings in
+one bulk query, and each building is fitted, scored and written on its own:
+anomalies are bulk-inserted and committed per building, so a failing
+building is reported and skipped without losing the others' results.
 """
 
 import sys
 import os
+import time
 import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 import logging
+from sqlalchemy import and_, func, select
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.app.core.config import settings
-from backend.app.models.database import EnergyReading, Building, Anomaly
-from backend.app.core.database import SessionLocal
+from backend.app.models.database import EnergyReading, Building, Anomaly, SiteWeather
+from backend.app.core.database import SessionLocal, engine
+from backend.app.services.frames import read_frame, reading_dtypes
 from anomaly_detector import EnergyAnomalyDetector
-from energy_forecaster import EnergyForecaster
+
+from energy_forecaster import FORECASTER_BACKENDS, PROPHET_AVAILABLE, create_forecaster, get_cv_executor
+
+FORECASTING_AVAILABLE = settings.FORECAST_BACKEND in FORECASTER_BACKENDS and (
+    settings.FORECAST_BACKEND != 'prophet' or PROPHET_AVAILABLE
+)
+if not FORECASTING_AVAILABLE:
+    logging.warning(f"Forecasting backend {settings.FORECAST_BACKEND} not available - forecasting skipped")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_building_data(building_id: int, hours: int = 168) -> pd.DataFrame:
-    """Get energy data for a building"""
+ANOMALY_HOURS = 336  # 2 weeks
+FORECAST_HOURS = 720  # 30 days
+MIN_TRAINING_SAMPLES = 100
+MIN_FORECAST_SAMPLES = 168  # Need at least 1 week
+
+# Prophet warm-start parameters and cross-validation results, kept between nightly runs
+FORECAST_STATE_PATH = os.path.join(settings.MODEL_STORAGE_PATH, 'forecasting')
+
+# Shards per worker: small enough to balance slow buildings, large enough to keep queries few
+SHARDS_PER_WORKER = 4
+
+READING_COLUMNS = ['timestamp', 'building_id', 'meter_reading', 'air_temperature', 'meter_type']
+
+def get_building_ids(limit: Optional[int] = None) -> List[int]:
+    """IDs of the buildings to process"""
     session = SessionLocal()
     try:
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=hours)
-        
-        readings = session.query(EnergyReading)\
-            .filter(EnergyReading.building_id == building_id)\
-            .filter(EnergyReading.timestamp >= start_time)\
-            .order_by(EnergyReading.timestamp)\
-            .all()
-        
-        if not readings:
-            return pd.DataFrame()
-        
-        data = []
-        for reading in readings:
-            data.append({
-                'timestamp': reading.timestamp,
-                'building_id': reading.building_id,
-                'meter_reading': reading.meter_reading,
-                'air_temperature': reading.air_temperature,
-                'meter_type': reading.meter_type
-            })
-        
-        return pd.DataFrame(data)
+        query = session.query(Building.id).order_by(Building.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return [building_id for (building_id,) in query.all()]
     finally:
         session.close()
 
-def run_anomaly_detection():
-    """Run anomaly detection for all buildings"""
-    logger.info("🔍 Running anomaly detection...")
+def get_shard_data(session, building_ids: List[int], hours: int) -> pd.DataFrame:
+    """Energy data for a set of buildings in one query, as a long-format frame"""
+    start_time = datetime.now() - timedelta(hours=hours)
     
-    session = SessionLocal()
+    # Site weather (site_weather) where loaded, else the reading's own copy; as
+    # app.services.weather.join_site_weather, on this script's model classes
+    query = select(
+        EnergyReading.timestamp,
+        EnergyReading.building_id,
+        EnergyReading.meter_reading,
+        func.coalesce(SiteWeather.air_temperature, EnergyReading.air_temperature).label('air_temperature'),
+        EnergyReading.meter_type
+    ).outerjoin_from(EnergyReading, Building, Building.id == EnergyReading.building_id)\
+        .outerjoin_from(Building, SiteWeather, and_(
+            SiteWeather.site_id == Building.site_id,
+            SiteWeather.timestamp == EnergyReading.timestamp
+        ))\
+        .where(EnergyReading.building_id.in_(building_ids))\
+        .where(EnergyReading.timestamp >= start_time)\
+        .order_by(EnergyReading.building_id, EnergyReading.timestamp)
+    
+    return read_frame(session, query, reading_dtypes(READING_COLUMNS))
+
+def get_shard_weather(session, building_ids: List[int], data: pd.DataFrame, hours: int) -> Dict[int, pd.Series]:
+    """
+    Site air temperature for each building's `hours` after its last reading,
+    from site_weather in one query per shard
+    """
+    if data.empty:
+        return {}
+    
+    sites = dict(session.execute(
+        select(Building.id, Building.site_id)
+        .where(Building.id.in_(building_ids))
+        .where(Building.site_id.is_not(None))
+    ).all())
+    if not sites:
+        return {}
+    
+    query = select(SiteWeather.site_id, SiteWeather.timestamp, SiteWeather.air_temperature)\
+        .where(SiteWeather.site_id.in_(list(set(sites.values()))))\
+        .where(SiteWeather.timestamp > data['timestamp'].min())\
+        .where(SiteWeather.timestamp <= data['timestamp'].max() + timedelta(hours=hours))\
+        .where(SiteWeather.air_temperature.is_not(None))
+    weather = read_frame(session, query, reading_dtypes(['site_id', 'timestamp', 'air_temperature']))
+    by_site = {site_id: rows.set_index('timestamp')['air_temperature'] for site_id, rows in weather.groupby('site_id')}
+    
+    return {building_id: by_site[site_id] for building_id, site_id in sites.items() if site_id in by_site}
+
+def detect_building_anomalies(session, building_id: int, df: pd.DataFrame) -> int:
+    """Fit on the first 80% of a building's data, score the rest and store the anomalies"""
+    # Split data for training and detection
+    split_point = int(len(df) * 0.8)
+    train_data = df[:split_point]
+    test_data = df[split_point:]
+    
+    if len(train_data) < MIN_TRAINING_SAMPLES:
+        raise ValueError(f"Insufficient training data: {len(train_data)} records")
+    
+    detector = EnergyAnomalyDetector(contamination=0.05)
+    # One core per building; the process pool provides the parallelism
+    detector.model.set_params(n_jobs=1)
+    detector.fit(train_data, building_id=building_id)
+    results = detector.predict(test_data, building_id=building_id)
+    
+    # Save anomalies to database
+    session.bulk_insert_mappings(Anomaly, [
+        {
+            'building_id': building_id,
+            'timestamp': anomaly['timestamp'],
+            'anomaly_score': anomaly['anomaly_score'],
+            'anomaly_type': anomaly['anomaly_type'],
+            'energy_value': anomaly['energy_value'],
+            'expected_value': anomaly['expected_value'],
+            'deviation_percent': anomaly['deviation_percent'],
+            'severity': anomaly['severity']
+        }
+        for anomaly in results['anomalies']
+    ])
+    session.commit()
+    
+    return len(results['anomalies'])
+
+def forecast_building(building_id: int, df: pd.DataFrame, future_weather: Optional[pd.Series] = None) -> float:
+    """24-hour forecast for a building with its site's weather; returns the predicted total"""
+    if len(df) < MIN_FORECAST_SAMPLES:
+        raise ValueError(f"Insufficient data for forecasting: {len(df)} records")
+    
+    options = {'state_dir': FORECAST_STATE_PATH} if settings.FORECAST_BACKEND == 'prophet' else {}
+    forecaster = create_forecaster(settings.FORECAST_BACKEND, **options)
+    forecaster.fit(df, building_id=building_id)
+    forecaster.set_future_weather(future_weather)
+    forecast_results = forecaster.forecast(periods=24)  # 24 hour forecast
+    
+    return forecast_results['summary']['total_predicted_kwh']
+
+def process_building(session, building_id: int, df: pd.DataFrame, forecast: bool,
+                     future_weather: Optional[pd.Series] = None) -> Dict:
+    """Run every model for one building; failures are recorded, not raised"""
+    report = {
+        'building_id': building_id,
+        'rows': len(df),
+        'status': 'ok',
+        'anomalies': None,
+        'predicted_kwh_24h': None,
+        'anomaly_seconds': 0.0,
+        'forecast_seconds': 0.0,
+        'error': None
+    }
+    
+    if df.empty:
+        report['status'] = 'no_data'
+        return report
+    
+    start = time.perf_counter()
     try:
-        buildings = session.query(Building).limit(10).all()  # Process first 10 for demo
-        
-        detector = EnergyAnomalyDetector(contamination=0.05)
-        
-        for building in buildings:
-            logger.info(f"Processing building {building.id}: {building.name}")
-            
-            # Get data
-            df = get_building_data(building.id, hours=336)  # 2 weeks
-            if df.empty:
-                logger.warning(f"No data for building {building.id}")
-                continue
-            
-            # Split data for training and detection
-            split_point = int(len(df) * 0.8)
-            train_data = df[:split_point]
-            test_data = df[split_point:]
-            
-            if len(train_data) < 100:
-                logger.warning(f"Insufficient training data for building {building.id}")
-                continue
-            
-            # Train model
-            try:
-                detector.fit(train_data, building_id=building.id)
-                
-                # Detect anomalies
-                results = detector.predict(test_data, building_id=building.id)
-                
-                # Save anomalies to database
-                for anomaly in results['anomalies']:
-                    db_anomaly = Anomaly(
-                        building_id=building.id,
-                        timestamp=anomaly['timestamp'],
-                        anomaly_score=anomaly['anomaly_score'],
-                        anomaly_type=anomaly['anomaly_type'],
-                        energy_value=anomaly['energy_value'],
-                        expected_value=anomaly['expected_value'],
-                        deviation_percent=anomaly['deviation_percent'],
-                        severity=anomaly['severity']
-                    )
-                    session.add(db_anomaly)
-                
-                logger.info(f"✅ Found {len(results['anomalies'])} anomalies for building {building.id}")
-                
-            except Exception as e:
-                logger.error(f"❌ Error processing building {building.id}: {e}")
-                continue
-        
-        session.commit()
-        logger.info("🎉 Anomaly detection completed!")
-        
+        anomaly_cutoff = datetime.now() - timedelta(hours=ANOMALY_HOURS)
+        report['anomalies'] = detect_building_anomalies(
+            session, building_id, df[df['timestamp'] >= anomaly_cutoff]
+        )
     except Exception as e:
         session.rollback()
-        logger.error(f"❌ Anomaly detection failed: {e}")
-    finally:
-        session.close()
-
-def run_forecasting():
-    """Run energy forecasting for buildings"""
-    logger.info("📈 Running energy forecasting...")
+        report['status'] = 'failed'
+        report['error'] = f"anomaly detection: {e}"
+    report['anomaly_seconds'] = time.perf_counter() - start
     
+    if forecast and FORECASTING_AVAILABLE:
+        start = time.perf_counter()
+        try:
+            report['predicted_kwh_24h'] = forecast_building(building_id, df, future_weather)
+        except Exception as e:
+            report['status'] = 'failed'
+            report['error'] = '; '.join(filter(None, [report['error'], f"forecasting: {e}"]))
+        report['forecast_seconds'] = time.perf_counter() - start
+    
+    return report
+
+def _init_worker(cv_workers: int):
+    # Never reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    # Per-building model logs would drown the progress report
+    logging.getLogger('anomaly_detector').setLevel(logging.WARNING)
+    logging.getLogger('energy_forecaster').setLevel(logging.WARNING)
+    # One cross-validation pool per worker for all its buildings, sized so workers share the cores
+    if settings.FORECAST_BACKEND == 'prophet' and FORECASTING_AVAILABLE:
+        get_cv_executor(max_workers=cv_workers)
+
+def run_shard(building_ids: List[int], forecast: bool = True) -> List[Dict]:
+    """Process pool entry point: load and process a shard of buildings"""
     session = SessionLocal()
     try:
-        buildings = session.query(Building).limit(5).all()  # Process first 5 for demo
-        
-        forecaster = EnergyForecaster()
-        
-        for building in buildings:
-            logger.info(f"Forecasting for building {building.id}: {building.name}")
-            
-            # Get historical data
-            df = get_building_data(building.id, hours=720)  # 30 days
-            if df.empty or len(df) < 168:  # Need at least 1 week
-                logger.warning(f"Insufficient data for forecasting building {building.id}")
-                continue
-            
-            try:
-                # Train and forecast
-                forecast_results = forecaster.forecast(df, periods=24)  # 24 hour forecast
-                
-                logger.info(f"✅ Generated 24-hour forecast for building {building.id}")
-                logger.info(f"   Predicted total: {forecast_results['total_predicted_kwh']:.2f} kWh")
-                
-            except Exception as e:
-                logger.error(f"❌ Error forecasting building {building.id}: {e}")
-                continue
+        hours = FORECAST_HOURS if forecast and FORECASTING_AVAILABLE else ANOMALY_HOURS
+        data = get_shard_data(session, building_ids, hours)
+        by_building = {building_id: rows for building_id, rows in data.groupby('building_id', sort=False)}
+        empty = data.iloc[:0]
+        weather = get_shard_weather(session, building_ids, data, 24) if forecast and FORECASTING_AVAILABLE else {}
         
-        logger.info("🎉 Forecasting completed!")
-        
-    except Exception as e:
-        logger.error(f"❌ Forecasting failed: {e}")
+        reports = []
+        for building_id in building_ids:
+            start = time.perf_counter()
+            report = process_building(
+                session, building_id, by_building.get(building_id, empty), forecast, weather.get(building_id)
+            )
+            report['total_seconds'] = time.perf_counter() - start
+            reports.append(report)
+        return reports
     finally:
         session.close()
 
+def run_campus(workers: Optional[int] = None, limit: Optional[int] = None, forecast: bool = True) -> pd.DataFrame:
+    """
+    Run anomaly detection and forecasting for all buildings in parallel
+    
+    Returns:
+        One row per building with status, results and timings
+    """
+    logger.info("🔍 Running anomaly detection and forecasting...")
+    workers = workers or settings.MAX_WORKERS
+    
+    building_ids = get_building_ids(limit)
+    if not building_ids:
+        logger.warning("No buildings to process")
+        return pd.DataFrame()
+    
+    shard_count = min(len(building_ids), workers * SHARDS_PER_WORKER)
+    shards = [shard.tolist() for shard in np.array_split(np.array(building_ids), shard_count)]
+    logger.info(f"🏢 {len(building_ids)} buildings in {len(shards)} shards across {workers} workers")
+    
+    start = time.perf_counter()
+    reports = []
+    cv_workers = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cv_workers,)) as pool:
+        futures = {pool.submit(run_shard, shard, forecast): shard for shard in shards}
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                reports.extend(future.result())
+            except Exception as e:
+                # The shard's data could not be loaded; its buildings are reported as failed
+                logger.error(f"❌ Shard {shard[0]}-{shard[-1]} failed: {e}")
+                reports.extend(
+                    {'building_id': building_id, 'status': 'failed', 'error': f"shard: {e}"}
+                    for building_id in shard
+                )
+            logger.info(f"   {len(reports)}/{len(building_ids)} buildings done")
+    
+    report = pd.DataFrame(reports).sort_values('building_id').reset_index(drop=True)
+    log_campus_report(report, time.perf_counter() - start)
+    return report
+
+def log_campus_report(report: pd.DataFrame, elapsed: float):
+    """Summary of a campus run with per-building timings"""
+    status_counts = report['status'].value_counts().to_dict()
+    logger.info(f"🎉 Campus run completed in {elapsed:.1f}s: {status_counts}")
+    logger.info(f"   Anomalies stored: {int(report['anomalies'].fillna(0).sum()) if 'anomalies' in report else 0}")
+    
+    if 'total_seconds' in report:
+        timings = report['total_seconds'].dropna()
+        if len(timings):
+            logger.info(
+                f"   Per building: p50 {timings.quantile(0.5):.2f}s, p95 {timings.quantile(0.95):.2f}s, "
+                f"max {timings.max():.2f}s"
+            )
+        for _, row in report.dropna(subset=['total_seconds']).nlargest(5, 'total_seconds').iterrows():
+            logger.info(
+                f"   Slowest: building {int(row['building_id'])} {row['total_seconds']:.2f}s "
+                f"({int(row['rows'])} rows, anomaly {row['anomaly_seconds']:.2f}s, forecast {row['forecast_seconds']:.2f}s)"
+            )
+    
+    for _, row in report[report['status'] == 'failed'].head(20).iterrows():
+        logger.warning(f"   ❌ Building {int(row['building_id'])}: {row['error']}")
+
 def main():
     """Main function"""
     logger.info("🌱 GreenPulse ML Models Runner")
     logger.info("=" * 40)
     
     try:
-        # Run anomaly detection
-        run_anomaly_detection()
-        
-        # Run forecasting
-        run_forecasting()
+        run_campus()
         
         logger.info("🎉 All ML models completed successfully!")
         
@@ -172,4 +312,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,337 @@
+"""
+Incremental feature extraction for streaming anomaly detection
+
+StreamingFeatureExtractor produces, one reading at a time, the same feature
+rows EnergyAnomalyDetector.prepare_features computes for a whole DataFrame.
+Each window keeps a ring buffer of its raw values plus running aggregates,
+so a new reading costs the same no matter how much history came before it.
+
+The running means and variances use the same compensated add/remove updates
+as pandas' rolling windows, in the same order, so the emitted values are
+bit-for-bit equal to the batch features and a model fitted on
+prepare_features output scores them identically.
+
+The extractor's state is a small JSON-compatible dict (to_dict/from_dict),
+so it can be stored between readings and restored in another process.
+"""
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import math
+
+import numpy as np
+import pandas as pd
+
+ENERGY_MA_SHORT_WINDOW = 6
+ENERGY_WINDOW = 24
+TEMPERATURE_WINDOW = 168
+LAG_LONG = 24
+
+WEATHER_COLUMNS = ['air_temperature', 'wind_speed', 'cloud_coverage']
+
+# Same expressions prepare_features evaluates on Series, so the values match to the last bit
+_HOURS = np.arange(24)
+_DAYS = np.arange(7)
+HOUR_SIN = np.sin(2 * np.pi * _HOURS / 24).tolist()
+HOUR_COS = np.cos(2 * np.pi * _HOURS / 24).tolist()
+DAY_SIN = np.sin(2 * np.pi * _DAYS / 7).tolist()
+DAY_COS = np.cos(2 * np.pi * _DAYS / 7).tolist()
+
+def _float(value) -> float:
+    return math.nan if value is None else float(value)
+
+def _divide(numerator: float, denominator: float) -> float:
+    """numpy float division semantics: x/0 is +-inf, 0/0 and NaN operands are NaN"""
+    if denominator != 0 or math.isnan(denominator):
+        return numerator / denominator
+    if numerator == 0 or math.isnan(numerator):
+        return math.nan
+    return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+
+def _nan_to_none(values: Iterable[float]) -> List[Optional[float]]:
+    return [None if math.isnan(value) else value for value in values]
+
+class RollingMean:
+    """Running mean of a fixed window, updated like pandas' roll_mean"""
+
+    def __init__(self):
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = math.nan
+        self.started = False
+
+    def add(self, value: float):
+        if not self.started:
+            self.prev_value = value
+            self.started = True
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+            # Constant runs are returned exactly, without summation error
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+    def remove(self, value: float):
+        if value == value:
+            self.nobs -= 1
+            y = -value - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct -= 1
+
+    def value(self) -> float:
+        if self.nobs == 0:
+            return math.nan
+        result = self.sum_x / self.nobs
+        if self.num_consecutive_same_value >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+    def to_dict(self) -> Dict:
+        state = dict(self.__dict__)
+        state['prev_value'] = None if math.isnan(self.prev_value) else self.prev_value
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'RollingMean':
+        window = cls()
+        window.__dict__.update(state)
+        window.prev_value = _float(state['prev_value'])
+        return window
+
+class RollingVariance:
+    """Running sample variance (ddof=1) of a fixed window, updated like pandas' roll_var"""
+
+    def __init__(self):
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = math.nan
+        self.started = False
+
+    def add(self, value: float):
+        if not self.started:
+            self.prev_value = value
+            self.started = True
+        if value == value:
+            self.nobs += 1
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+            # Welford's update with Kahan compensation
+            prev_mean = self.mean_x - self.compensation_add
+            y = value - self.compensation_add
+            t = y - self.mean_x
+            self.compensation_add = t + self.mean_x - y
+            self.mean_x = self.mean_x + t / self.nobs
+            self.ssqdm_x = self.ssqdm_x + (value - prev_mean) * (value - self.mean_x)
+
+    def remove(self, value: float):
+        if value == value:
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean_x - self.compensation_remove
+                y = value - self.compensation_remove
+                t = y - self.mean_x
+                self.compensation_remove = t + self.mean_x - y
+                self.mean_x = self.mean_x - t / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (value - prev_mean) * (value - self.mean_x)
+            else:
+                self.mean_x = 0.0
+                self.ssqdm_x = 0.0
+
+    def std(self) -> float:
+        if self.nobs <= 1:
+            # A single observation has no sample std (prepare_features fills it with 0)
+            return math.nan
+        if self.num_consecutive_same_value >= self.nobs:
+            return 0.0
+        variance = self.ssqdm_x / (self.nobs - 1.0)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        state = dict(self.__dict__)
+        state['prev_value'] = None if math.isnan(self.prev_value) else self.prev_value
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'RollingVariance':
+        window = cls()
+        window.__dict__.update(state)
+        window.prev_value = _float(state['prev_value'])
+        return window
+
+class StreamingFeatureExtractor:
+    """
+    Per-building (and meter) feature state for streaming anomaly detection
+
+    Feed readings in timestamp order with update(); each call returns the
+    feature row prepare_features would produce for that reading as the last
+    row of the building's history.
+    """
+
+    def __init__(self, building_id: Optional[int] = None):
+        self.building_id = building_id
+        self.last_timestamp: Optional[datetime] = None
+        self.count = 0
+
+        # Last ENERGY_WINDOW readings (NaN kept, as in the Series) and LAG_LONG-back lookups
+        self.readings: deque = deque(maxlen=ENERGY_WINDOW)
+        self.temperatures: deque = deque(maxlen=TEMPERATURE_WINDOW)
+
+        self.ma_6h = RollingMean()
+        self.ma_24h = RollingMean()
+        self.var_24h = RollingVariance()
+        self.temp_ma = RollingMean()
+
+    def update(self, reading: Dict) -> Dict:
+        """
+        Add one reading and return its feature row
+
+        Args:
+            reading: Dict with 'timestamp' and 'meter_reading', and optionally
+                'building_id' and the weather columns
+
+        Returns:
+            Dict of feature values keyed like prepare_features' columns
+        """
+        timestamp = pd.Timestamp(reading['timestamp'])
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(
+                f"Readings must arrive in timestamp order: {timestamp} is before {self.last_timestamp}"
+            )
+
+        value = _float(reading['meter_reading'])
+        readings = self.readings
+
+        # Values leaving each window, read before the ring buffer advances
+        lag_1h = readings[-1] if readings else math.nan
+        lag_24h = readings[0] if len(readings) == LAG_LONG else math.nan
+
+        if len(readings) >= ENERGY_MA_SHORT_WINDOW:
+            self.ma_6h.remove(readings[-ENERGY_MA_SHORT_WINDOW])
+        if len(readings) == ENERGY_WINDOW:
+            self.ma_24h.remove(readings[0])
+            self.var_24h.remove(readings[0])
+
+        readings.append(value)
+        self.ma_6h.add(value)
+        self.ma_24h.add(value)
+        self.var_24h.add(value)
+
+        hour = timestamp.hour
+        day_of_week = timestamp.dayofweek
+
+        ma_24h = self.ma_24h.value()
+        std_24h = self.var_24h.std()
+        if math.isnan(std_24h):
+            std_24h = 0.0
+
+        window_values = [v for v in readings if v == v]
+        deviation = value - ma_24h
+
+        features = {
+            'timestamp': timestamp,
+            'building_id': reading.get('building_id', self.building_id),
+            'meter_reading': value,
+            'hour': hour,
+            'day_of_week': day_of_week,
+            'month': timestamp.month,
+            'is_weekend': int(day_of_week >= 5),
+            'is_business_hours': int(8 <= hour <= 18 and day_of_week < 5),
+            'hour_sin': HOUR_SIN[hour],
+            'hour_cos': HOUR_COS[hour],
+            'day_sin': DAY_SIN[day_of_week],
+            'day_cos': DAY_COS[day_of_week],
+            'energy_ma_6h': self.ma_6h.value(),
+            'energy_ma_24h': ma_24h,
+            'energy_std_24h': std_24h,
+            'energy_max_24h': max(window_values) if window_values else math.nan,
+            'energy_min_24h': min(window_values) if window_values else math.nan,
+            'energy_lag_1h': value if math.isnan(lag_1h) else lag_1h,
+            'energy_lag_24h': value if math.isnan(lag_24h) else lag_24h,
+            'energy_deviation_from_ma': deviation,
+            'energy_deviation_pct': _divide(deviation, ma_24h),
+            'energy_zscore': _divide(deviation, std_24h),
+        }
+
+        if 'air_temperature' in reading:
+            temperature = _float(reading['air_temperature'])
+            if len(self.temperatures) == TEMPERATURE_WINDOW:
+                self.temp_ma.remove(self.temperatures[0])
+            self.temperatures.append(temperature)
+            self.temp_ma.add(temperature)
+            features['air_temperature'] = temperature
+            features['temp_deviation'] = abs(temperature - self.temp_ma.value())
+
+        for column in ('wind_speed', 'cloud_coverage'):
+            if column in reading:
+                features[column] = _float(reading[column])
+
+        # prepare_features fills remaining NaN with 0 (infinities are kept)
+        for name, feature in features.items():
+            if isinstance(feature, float) and math.isnan(feature):
+                features[name] = 0.0
+        if features['building_id'] is None:
+            features['building_id'] = 0
+
+        self.last_timestamp = timestamp
+        self.count += 1
+        return features
+
+    def update_many(self, readings: Iterable[Dict]) -> List[Dict]:
+        """Feature rows for several readings, in order"""
+        return [self.update(reading) for reading in readings]
+
+    def to_dict(self) -> Dict:
+        """JSON-compatible snapshot of the extractor state"""
+        return {
+            'building_id': self.building_id,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp is not None else None,
+            'count': self.count,
+            'readings': _nan_to_none(self.readings),
+            'temperatures': _nan_to_none(self.temperatures),
+            'ma_6h': self.ma_6h.to_dict(),
+            'ma_24h': self.ma_24h.to_dict(),
+            'var_24h': self.var_24h.to_dict(),
+            'temp_ma': self.temp_ma.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'StreamingFeatureExtractor':
+        """Restore an extractor saved with to_dict"""
+        extractor = cls(building_id=state['building_id'])
+        if state['last_timestamp'] is not None:
+            extractor.last_timestamp = pd.Timestamp(state['last_timestamp'])
+        extractor.count = state['count']
+        extractor.readings.extend(_float(value) for value in state['readings'])
+        extractor.temperatures.extend(_float(value) for value in state['temperatures'])
+        extractor.ma_6h = RollingMean.from_dict(state['ma_6h'])
+        extractor.ma_24h = RollingMean.from_dict(state['ma_24h'])
+        extractor.var_24h = RollingVariance.from_dict(state['var_24h'])
+        extractor.temp_ma = RollingMean.from_dict(state['temp_ma'])
+        return extractor